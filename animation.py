@@ -0,0 +1,297 @@
+import os
+import struct
+import threading
+import time
+from array import array
+from config import (
+    NUM_PCBS,
+    ANIMATION_FRAME_DURATION,
+    ANIMATION_LATE_TOLERANCE,
+    CLIPS_DIR,
+)
+from framebuffer import pack_words, unpack_words
+from hardware import get_wall, show_frame
+from presets import load_frame
+from metrics import ANIMATION_LATENESS_SECONDS, ANIMATION_FRAMES_DROPPED
+
+
+class Animation:
+    """Sequence of packed frames, each shown for its own duration in seconds"""
+
+    def __init__(self, frames=(), name=None, num_pcbs=NUM_PCBS):
+        self.name = name
+        self.num_pcbs = num_pcbs
+        self.frames = []
+        for words, duration in frames:
+            self.add_frame(words, duration)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def add_frame(self, words, duration=ANIMATION_FRAME_DURATION):
+        """Append a frame given as one word per PCB"""
+        if len(words) != self.num_pcbs:
+            raise ValueError(f'expected {self.num_pcbs} words, got {len(words)}')
+        if duration <= 0:
+            raise ValueError('frame duration must be positive')
+        self.frames.append((array('I', words), float(duration)))
+
+
+def chase_animation(duration=ANIMATION_FRAME_DURATION, wall=None):
+    """Light one display at a time, in physical reading order"""
+    wall = get_wall(wall)
+    anim = Animation(name='chase', num_pcbs=wall.num_pcbs)
+    for chain_index, shift in wall.positions:
+        words = [0] * wall.num_pcbs
+        words[chain_index] = 0xFF << shift
+        anim.add_frame(words, duration)
+    return anim
+
+
+def preset_animation(names, duration=ANIMATION_FRAME_DURATION, wall=None):
+    """Compile a list of presets into an animation, one frame per preset"""
+    wall = get_wall(wall)
+    anim = Animation(name='presets', num_pcbs=wall.num_pcbs)
+    for name in names:
+        words = load_frame(name, wall.num_pcbs)
+        if words is None:
+            raise ValueError(f"Preset not found: {name}")
+        anim.add_frame(words, duration)
+    return anim
+
+
+# Clips are a 12-byte header, then per frame a 2-byte duration in
+# milliseconds followed by 3 bytes per PCB
+CLIP_EXT = '.sgc'
+CLIP_MAGIC = b'7SGC'
+CLIP_VERSION = 1
+CLIP_HEADER = struct.Struct('<4sBxHI')
+CLIP_DURATION = struct.Struct('<H')
+
+
+def encode_clip(anim):
+    """Encode an Animation as the contents of a clip file"""
+    parts = [CLIP_HEADER.pack(CLIP_MAGIC, CLIP_VERSION, anim.num_pcbs, len(anim))]
+    for words, duration in anim:
+        parts.append(CLIP_DURATION.pack(min(0xFFFF, max(1, round(duration * 1000)))))
+        parts.append(pack_words(words))
+    return b''.join(parts)
+
+
+def decode_clip(data, name=None):
+    """Decode the contents of a clip file into an Animation"""
+    if len(data) < CLIP_HEADER.size:
+        raise ValueError("Not a clip file")
+    magic, version, num_pcbs, count = CLIP_HEADER.unpack_from(data)
+    if magic != CLIP_MAGIC or version != CLIP_VERSION:
+        raise ValueError("Not a clip file")
+    frame_size = CLIP_DURATION.size + 3 * num_pcbs
+    if len(data) < CLIP_HEADER.size + count * frame_size:
+        raise ValueError("Truncated clip file")
+    anim = Animation(name=name, num_pcbs=num_pcbs)
+    offset = CLIP_HEADER.size
+    for _ in range(count):
+        (ms,) = CLIP_DURATION.unpack_from(data, offset)
+        words = unpack_words(data[offset + CLIP_DURATION.size : offset + frame_size])
+        anim.frames.append((words, ms / 1000))
+        offset += frame_size
+    return anim
+
+
+def clip_path(name):
+    """Path of the named clip; ValueError unless it stays inside ``CLIPS_DIR``"""
+    if (
+        not isinstance(name, str)
+        or name in ('', '.', '..')
+        or any(c in name for c in '/\\\0')
+    ):
+        raise ValueError(f"Invalid clip name: {name!r}")
+    path = os.path.join(CLIPS_DIR, f"{name}{CLIP_EXT}")
+    if os.path.dirname(os.path.realpath(path)) != os.path.realpath(CLIPS_DIR):
+        raise ValueError(f"Invalid clip name: {name!r}")
+    return path
+
+
+def save_clip(name, anim):
+    """Save an Animation to the clips directory; ValueError for a bad name"""
+    filename = clip_path(name)
+    try:
+        os.makedirs(CLIPS_DIR, exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(encode_clip(anim))
+        os.chmod(filename, 0o666)
+        return True
+    except Exception as e:
+        print(f"Error saving clip: {e}")
+        return False
+
+
+def load_clip(name, wall=None):
+    """Load a saved clip as an Animation for ``wall``, or None if it is missing
+
+    Clips converted for a shorter or longer wall are padded with blank PCBs
+    or truncated. A name that would lead outside the clips directory raises
+    ValueError.
+    """
+    wall = get_wall(wall)
+    path = clip_path(name)
+    try:
+        with open(path, 'rb') as f:
+            anim = decode_clip(f.read(), name)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Error loading clip: {e}")
+        return None
+    if anim.num_pcbs != wall.num_pcbs:
+        frames = [
+            ((list(words) + [0] * wall.num_pcbs)[: wall.num_pcbs], duration)
+            for words, duration in anim
+        ]
+        anim = Animation(frames, name, wall.num_pcbs)
+    return anim
+
+
+def get_all_clips():
+    """Get a sorted list of saved clip names"""
+    try:
+        return sorted(
+            filename[: -len(CLIP_EXT)]
+            for filename in os.listdir(CLIPS_DIR)
+            if filename.endswith(CLIP_EXT)
+        )
+    except FileNotFoundError:
+        return []
+
+
+class AnimationPlayer:
+    """Plays frames against absolute deadlines on a background thread
+
+    Each frame's deadline is the previous deadline plus its duration divided
+    by ``speed``, so time spent drawing never accumulates as drift. A frame
+    shown more than ``ANIMATION_LATE_TOLERANCE`` after its deadline counts
+    as late; one whose whole slot has already passed is dropped, except the
+    last frame of a run that doesn't loop, which is always shown.
+    """
+
+    def __init__(self, show=show_frame, clock=time.monotonic):
+        self.show = show
+        self.clock = clock
+        self.speed = 1.0
+        self._stop = threading.Event()
+        self._thread = None
+        # Serialises play/stop so concurrent requests can't orphan a thread
+        self._control_lock = threading.Lock()
+        self._reset_stats()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def play(self, frames, loop=True, speed=None):
+        """Start playing ``frames`` in the background, replacing any current animation
+
+        ``frames`` is an Animation or any iterable of ``(words, duration)``;
+        only re-iterable sequences can loop.
+        """
+        if speed is not None:
+            self.set_speed(speed)
+        with self._control_lock:
+            self._stop_locked()
+            self._stop = threading.Event()
+            self._reset_stats()
+            thread = threading.Thread(
+                target=self._run,
+                args=(frames, loop, self._stop),
+                name='animation',
+                daemon=True,
+            )
+            thread.start()
+            self._thread = thread
+
+    def stop(self, timeout=2):
+        """Stop playback and wait for the player thread to finish"""
+        with self._control_lock:
+            self._stop_locked(timeout)
+
+    def _stop_locked(self, timeout=2):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        # Only started threads are ever stored, so join can't fail here
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def set_speed(self, speed):
+        """Change the playback rate; 2.0 plays twice as fast"""
+        if speed <= 0:
+            raise ValueError('speed must be positive')
+        self.speed = float(speed)
+
+    def stats(self):
+        """Return playback counters as a dict"""
+        return {
+            'running': self.running,
+            'speed': self.speed,
+            'frames_shown': self.frames_shown,
+            'frames_late': self.frames_late,
+            'frames_dropped': self.frames_dropped,
+            'max_lateness': self.max_lateness,
+        }
+
+    def run(self, frames, loop=False):
+        """Play ``frames`` in the calling thread until done or stopped"""
+        self._stop = threading.Event()
+        self._reset_stats()
+        self._run(frames, loop, self._stop)
+
+    def _run(self, frames, loop, stop):
+        deadline = self.clock()
+        while not stop.is_set():
+            shown_any = False
+            # A frame whose slot passed only counts as dropped once another
+            # follows it, so a run that ends late still shows its last frame
+            skipped = None
+            for words, duration in frames:
+                if stop.is_set():
+                    return
+                if skipped is not None:
+                    self._drop()
+                    skipped = None
+                slot = duration / self.speed
+                lateness = self.clock() - deadline
+                if lateness > slot:
+                    skipped = (words, deadline)
+                else:
+                    self._show(words, lateness)
+                shown_any = True
+                deadline += slot
+                stop.wait(max(0.0, deadline - self.clock()))
+            if skipped is not None:
+                if loop:
+                    self._drop()
+                elif not stop.is_set():
+                    words, due = skipped
+                    self._show(words, self.clock() - due)
+            if not loop or not shown_any:
+                return
+
+    def _show(self, words, lateness):
+        if lateness > ANIMATION_LATE_TOLERANCE:
+            self.frames_late += 1
+        self.max_lateness = max(self.max_lateness, lateness)
+        ANIMATION_LATENESS_SECONDS.observe(max(0.0, lateness))
+        self.show(words)
+        self.frames_shown += 1
+
+    def _drop(self):
+        self.frames_dropped += 1
+        ANIMATION_FRAMES_DROPPED.inc()
+
+    def _reset_stats(self):
+        self.frames_shown = 0
+        self.frames_late = 0
+        self.frames_dropped = 0
+        self.max_lateness = 0.0
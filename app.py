@@ -1,66 +1,242 @@
-from flask import Flask, render_template, request, jsonify
+import os
 import threading
 import time
+from flask import Flask, Response, render_template, request, jsonify, g
 import RPi.GPIO as GPIO
 
 # Import our modular components
-from config import physical_to_chain, physical_order
-from hardware import (
-    setup_gpio,
-    update_display,
-    segment_grid,
-    clear_all_segments,
-    toggle_segment,
-    set_display_state,
+from config import (
+    STREAM_KEEPALIVE,
+    STREAM_MAX_CLIENTS,
+    SERVER_THREADS,
+    ANIMATION_FRAME_DURATION,
+    TICKER_CPS,
+    TRANSITION_STEPS,
+    TRANSITION_DURATION,
+    SERVER_MODE,
+    GRAYSCALE_BITS,
+    CONVERTER_THRESHOLD,
+    NETSTREAM_ENABLED,
 )
+from framebuffer import FrameBuffer, to_hex, from_hex
+from animation import (
+    Animation,
+    AnimationPlayer,
+    chase_animation,
+    preset_animation,
+    clip_path,
+    load_clip,
+    get_all_clips,
+)
+from glyphs import render_text
+from effects import effect_animation
+from transitions import preset_transition
+from playlist import PlaylistPlayer, compile_item
+from converter import convert, convert_to_library, read_frames
+from recording import (
+    RecordingPlayer,
+    get_all_recordings,
+    recording_path,
+    start_recording,
+    stop_recording,
+)
+from ticker import (
+    TickerFeed,
+    looping_cells,
+    start_file_reader,
+    ticker_frames,
+    ticker_source_path,
+)
+from hardware import setup_gpio, walls, default_wall, get_wall, UnknownWallError
 from presets import get_all_presets, save_preset, apply_preset, delete_preset
+from netstream import FrameListener
+from grayscale import GrayscaleRenderer, levels_from_words, refresh_report
+from metrics import registry, HTTP_REQUEST_SECONDS, HTTP_REQUESTS
 
 app = Flask(__name__)
 
-# Global variables for animation
-animation_running = False
-animation_thread = None
-
-
-# Animation function
-def animate_chase():
-    global animation_running
-    while animation_running:
-        for physical in physical_order:
-            if not animation_running:
-                break
-            physical_pcb, display_num = physical
-            chain_index = physical_to_chain.get(physical_pcb)
-            if chain_index is None:
-                continue
-            clear_all_segments()
-            set_display_state(chain_index, display_num, True)
-            update_display()
-            time.sleep(0.5)
-    clear_all_segments()
-    update_display()
+# One animation player per wall, each on its own thread against absolute deadlines
+players = {name: AnimationPlayer(show=wall.show_frame) for name, wall in walls.items()}
+player = players[default_wall.name]
+
+# One playlist per wall, preloaded into memory and played on its own timing loop
+playlists = {name: PlaylistPlayer(show=wall.show_frame) for name, wall in walls.items()}
+
+# Playback of recorded shows, straight to each wall's chain
+recording_players = {name: RecordingPlayer(wall) for name, wall in walls.items()}
+
+# Live text source for the running ticker on each wall, if any
+ticker_feeds = {}
+
+# Grayscale refresh loop for each wall that has one running
+grayscale_renderers = {}
+
+
+def _stream_limit(max_clients=STREAM_MAX_CLIENTS, threads=SERVER_THREADS):
+    """How many /stream viewers to let in: fewer than the server's workers, but at least one"""
+    return max(1, min(max_clients, threads - 1))
+
+
+# Open /stream connections; each holds a server worker, so some are always left
+stream_slots = threading.BoundedSemaphore(_stream_limit())
+
+# Receives frames streamed over UDP; started with the server when enabled
+listener = FrameListener(walls=walls.values()) if NETSTREAM_ENABLED else None
+
+
+def _payload():
+    """The request's JSON object, or its form fields for any other body"""
+    payload = request.get_json(silent=True)
+    if isinstance(payload, dict):
+        return payload
+    return request.form.to_dict()
+
+
+def _wall():
+    """Wall named by the request's ``wall`` parameter, or the default wall"""
+    name = request.values.get('wall')
+    if name is None:
+        name = _payload().get('wall')
+    return get_wall(name)
+
+
+def _close_ticker(wall):
+    feed = ticker_feeds.pop(wall.name, None)
+    if feed is not None:
+        feed.close()
+
+
+def _stop_grayscale(wall):
+    renderer = grayscale_renderers.pop(wall.name, None)
+    if renderer is not None:
+        renderer.stop()
+
+
+def _take_over(wall):
+    """Stop everything driving ``wall`` so the request's frame is what shows
+
+    Grayscale and recording playback pause the display writer and would
+    hold the new frame back; an animation, ticker or playlist would draw
+    over it.
+    """
+    _stop_grayscale(wall)
+    recording_players[wall.name].stop()
+    players[wall.name].stop()
+    playlists[wall.name].stop()
+    _close_ticker(wall)
+
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+
+@app.after_request
+def record_request(response):
+    # Streamed responses are timed up to the start of the stream
+    endpoint = request.endpoint or 'unmatched'
+    start = g.get('request_start')
+    if start is not None:
+        HTTP_REQUEST_SECONDS.labels(endpoint, request.method).observe(
+            time.perf_counter() - start
+        )
+    HTTP_REQUESTS.labels(endpoint, response.status_code).inc()
+    return response
+
+
+@app.errorhandler(UnknownWallError)
+def unknown_wall(e):
+    return jsonify(success=False, error=str(e)), 404
 
 
 # --- Routes ---
 @app.route('/')
 def index():
     presets = get_all_presets()
-    return render_template('index.html', presets=presets)
+    wall = _wall()
+    return render_template(
+        'index.html', presets=presets, layout=wall.layout, wall=wall.name
+    )
+
+
+@app.route('/walls', methods=['GET'])
+def list_walls():
+    """List the configured walls and their chain lengths."""
+    return jsonify(
+        success=True,
+        default=default_wall.name,
+        walls=[
+            {
+                'name': wall.name,
+                'num_pcbs': wall.num_pcbs,
+                'backend': wall.backend.name,
+                'layout': wall.layout.to_dict(),
+            }
+            for wall in walls.values()
+        ],
+    )
 
 
 @app.route('/toggle_segment', methods=['POST'])
 def toggle_segment_route():
-    pcb = int(request.form['pcb'])
-    segment = int(request.form['segment'])
-    result = toggle_segment(pcb, segment)
-    return jsonify(success=result)
+    try:
+        pcb = int(request.form['pcb'])
+        segment = int(request.form['segment'])
+    except (KeyError, ValueError):
+        return jsonify(success=False, error="pcb and segment must be numbers"), 400
+    wall = _wall()
+    _take_over(wall)
+    with wall.grid_lock:
+        try:
+            result = wall.toggle_segment(pcb, segment)
+        except ValueError as e:
+            return jsonify(success=False, error=str(e)), 400
+        state = wall.segment_grid.get(pcb, segment)
+        version = wall.frame_version
+    return jsonify(success=result, state=state, version=version)
+
+
+@app.route('/batch_update', methods=['POST'])
+def batch_update_route():
+    """Apply a JSON list of segment operations with a single display update."""
+    payload = _payload()
+    ops = payload.get('ops')
+    if not isinstance(ops, list):
+        return jsonify(success=False, error="Expected a list of ops")
+    wall = _wall()
+    _take_over(wall)
+    try:
+        version = wall.apply_segment_ops(ops)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e))
+    return jsonify(success=True, version=version)
+
+
+@app.route('/show_text', methods=['POST'])
+def show_text_route():
+    """Render text onto the wall starting at a display position."""
+    text = request.form.get('text', '')
+    try:
+        position = int(request.form.get('position', 0))
+    except ValueError:
+        return jsonify(success=False, error="Position must be a number")
+    overlay = request.form.get('overlay') in ('1', 'true')
+    wall = _wall()
+    _take_over(wall)
+    with wall.grid_lock:
+        words = list(wall.segment_grid.words) if overlay else None
+        version = wall.show_frame(render_text(text, position, words, wall))
+    return jsonify(success=True, version=version)
 
 
 @app.route('/clear_all', methods=['POST'])
 def clear_all_route():
-    clear_all_segments()
-    update_display()
-    return jsonify(success=True)
+    wall = _wall()
+    _take_over(wall)
+    with wall.grid_lock:
+        wall.clear_all_segments()
+        version = wall.update_display()
+    return jsonify(success=True, version=version)
 
 
 @app.route('/save_preset', methods=['POST'])
@@ -69,16 +245,53 @@ def save_preset_route():
     if not name:
         return jsonify(success=False, error="Preset name is required")
 
-    if save_preset(name, segment_grid):
+    wall = _wall()
+    with wall.grid_lock:
+        words = list(wall.segment_grid.words)
+    if save_preset(name, words):
         return jsonify(success=True, presets=get_all_presets())
     return jsonify(success=False, error="Failed to save preset")
 
 
 @app.route('/load_preset', methods=['POST'])
 def load_preset_route():
-    name = request.form['name']
-    if apply_preset(name):
-        return jsonify(success=True, grid=segment_grid)
+    """Apply a preset, optionally through a named ``transition``.
+
+    Transitions play on the wall's animation thread over ``duration``
+    seconds in ``steps`` frames; the response's grid is the preset itself.
+    """
+    payload = _payload()
+    name = payload.get('name')
+    if not name:
+        return jsonify(success=False, error="Preset name is required"), 400
+    wall = _wall()
+    if payload.get('transition'):
+        try:
+            transition = preset_transition(
+                name,
+                payload['transition'],
+                int(payload.get('steps', TRANSITION_STEPS)),
+                float(payload.get('duration', TRANSITION_DURATION)),
+                wall,
+                **payload.get('params', {}),
+            )
+        except (TypeError, ValueError) as e:
+            return jsonify(success=False, error=str(e))
+        if transition is None:
+            return jsonify(success=False, error="Preset not found")
+        _take_over(wall)
+        players[wall.name].play(transition, loop=False, speed=1.0)
+        target = FrameBuffer(wall.num_pcbs, wall.layout.segments_per_pcb)
+        target.assign(transition.target)
+        return jsonify(success=True, grid=target.to_grid(), steps=transition.steps)
+    _take_over(wall)
+    with wall.grid_lock:
+        if apply_preset(name, wall):
+            return jsonify(
+                success=True,
+                grid=wall.segment_grid.to_grid(),
+                version=wall.frame_version,
+            )
     return jsonify(success=False, error="Preset not found")
 
 
@@ -90,33 +303,424 @@ def delete_preset_route():
     return jsonify(success=False, error="Failed to delete preset")
 
 
+@app.route('/convert_media', methods=['POST'])
+def convert_media():
+    """Convert an uploaded image or GIF into a preset, or a clip if it has several frames."""
+    upload = request.files.get('file')
+    name = request.form.get('name')
+    if upload is None or not name:
+        return jsonify(success=False, error="A file and a name are required")
+    try:
+        clip_path(name)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e)), 400
+    wall = _wall()
+    try:
+        frames = read_frames(upload.stream)
+        anim = convert(
+            frames,
+            wall.layout,
+            float(request.form.get('threshold', CONVERTER_THRESHOLD)),
+            request.form.get('invert') in ('1', 'true'),
+            request.form.get('fit', 'contain'),
+        )
+    except (OSError, ValueError, RuntimeError) as e:
+        return jsonify(success=False, error=str(e))
+    kind, saved = convert_to_library(anim, name)
+    if not saved:
+        return jsonify(success=False, error=f"Failed to save {kind}")
+    return jsonify(
+        success=True,
+        kind=kind,
+        frames=len(anim),
+        presets=get_all_presets(),
+        clips=get_all_clips(),
+    )
+
+
 # --- Animation Routes ---
+def _build_animation(payload, wall):
+    """Compile the animation described by a start_animation request"""
+    duration = float(payload.get('duration', ANIMATION_FRAME_DURATION))
+    if payload.get('frames'):
+        anim = Animation(name='uploaded', num_pcbs=wall.num_pcbs)
+        for frame in payload['frames']:
+            anim.add_frame(
+                from_hex(frame['words']), float(frame.get('duration', duration))
+            )
+        return anim
+    if payload.get('presets'):
+        return preset_animation(payload['presets'], duration, wall)
+    if payload.get('clip'):
+        anim = load_clip(payload['clip'], wall)
+        if anim is None:
+            raise ValueError(f"Clip not found: {payload['clip']}")
+        return anim
+    if payload.get('effect'):
+        return effect_animation(
+            payload['effect'],
+            int(payload.get('steps', 60)),
+            duration,
+            wall,
+            **payload.get('params', {}),
+        )
+    return chase_animation(duration, wall)
+
+
 @app.route('/start_animation', methods=['POST'])
 def start_animation():
-    global animation_running, animation_thread
-    if not animation_running:
-        animation_running = True
-        animation_thread = threading.Thread(target=animate_chase)
-        animation_thread.start()
+    """Start an animation: uploaded hex frames, presets, a named effect, or the chase."""
+    payload = _payload()
+    wall = _wall()
+    try:
+        anim = _build_animation(payload, wall)
+        speed = float(payload.get('speed', 1.0))
+        loop = payload.get('loop', True) not in (False, 'false', '0')
+        _take_over(wall)
+        players[wall.name].play(anim, loop=loop, speed=speed)
+    except (KeyError, TypeError, ValueError, RuntimeError) as e:
+        return jsonify(success=False, error=str(e))
     return jsonify(success=True)
 
 
 @app.route('/stop_animation', methods=['POST'])
 def stop_animation():
-    global animation_running
-    animation_running = False
+    wall = _wall()
+    _take_over(wall)
+    with wall.grid_lock:
+        wall.clear_all_segments()
+        wall.update_display()
+    return jsonify(success=True)
+
+
+@app.route('/animation_speed', methods=['POST'])
+def animation_speed():
+    try:
+        players[_wall().name].set_speed(float(request.form['speed']))
+    except (KeyError, ValueError) as e:
+        return jsonify(success=False, error=str(e))
     return jsonify(success=True)
 
 
+@app.route('/animation_status', methods=['GET'])
+def animation_status():
+    """Return playback state including late and dropped frame counts."""
+    return jsonify(success=True, **players[_wall().name].stats())
+
+
+# --- Ticker Routes ---
+@app.route('/start_ticker', methods=['POST'])
+def start_ticker():
+    """Scroll text across the wall from a request, a local file/pipe, or a live feed.
+
+    With ``loop`` the text repeats; with ``path`` it is read from a file or
+    named pipe in TICKER_SOURCES_DIR on the Pi; with ``live`` the ticker keeps
+    running and more text can be sent to /ticker_append.
+    """
+    wall = _wall()
+    num_positions = len(wall.positions)
+    text = request.form.get('text', '')
+    path = request.form.get('path')
+    try:
+        cps = float(request.form.get('cps', TICKER_CPS))
+        start = int(request.form.get('start', 0))
+        width = int(request.form.get('width', num_positions - start))
+        if cps <= 0 or width <= 0 or not 0 <= start < num_positions:
+            raise ValueError("cps, start and width must be in range")
+        if path:
+            path = ticker_source_path(path)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e))
+
+    _take_over(wall)
+    feed = TickerFeed(text)
+    if request.form.get('loop') in ('1', 'true'):
+        cells = looping_cells(text)
+    else:
+        cells = feed.cells()
+        if path:
+            start_file_reader(
+                path, feed, follow=request.form.get('follow') in ('1', 'true')
+            )
+        elif request.form.get('live') not in ('1', 'true'):
+            feed.close()
+    ticker_feeds[wall.name] = feed
+    players[wall.name].play(
+        ticker_frames(cells, cps, start, width, wall=wall), loop=False, speed=1.0
+    )
+    return jsonify(success=True)
+
+
+@app.route('/ticker_append', methods=['POST'])
+def ticker_append():
+    """Queue more text on the running ticker."""
+    feed = ticker_feeds.get(_wall().name)
+    if feed is None or feed.closed:
+        return jsonify(success=False, error="No ticker running")
+    if not feed.push(request.form.get('text', '')):
+        return jsonify(success=False, error="Ticker queue is full"), 429
+    return jsonify(success=True)
+
+
+# --- Playlist Routes ---
+@app.route('/start_playlist', methods=['POST'])
+def start_playlist():
+    """Start a playlist of preset, text and animation items.
+
+    Every item is compiled and its presets read before playback starts, so
+    a missing preset fails the request instead of a show halfway through.
+    """
+    payload = _payload()
+    wall = _wall()
+    try:
+        items = [compile_item(spec, wall) for spec in payload['items']]
+    except (KeyError, TypeError, ValueError, RuntimeError) as e:
+        return jsonify(success=False, error=str(e)), 400
+    if not items:
+        return jsonify(success=False, error="Playlist is empty")
+    _take_over(wall)
+    loop = payload.get('loop', True) not in (False, 'false', '0')
+    playlists[wall.name].start(items, loop=loop)
+    return jsonify(success=True, count=len(items))
+
+
+@app.route('/pause_playlist', methods=['POST'])
+def pause_playlist():
+    playlists[_wall().name].pause()
+    return jsonify(success=True)
+
+
+@app.route('/resume_playlist', methods=['POST'])
+def resume_playlist():
+    playlists[_wall().name].resume()
+    return jsonify(success=True)
+
+
+@app.route('/skip_playlist', methods=['POST'])
+def skip_playlist():
+    """Skip to the next playlist item, or to item ``index``."""
+    index = request.values.get('index')
+    try:
+        playlists[_wall().name].skip(int(index) if index is not None else None)
+    except ValueError as e:
+        return jsonify(success=False, error=str(e))
+    return jsonify(success=True)
+
+
+@app.route('/stop_playlist', methods=['POST'])
+def stop_playlist():
+    playlists[_wall().name].stop()
+    return jsonify(success=True)
+
+
+@app.route('/playlist_status', methods=['GET'])
+def playlist_status():
+    """Return the current item, time into it and frame timing counters."""
+    return jsonify(success=True, **playlists[_wall().name].status())
+
+
+# --- Recording Routes ---
+@app.route('/start_recording', methods=['POST'])
+def start_recording_route():
+    """Record every frame the wall latches until /stop_recording."""
+    name = request.form.get('name')
+    if not name:
+        return jsonify(success=False, error="Recording name is required")
+    try:
+        start_recording(name, _wall())
+    except (OSError, ValueError) as e:
+        return jsonify(success=False, error=str(e))
+    return jsonify(success=True)
+
+
+@app.route('/stop_recording', methods=['POST'])
+def stop_recording_route():
+    frames = stop_recording(_wall())
+    if frames is None:
+        return jsonify(success=False, error="Not recording")
+    return jsonify(success=True, frames=frames, recordings=get_all_recordings())
+
+
+@app.route('/play_recording', methods=['POST'])
+def play_recording():
+    """Play a recorded show straight from its memory-mapped file.
+
+    Playback owns the chain while it runs; other updates are held until
+    it finishes or /stop_playback is called.
+    """
+    payload = _payload()
+    wall = _wall()
+    _take_over(wall)
+    try:
+        recording_players[wall.name].play(
+            recording_path(payload['name']),
+            loop=payload.get('loop', False) not in (False, 'false', '0'),
+            speed=float(payload.get('speed', 1.0)),
+        )
+    except FileNotFoundError:
+        return jsonify(success=False, error="Recording not found")
+    except (KeyError, OSError, ValueError) as e:
+        return jsonify(success=False, error=str(e))
+    return jsonify(success=True)
+
+
+@app.route('/stop_playback', methods=['POST'])
+def stop_playback():
+    recording_players[_wall().name].stop()
+    return jsonify(success=True)
+
+
+@app.route('/recording_status', methods=['GET'])
+def recording_status():
+    """Return capture state, playback position and the saved recordings."""
+    wall = _wall()
+    recorder = wall.recorder
+    return jsonify(
+        success=True,
+        recording=recorder is not None,
+        frames_recorded=recorder.frames if recorder else 0,
+        playback=recording_players[wall.name].stats(),
+        recordings=get_all_recordings(),
+    )
+
+
+# --- Grayscale Routes ---
+@app.route('/start_grayscale', methods=['POST'])
+def start_grayscale():
+    """Show per-segment intensity levels by binary code modulation.
+
+    The body gives ``levels`` as one list of segment levels per PCB, or a
+    single ``level`` applied to every segment currently lit. ``bits`` sets
+    the number of bit planes. Sending new levels while running swaps them in
+    at the next frame.
+    """
+    payload = _payload()
+    wall = _wall()
+    try:
+        renderer = grayscale_renderers.get(wall.name)
+        bits = int(payload.get('bits', renderer.bits if renderer else GRAYSCALE_BITS))
+        if renderer is None or renderer.bits != bits:
+            _stop_grayscale(wall)
+            renderer = GrayscaleRenderer(wall, bits)
+        if 'levels' in payload:
+            levels = payload['levels']
+        else:
+            with wall.grid_lock:
+                words = list(wall.segment_grid.words)
+            level = int(payload.get('level', renderer.max_level))
+            levels = levels_from_words(words, level, wall.layout.segments_per_pcb)
+        renderer.set_levels(levels)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify(success=False, error=str(e))
+    # A running renderer only swaps in the new levels, so keep it out of the take-over
+    grayscale_renderers.pop(wall.name, None)
+    _take_over(wall)
+    grayscale_renderers[wall.name] = renderer
+    renderer.start()
+    return jsonify(success=True)
+
+
+@app.route('/stop_grayscale', methods=['POST'])
+def stop_grayscale():
+    """Stop the grayscale refresh and show the segment grid again."""
+    _stop_grayscale(_wall())
+    return jsonify(success=True)
+
+
+@app.route('/grayscale_status', methods=['GET'])
+def grayscale_status():
+    """Return refresh timing and the refresh rate each bit depth could reach."""
+    wall = _wall()
+    renderer = grayscale_renderers.get(wall.name)
+    if renderer is None:
+        return jsonify(success=True, running=False)
+    stats = renderer.stats()
+    report = refresh_report(
+        stats['write_time_max'], renderer.base_interval, renderer.oe_pin is not None
+    )
+    return jsonify(success=True, **stats, report=report)
+
+
 @app.route('/get_grid_state', methods=['GET'])
 def get_grid_state():
     """Return the current state of the segment grid for UI updates."""
-    return jsonify(success=True, grid=segment_grid)
+    return jsonify(success=True, grid=_wall().segment_grid.to_grid())
+
+
+@app.route('/stream')
+def stream():
+    """Server-Sent Events stream pushing each new frame as hex PCB words.
+
+    Viewers beyond STREAM_MAX_CLIENTS get a 503 so they can't tie up every
+    server worker.
+    """
+
+    wall = _wall()
+    if not stream_slots.acquire(blocking=False):
+        return Response(
+            'Too many stream viewers', status=503, headers={'Retry-After': '5'}
+        )
+
+    def events():
+        version, words = wall.get_published_frame()
+        yield f"id: {version}\ndata: {to_hex(words)}\n\n"
+        while True:
+            changed = wall.wait_for_frame(version, timeout=STREAM_KEEPALIVE)
+            if changed is None:
+                yield ": keepalive\n\n"
+                continue
+            version, words = changed
+            yield f"id: {version}\ndata: {to_hex(words)}\n\n"
+
+    response = Response(
+        events(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    response.call_on_close(stream_slots.release)
+    return response
+
+
+@app.route('/display_stats', methods=['GET'])
+def display_stats():
+    """Return how many frames were requested vs actually latched."""
+    wall = _wall()
+    return jsonify(success=True, **wall.writer.stats(), **wall.refresh_stats())
+
+
+@app.route('/netstream_stats', methods=['GET'])
+def netstream_stats():
+    """Return counters for frames received over the UDP stream."""
+    if listener is None:
+        return jsonify(success=False, error="Frame streaming is disabled")
+    return jsonify(success=True, **listener.stats())
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Return timing histograms and counters in the Prometheus text format."""
+    return Response(
+        registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
 
 
 if __name__ == '__main__':
     try:
         setup_gpio()
-        app.run(debug=True, host='0.0.0.0')
+        production = SERVER_MODE == 'production'
+        # The debug reloader runs this twice; only the serving child listens
+        if listener is not None and (
+            production or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'
+        ):
+            listener.start()
+            print(f"Listening for streamed frames on UDP port {listener.port}")
+        if production:
+            from server import serve
+
+            if SERVER_THREADS < 2:
+                print("SERVER_THREADS is 1: a /stream viewer will block other requests")
+            serve(app)
+        else:
+            app.run(debug=True, host='0.0.0.0')
     except KeyboardInterrupt:
         GPIO.cleanup()
@@ -0,0 +1,283 @@
+import RPi.GPIO as GPIO
+import threading
+import time
+from config import SDI_PIN, CLOCK_PIN, LE_PIN, SPI_BUS, SPI_DEVICE, SPI_SPEED_HZ
+from metrics import GPIO_CALLS_PER_FRAME, BITBANG_DELAY_SECONDS
+
+try:
+    import spidev
+except ImportError:
+    spidev = None
+
+# Each PCB takes two 16-bit shifts: segments 0-7, then segments 8-23
+BYTES_PER_PCB = 4
+
+# Delay after each clock and latch edge when bit-banging, and the function
+# that waits it out (bench.py swaps in a counting fake)
+BITBANG_DELAY = 0.0001
+clock_delay = time.sleep
+
+# MOSI/SCLK pins of each SPI bus, used when falling back to bit-banging
+SPI_PINS = {0: (10, 11), 1: (20, 21)}
+
+
+def encode_frame(words):
+    """Encode PCB words into the byte stream shifted down the chain
+
+    The furthest PCB goes first so that PCB 0 ends up nearest the Pi. Every
+    16-bit shift is sent MSB first, matching ``shift_out``.
+    """
+    frame = bytearray(BYTES_PER_PCB * len(words))
+    i = 0
+    for word in reversed(words):
+        frame[i + 1] = word & 0xFF
+        frame[i + 2] = (word >> 16) & 0xFF
+        frame[i + 3] = (word >> 8) & 0xFF
+        i += BYTES_PER_PCB
+    return bytes(frame)
+
+
+def decode_frame(frame):
+    """Turn a shifted byte stream back into PCB words"""
+    words = []
+    for i in range(len(frame) - BYTES_PER_PCB, -1, -BYTES_PER_PCB):
+        words.append(frame[i + 1] | (frame[i + 3] << 8) | (frame[i + 2] << 16))
+    return words
+
+
+def shift_needed(held, frame):
+    """Fewest PCBs to shift in so a chain holding ``held`` ends up holding ``frame``
+
+    Shifting k PCBs pushes everything already in the chain k places further
+    along, so it is enough when the held frame without its furthest k PCBs
+    equals the target without its nearest k. Only ``frame``'s last k PCBs
+    (the nearest to the Pi) are then sent. Returns the full length when the
+    held contents are unknown.
+    """
+    num_pcbs = len(frame) // BYTES_PER_PCB
+    if held is None or len(held) != len(frame):
+        return num_pcbs
+    for k in range(num_pcbs):
+        cut = k * BYTES_PER_PCB
+        if held[cut:] == frame[: len(frame) - cut]:
+            return k
+    return num_pcbs
+
+
+def shift_out(data, sdi_pin=SDI_PIN, clock_pin=CLOCK_PIN):
+    """Shift out 16 bits of data to the shift registers"""
+    for bit in range(16):
+        GPIO.output(sdi_pin, (data & (1 << (15 - bit))) != 0)
+        GPIO.output(clock_pin, GPIO.HIGH)
+        clock_delay(BITBANG_DELAY)
+        GPIO.output(clock_pin, GPIO.LOW)
+
+
+def latch(le_pin=LE_PIN):
+    """Latch the data to the display"""
+    GPIO.output(le_pin, GPIO.HIGH)
+    clock_delay(BITBANG_DELAY)
+    GPIO.output(le_pin, GPIO.LOW)
+
+
+def output_enable(oe_pin, enabled):
+    """Drive the registers' active-low output enable pin"""
+    GPIO.output(oe_pin, GPIO.LOW if enabled else GPIO.HIGH)
+
+
+class BitBangBackend:
+    """Clock the chain by toggling GPIO pins one bit at a time"""
+
+    name = 'bitbang'
+    # Accepts a frame shorter than the chain and shifts just that much
+    partial_shift = True
+
+    def __init__(self, sdi_pin=SDI_PIN, clock_pin=CLOCK_PIN, le_pin=LE_PIN):
+        self.sdi_pin = sdi_pin
+        self.clock_pin = clock_pin
+        self.le_pin = le_pin
+
+    def setup(self):
+        GPIO.setup(self.sdi_pin, GPIO.OUT)
+        GPIO.setup(self.clock_pin, GPIO.OUT)
+        GPIO.setup(self.le_pin, GPIO.OUT)
+
+    def write_frame(self, frame):
+        """Shift a whole encoded frame out and latch it"""
+        for i in range(0, len(frame), 2):
+            shift_out((frame[i] << 8) | frame[i + 1], self.sdi_pin, self.clock_pin)
+        latch(self.le_pin)
+        # Counted per frame rather than per call to keep the bit loop untouched
+        bits = 8 * len(frame)
+        GPIO_CALLS_PER_FRAME.labels(self.name).observe(3 * bits + 2)
+        BITBANG_DELAY_SECONDS.inc((bits + 1) * BITBANG_DELAY)
+
+    def close(self):
+        pass
+
+
+class SpiBackend:
+    """Clock the chain with the SPI peripheral in a single bulk transfer
+
+    SDI and CLOCK must be wired to the SPI MOSI/SCLK pins (GPIO 10/11 on
+    SPI0). The latch is still driven as a plain GPIO.
+    """
+
+    name = 'spi'
+    partial_shift = True
+
+    def __init__(
+        self,
+        bus=SPI_BUS,
+        device=SPI_DEVICE,
+        speed_hz=SPI_SPEED_HZ,
+        le_pin=LE_PIN,
+        spi=None,
+    ):
+        self.bus = bus
+        self.device = device
+        self.speed_hz = speed_hz
+        self.le_pin = le_pin
+        self.spi = spi
+
+    def setup(self):
+        if self.spi is None:
+            if spidev is None:
+                raise RuntimeError("spidev is not installed")
+            self.spi = spidev.SpiDev()
+            self.spi.open(self.bus, self.device)
+        self.spi.max_speed_hz = self.speed_hz
+        self.spi.mode = 0
+        GPIO.setup(self.le_pin, GPIO.OUT)
+
+    def write_frame(self, frame):
+        """Send a whole encoded frame in one transfer and latch it"""
+        if frame:
+            self.spi.writebytes2(frame)
+        latch(self.le_pin)
+        GPIO_CALLS_PER_FRAME.labels(self.name).observe(2)
+        BITBANG_DELAY_SECONDS.inc(BITBANG_DELAY)
+
+    def fallback(self):
+        """Bit-bang backend driving the same pins, for when SPI is unavailable"""
+        sdi_pin, clock_pin = SPI_PINS.get(self.bus, (SDI_PIN, CLOCK_PIN))
+        return BitBangBackend(sdi_pin, clock_pin, self.le_pin)
+
+    def close(self):
+        if self.spi is not None:
+            self.spi.close()
+            self.spi = None
+
+
+class SharedClockGroup:
+    """Several chains with their own data pins sharing one clock and latch
+
+    Every clock edge shifts all the chains, so each write sends the current
+    frame of every member in lockstep and a single latch pulse updates them
+    together. A frame takes as long as the longest chain, however many
+    chains are in the group.
+    """
+
+    def __init__(self, clock_pin=CLOCK_PIN, le_pin=LE_PIN):
+        self.clock_pin = clock_pin
+        self.le_pin = le_pin
+        self.sdi_pins = []
+        self.frames = []
+        self._lock = threading.Lock()
+        self._is_setup = False
+
+    def add_member(self, sdi_pin, num_pcbs):
+        """Add a chain on ``sdi_pin`` and return the backend for its wall"""
+        self.sdi_pins.append(sdi_pin)
+        self.frames.append(bytes(BYTES_PER_PCB * num_pcbs))
+        return GroupMemberBackend(self, len(self.sdi_pins) - 1)
+
+    def setup(self):
+        with self._lock:
+            if self._is_setup:
+                return
+            for pin in self.sdi_pins:
+                GPIO.setup(pin, GPIO.OUT)
+            GPIO.setup(self.clock_pin, GPIO.OUT)
+            GPIO.setup(self.le_pin, GPIO.OUT)
+            self._is_setup = True
+
+    def write(self, index, frame):
+        """Replace one member's frame and shift every chain out together"""
+        with self._lock:
+            self.frames[index] = bytes(frame)
+            length = max(len(f) for f in self.frames)
+            # Shorter chains get leading padding that falls off their far end
+            padded = [bytes(length - len(f)) + f for f in self.frames]
+            members = list(zip(self.sdi_pins, padded))
+            for i in range(length):
+                for bit in range(7, -1, -1):
+                    for pin, data in members:
+                        GPIO.output(pin, (data[i] >> bit) & 1)
+                    GPIO.output(self.clock_pin, GPIO.HIGH)
+                    clock_delay(BITBANG_DELAY)
+                    GPIO.output(self.clock_pin, GPIO.LOW)
+            latch(self.le_pin)
+        bits = 8 * length
+        GPIO_CALLS_PER_FRAME.labels('group').observe((len(members) + 2) * bits + 2)
+        BITBANG_DELAY_SECONDS.inc((bits + 1) * BITBANG_DELAY)
+
+
+class GroupMemberBackend:
+    """Backend for one wall in a SharedClockGroup"""
+
+    name = 'group'
+
+    def __init__(self, group, index):
+        self.group = group
+        self.index = index
+        self.le_pin = group.le_pin
+
+    def setup(self):
+        self.group.setup()
+
+    def write_frame(self, frame):
+        self.group.write(self.index, frame)
+
+    def close(self):
+        pass
+
+
+class FakeBackend:
+    """In-memory backend that records every latched frame"""
+
+    name = 'fake'
+
+    def __init__(self):
+        self.frames = []
+
+    def setup(self):
+        pass
+
+    def write_frame(self, frame):
+        self.frames.append(bytes(frame))
+
+    def close(self):
+        pass
+
+    @property
+    def last_words(self):
+        """PCB words of the most recently latched frame, or None"""
+        if not self.frames:
+            return None
+        return decode_frame(self.frames[-1])
+
+
+BACKENDS = {
+    'bitbang': BitBangBackend,
+    'spi': SpiBackend,
+    'fake': FakeBackend,
+}
+
+
+def create_backend(name):
+    """Create an output backend by name"""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown output backend: {name}") from None
@@ -0,0 +1,596 @@
+# Benchmarks for the display pipeline and HTTP endpoints. Runs off-Pi:
+# RPi.GPIO is replaced by a fake that counts calls and can spin for a fixed
+# cost per call. Results are JSON so runs can be compared with --compare.
+import argparse
+import http.client
+import json
+import os
+import platform
+import socket
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager, redirect_stdout
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+import simulator
+
+try:
+    import RPi.GPIO  # noqa: F401
+except ImportError:
+    simulator.install()
+
+import backends  # noqa: E402
+import converter  # noqa: E402
+import effects  # noqa: E402
+import presets  # noqa: E402
+from animation import Animation, AnimationPlayer  # noqa: E402
+from backends import BitBangBackend, encode_frame  # noqa: E402
+from app import app  # noqa: E402
+from hardware import Wall, default_wall  # noqa: E402
+from server import PooledWSGIServer  # noqa: E402
+from config import SERVER_THREADS, SERVER_BACKLOG  # noqa: E402
+
+RESULTS_VERSION = 1
+
+
+class CountingGPIO(simulator.SimulatedGPIO):
+    """Simulated GPIO that counts calls and busy-waits ``cost`` seconds per output"""
+
+    def __init__(self, cost=0.0):
+        super().__init__()
+        self.cost = cost
+        self.calls = 0
+        self.sleeps = 0
+        self.slept = 0.0
+
+    def output(self, pin, value):
+        self.calls += 1
+        if self.cost:
+            end = time.perf_counter() + self.cost
+            while time.perf_counter() < end:
+                pass
+        super().output(pin, value)
+
+    def sleep(self, seconds):
+        """Replacement for the bit-bang delays: counted, not waited"""
+        self.sleeps += 1
+        self.slept += seconds
+
+
+@contextmanager
+def fake_gpio(cost=0.0, real_sleep=False):
+    """Route the backends' GPIO (and optionally their delays) to a CountingGPIO"""
+    gpio = CountingGPIO(cost)
+    saved_gpio, saved_delay = backends.GPIO, backends.clock_delay
+    backends.GPIO = gpio
+    if not real_sleep:
+        backends.clock_delay = gpio.sleep
+    try:
+        yield gpio
+    finally:
+        backends.GPIO = saved_gpio
+        backends.clock_delay = saved_delay
+
+
+def summarize(samples):
+    """Count, mean and percentiles of timings in seconds, reported in microseconds"""
+    ordered = sorted(samples)
+    if not ordered:
+        return {'count': 0}
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1e6
+
+    return {
+        'count': len(ordered),
+        'mean_us': statistics.fmean(ordered) * 1e6,
+        'min_us': ordered[0] * 1e6,
+        'p50_us': pct(50),
+        'p95_us': pct(95),
+        'p99_us': pct(99),
+        'max_us': ordered[-1] * 1e6,
+    }
+
+
+def _time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_encode(iterations):
+    """encode_frame on a full frame"""
+    words = [0x5A5A5A] * default_wall.num_pcbs
+    return summarize(_time_calls(lambda: encode_frame(words), iterations))
+
+
+def bench_shift(iterations, cost=0.0, real_sleep=False):
+    """A full bit-banged shift and latch through the fake GPIO"""
+    frame = encode_frame([0x5A5A5A] * default_wall.num_pcbs)
+    backend = BitBangBackend()
+    with fake_gpio(cost, real_sleep) as gpio:
+        gpio.attach(
+            simulator.ShiftChain(default_wall.num_pcbs),
+            backend.sdi_pin,
+            backend.clock_pin,
+            backend.le_pin,
+        )
+        result = summarize(_time_calls(lambda: backend.write_frame(frame), iterations))
+        result['gpio_calls_per_frame'] = gpio.calls / iterations
+        result['sleeps_per_frame'] = gpio.sleeps / iterations
+        result['sleep_s_per_frame'] = gpio.slept / iterations
+    return result
+
+
+def bench_update_display(iterations, cost=0.0):
+    """update_display() handoff, and the time until the frame is latched"""
+    saved = default_wall.backend
+    default_wall.set_backend(BitBangBackend())
+    try:
+        with fake_gpio(cost):
+            handoff, latched = [], []
+            for i in range(iterations):
+                with default_wall.grid_lock:
+                    default_wall.segment_grid.toggle(0, i % 24)
+                    start = time.perf_counter()
+                    default_wall.update_display()
+                handoff.append(time.perf_counter() - start)
+                default_wall.writer.flush()
+                latched.append(time.perf_counter() - start)
+    finally:
+        default_wall.set_backend(saved)
+    return {'handoff': summarize(handoff), 'latched': summarize(latched)}
+
+
+def _partial_workloads(num_pcbs, steps):
+    """Frame sequences for the partial refresh comparison"""
+    busy = [(0x5A5A5A + i * 0x010101) & 0xFFFFFF for i in range(num_pcbs)]
+    toggles = []
+    for i in range(steps):
+        words = list(busy)
+        words[0] ^= 1 << (i % 24)
+        toggles.append(words)
+    # Content moving away from the Pi one PCB per step, as a chase does
+    scroll = [[busy[(j - i) % num_pcbs] for j in range(num_pcbs)] for i in range(steps)]
+    # One lit PCB appearing on an otherwise blank wall
+    lone = []
+    for i in range(steps):
+        words = [0] * num_pcbs
+        words[i % num_pcbs] = 0xFFFFFF
+        lone.append(words)
+        lone.append([0] * num_pcbs)
+    return {'toggle_nearest': toggles, 'scroll': scroll, 'lone_pcb': lone[:steps]}
+
+
+def bench_partial(iterations, cost=0.0):
+    """Frame write time and GPIO calls with partial refresh off and on"""
+    layout = default_wall.layout
+    results = {}
+    for workload, frames in _partial_workloads(layout.num_pcbs, iterations).items():
+        results[workload] = {}
+        for mode in ('off', 'on'):
+            wall = Wall('bench-partial', layout, BitBangBackend(), mode)
+            encoded = [encode_frame(words) for words in frames]
+            with fake_gpio(cost) as gpio:
+                wall.write_frame(encode_frame([0] * layout.num_pcbs))
+                wall.pcbs_shifted = gpio.calls = 0
+                samples = []
+                for frame in encoded:
+                    start = time.perf_counter()
+                    wall.write_frame(frame)
+                    samples.append(time.perf_counter() - start)
+                result = summarize(samples)
+                result['gpio_calls_per_frame'] = gpio.calls / len(encoded)
+                result['pcbs_per_frame'] = wall.pcbs_shifted / len(encoded)
+            results[workload][mode] = result
+    return results
+
+
+def bench_effects(iterations):
+    """Time to generate one packed frame of each effect"""
+    if effects.np is None:
+        return {'error': "numpy is not installed"}
+    field = effects.field_for(default_wall.layout)
+    results = {}
+    for name, effect in effects.EFFECTS.items():
+        frames = effect(field, iterations)
+        results[name] = summarize(_time_calls(lambda: next(frames), iterations))
+    return results
+
+
+def bench_convert(frames):
+    """Sampling mask build, and converting a clip of random 640 x 360 frames"""
+    if converter.np is None:
+        return {'error': "numpy is not installed"}
+    layout = default_wall.layout
+    converter.sampler_for.cache_clear()
+    start = time.perf_counter()
+    converter.sampler_for(layout)
+    masks = time.perf_counter() - start
+    rng = converter.np.random.default_rng(0)
+    clip = [(rng.random((360, 640), dtype=converter.np.float32), 0.04)] * frames
+    start = time.perf_counter()
+    converter.convert(clip, layout)
+    elapsed = time.perf_counter() - start
+    return {
+        'masks_ms': masks * 1e3,
+        'frames': frames,
+        'total_s': elapsed,
+        'frames_per_second': frames / elapsed,
+    }
+
+
+def bench_presets(iterations, name):
+    """Preset load from disk (cold cache), from memory, and apply_preset"""
+    if name is None:
+        names = presets.get_all_presets()
+        if not names:
+            return {'error': "No presets to load"}
+        name = names[0]
+    if presets.load_frame(name) is None:
+        return {'error': f"Preset not found: {name}"}
+
+    def cold():
+        presets.repository.clear()
+        presets.load_frame(name)
+
+    with fake_gpio():
+        result = {
+            'load_cold': summarize(_time_calls(cold, iterations)),
+            'load_warm': summarize(
+                _time_calls(lambda: presets.load_frame(name), iterations)
+            ),
+            'apply': summarize(
+                _time_calls(lambda: presets.apply_preset(name), iterations)
+            ),
+        }
+        default_wall.writer.flush()
+    return result
+
+
+def bench_animation(frames, frame_duration):
+    """Deadline jitter of the animation player showing frames on the default wall"""
+    anim = Animation(num_pcbs=default_wall.num_pcbs)
+    for i in range(frames):
+        words = [0] * default_wall.num_pcbs
+        words[i % default_wall.num_pcbs] = 0xFFFFFF
+        anim.add_frame(words, frame_duration)
+    shown = []
+
+    def show(words):
+        shown.append(time.monotonic())
+        default_wall.show_frame(words)
+
+    player = AnimationPlayer(show=show)
+    with fake_gpio():
+        start = time.monotonic()
+        player.run(anim)
+        default_wall.writer.flush()
+    lateness = [max(0.0, t - (start + i * frame_duration)) for i, t in enumerate(shown)]
+    stats = player.stats()
+    return {
+        'frame_duration_s': frame_duration,
+        'lateness': summarize(lateness),
+        'frames_shown': stats['frames_shown'],
+        'frames_late': stats['frames_late'],
+        'frames_dropped': stats['frames_dropped'],
+    }
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Request handler that does not log every request"""
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def bench_endpoints(clients, requests_per_client):
+    """Throughput and latency of HTTP endpoints under concurrent clients"""
+    server = make_server(
+        '127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler
+    )
+    port = server.socket.getsockname()[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = {}
+    endpoints = [
+        ('toggle_segment', 'POST', '/toggle_segment', 'pcb=0&segment=0'),
+        ('get_grid_state', 'GET', '/get_grid_state', None),
+    ]
+    try:
+        with fake_gpio():
+            for name, method, path, body in endpoints:
+                samples = []
+                lock = threading.Lock()
+
+                def client():
+                    mine = []
+                    for _ in range(requests_per_client):
+                        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                        headers = (
+                            {'Content-Type': 'application/x-www-form-urlencoded'}
+                            if body
+                            else {}
+                        )
+                        start = time.perf_counter()
+                        conn.request(method, path, body, headers)
+                        conn.getresponse().read()
+                        mine.append(time.perf_counter() - start)
+                        conn.close()
+                    with lock:
+                        samples.extend(mine)
+
+                workers = [threading.Thread(target=client) for _ in range(clients)]
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                elapsed = time.perf_counter() - start
+                result = summarize(samples)
+                result['requests_per_s'] = len(samples) / elapsed
+                results[name] = result
+            default_wall.writer.flush()
+    finally:
+        server.shutdown()
+    results['clients'] = clients
+    return results
+
+
+def _toggle_client(port, requests_per_client, samples, errors, lock):
+    """Send toggles one after another, recording latencies and failures"""
+    mine, failed = [], 0
+    for _ in range(requests_per_client):
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            conn.request(
+                'POST',
+                '/toggle_segment',
+                'pcb=0&segment=0',
+                {'Content-Type': 'application/x-www-form-urlencoded'},
+            )
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                failed += 1
+                continue
+        except OSError:
+            failed += 1
+            continue
+        mine.append(time.perf_counter() - start)
+    with lock:
+        samples.extend(mine)
+        errors[0] += failed
+
+
+def _open_viewer(port):
+    """Connect a /stream viewer and wait for its response headers"""
+    sock = socket.create_connection(('127.0.0.1', port), timeout=10)
+    sock.sendall(b'GET /stream HTTP/1.0\r\nHost: localhost\r\n\r\n')
+    sock.recv(4096)
+    return sock
+
+
+def bench_load(
+    client_counts, requests_per_client, threads, backlog, viewers, max_p95_ms
+):
+    """Toggle latency on the production server as concurrent clients ramp up
+
+    ``viewers`` /stream connections stay open throughout, each holding a
+    worker as browsers do. ``max_clients`` is the most concurrent clients
+    served with no errors and a p95 latency within ``max_p95_ms``.
+    """
+    server = PooledWSGIServer(
+        '127.0.0.1', 0, app, threads, backlog, handler=QuietHandler
+    )
+    port = server.socket.getsockname()[1]
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    levels = {}
+    max_clients = 0
+    sockets = []
+    try:
+        with fake_gpio():
+            sockets = [_open_viewer(port) for _ in range(viewers)]
+            for clients in client_counts:
+                samples, errors, lock = [], [0], threading.Lock()
+                workers = [
+                    threading.Thread(
+                        target=_toggle_client,
+                        args=(port, requests_per_client, samples, errors, lock),
+                    )
+                    for _ in range(clients)
+                ]
+                start = time.perf_counter()
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+                elapsed = time.perf_counter() - start
+                result = summarize(samples)
+                result['errors'] = errors[0]
+                result['requests_per_s'] = len(samples) / elapsed
+                levels[str(clients)] = result
+                if errors[0] == 0 and result.get('p95_us', 0) <= max_p95_ms * 1000:
+                    max_clients = clients
+            default_wall.writer.flush()
+    finally:
+        for sock in sockets:
+            sock.close()
+        server.shutdown()
+        server.server_close()
+    return {
+        'threads': threads,
+        'backlog': backlog,
+        'viewers': viewers,
+        'max_p95_ms': max_p95_ms,
+        'levels': levels,
+        'max_clients': max_clients,
+        'rejected': server.rejected,
+    }
+
+
+def run(args):
+    """Run the selected benchmarks and return the results document"""
+    selected = set(args.only or BENCHMARKS)
+    results = {}
+    if 'encode' in selected:
+        results['encode'] = bench_encode(args.iterations * 10)
+    if 'shift' in selected:
+        results['shift'] = bench_shift(args.iterations, args.gpio_cost, args.real_sleep)
+    if 'update_display' in selected:
+        results['update_display'] = bench_update_display(
+            args.iterations, args.gpio_cost
+        )
+    if 'partial' in selected:
+        results['partial'] = bench_partial(args.iterations, args.gpio_cost)
+    if 'effects' in selected:
+        results['effects'] = bench_effects(args.iterations)
+    if 'convert' in selected:
+        results['convert'] = bench_convert(args.frames)
+    if 'presets' in selected:
+        results['presets'] = bench_presets(args.iterations, args.preset)
+    if 'animation' in selected:
+        results['animation'] = bench_animation(args.frames, args.frame_duration)
+    if 'endpoints' in selected:
+        results['endpoints'] = bench_endpoints(args.clients, args.requests)
+    if 'load' in selected:
+        results['load'] = bench_load(
+            args.load_clients,
+            args.requests,
+            args.threads,
+            args.backlog,
+            args.viewers,
+            args.max_p95_ms,
+        )
+    return {
+        'version': RESULTS_VERSION,
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'gpio_cost_s': args.gpio_cost,
+            'real_sleep': args.real_sleep,
+        },
+        'results': results,
+    }
+
+
+def flatten(results, prefix=''):
+    """Flatten nested results into ``{'a.b.c': number}``"""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(baseline, current):
+    """Return ``[(metric, old, new, percent change)]`` for metrics in both runs"""
+    old = flatten(baseline['results'])
+    new = flatten(current['results'])
+    rows = []
+    for metric in sorted(old.keys() & new.keys()):
+        change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+        rows.append((metric, old[metric], new[metric], change))
+    return rows
+
+
+BENCHMARKS = (
+    'encode',
+    'shift',
+    'update_display',
+    'partial',
+    'effects',
+    'convert',
+    'presets',
+    'animation',
+    'endpoints',
+    'load',
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the display pipeline and HTTP endpoints"
+    )
+    parser.add_argument(
+        '--only', action='append', choices=BENCHMARKS, help="run only these benchmarks"
+    )
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument(
+        '--gpio-cost', type=float, default=0.0, help="seconds each GPIO call takes"
+    )
+    parser.add_argument(
+        '--real-sleep', action='store_true', help="keep the bit-bang delays"
+    )
+    parser.add_argument(
+        '--preset', help="preset used by the preset benchmarks (default: the first one)"
+    )
+    parser.add_argument('--frames', type=int, default=100)
+    parser.add_argument('--frame-duration', type=float, default=0.02)
+    parser.add_argument('--clients', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=50, help="requests per client")
+    parser.add_argument(
+        '--load-clients',
+        type=lambda text: [int(n) for n in text.split(',')],
+        default=[1, 4, 16, 32, 64, 128],
+        help="comma-separated client counts for the load test",
+    )
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS)
+    parser.add_argument('--backlog', type=int, default=SERVER_BACKLOG)
+    parser.add_argument(
+        '--viewers',
+        type=int,
+        default=2,
+        help="/stream viewers open during the load test",
+    )
+    parser.add_argument(
+        '--max-p95-ms',
+        type=float,
+        default=100.0,
+        help="p95 latency a load level must stay under to count as served",
+    )
+    parser.add_argument(
+        '--output', help="write results to this JSON file instead of stdout"
+    )
+    parser.add_argument(
+        '--compare',
+        metavar='BASELINE',
+        help="report changes against an earlier results file",
+    )
+    args = parser.parse_args(argv)
+
+    # Progress messages go to stderr so stdout is only the results
+    with redirect_stdout(sys.stderr):
+        document = run(args)
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        for metric, old, new, change in compare(baseline, document):
+            print(
+                f"{metric:50s} {old:14.2f} {new:14.2f} {change:+8.1f}%", file=sys.stderr
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,86 +1,142 @@
 import os
+from layout import load_layout
 
 # GPIO Pin Configuration
 SDI_PIN = 10
 CLOCK_PIN = 11
 LE_PIN = 5
 
+# Output backend: 'spi' clocks the chain through SPI0 (GPIO 10/11) in one
+# transfer, 'bitbang' toggles the pins from Python, 'simulator' decodes the
+# frames in memory (see simulator.py)
+OUTPUT_BACKEND = 'bitbang'
+SPI_BUS = 0
+SPI_DEVICE = 0
+SPI_SPEED_HZ = 1000000
+
+# Partial refresh: the chain passes data along, so when the registers already
+# hold the target frame shifted down by k PCBs only k PCBs need to be sent.
+# 'on' sends the shortest suffix that works, 'compare' always sends full
+# frames but counts what partial refresh would have saved, 'off' disables it.
+PARTIAL_REFRESH = 'on'
+
+# Production server (python app.py with SERVER_MODE = 'production'): a fixed
+# pool of worker threads, with up to SERVER_BACKLOG connections waiting for
+# a free worker before new ones get a 503. Each /stream viewer holds a
+# worker, so at most STREAM_MAX_CLIENTS viewers (and never the whole pool)
+# are let in. SERVER_BACKEND = 'waitress' uses waitress instead, if installed.
+SERVER_MODE = 'dev'
+SERVER_HOST = '0.0.0.0'
+SERVER_PORT = 5000
+SERVER_THREADS = 16
+SERVER_BACKLOG = 64
+SERVER_BACKEND = 'pooled'
+
+# Minimum time between latches; updates arriving faster are coalesced
+DISPLAY_MIN_INTERVAL = 0.02
+
+# Seconds between keepalive comments on an idle /stream connection, and the
+# most viewers connected at once; more get a 503
+STREAM_KEEPALIVE = 15
+STREAM_MAX_CLIENTS = 8
+
+# UDP listener taking packed frames straight from an external renderer (see
+# netstream.py); after this many silent seconds a wall accepts any sequence
+NETSTREAM_ENABLED = False
+NETSTREAM_HOST = '0.0.0.0'
+NETSTREAM_PORT = 7700
+NETSTREAM_RESET_TIMEOUT = 2.0
+
+# Grayscale by binary code modulation (see grayscale.py): bit planes per
+# frame (levels = 2 ** bits), how long the least significant plane is shown,
+# and the refresh rate below which the wall is reported as flickering.
+# GRAYSCALE_OE_PIN drives the registers' output enable (active low) so planes
+# are blanked while shifting; None leaves OE tied on.
+GRAYSCALE_BITS = 4
+GRAYSCALE_BASE_INTERVAL = 0.0005
+GRAYSCALE_MIN_REFRESH_HZ = 100
+GRAYSCALE_OE_PIN = None
+
+# Default seconds per animation frame, and how far past its deadline a frame
+# may be shown before it is counted as late
+ANIMATION_FRAME_DURATION = 0.5
+ANIMATION_LATE_TOLERANCE = 0.005
+
+# Default steps and total seconds of a transition into a preset (see
+# transitions.py)
+TRANSITION_STEPS = 20
+TRANSITION_DURATION = 1.0
+
+# Seconds a playlist preset or text item stays up when it gives no duration,
+# and how often a playlist with nothing in its time windows checks again
+PLAYLIST_ITEM_DURATION = 10.0
+PLAYLIST_IDLE_POLL = 1.0
+
+# Default ticker speed in characters per second, how often a followed
+# ticker source file is polled for new text, and the most characters read
+# from it ahead of the scroll
+TICKER_CPS = 4.0
+TICKER_POLL_INTERVAL = 0.2
+TICKER_MAX_READ_AHEAD = 1024
+
+# Most characters a live ticker holds waiting to scroll; appends past this
+# are refused
+TICKER_MAX_PENDING = 4096
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Wall geometry and chain wiring: grid size, PCB numbering, chain order,
+# displays per PCB and segment bit order (see layouts/*.json)
+LAYOUT_FILE = os.path.join(SCRIPT_DIR, 'layouts', 'default.json')
+LAYOUT = load_layout(LAYOUT_FILE)
+
 # Display Configuration
-NUM_PCBS = 15
-NUM_SEGMENTS_PER_PCB = 24  # 24 bits per PCB (3 displays x 8 bits)
+NUM_PCBS = LAYOUT.num_pcbs
+NUM_SEGMENTS_PER_PCB = LAYOUT.segments_per_pcb  # 24 bits per PCB (3 displays x 8 bits)
 OFF_PATTERN = 0
 ON_PATTERN = 1
 
+# Walls driven by this process. Each has its own pins and optionally its own
+# 'layout' file; walls naming the same 'group' share CLOCK and LE and are
+# shifted in lockstep, one SDI each. 'oe_pin' is the chain's output enable.
+WALLS = [
+    {
+        'name': 'main',
+        'sdi_pin': SDI_PIN,
+        'clock_pin': CLOCK_PIN,
+        'le_pin': LE_PIN,
+        'backend': OUTPUT_BACKEND,
+        'partial_refresh': PARTIAL_REFRESH,
+        'oe_pin': GRAYSCALE_OE_PIN,
+    },
+]
+DEFAULT_WALL = 'main'
+
 # Set up absolute path for presets directory
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PRESETS_DIR = os.path.join(SCRIPT_DIR, 'presets')
 
-# Wiring/Lookup Setup
-physical_to_chain = {
-    1: 0,
-    6: 1,
-    11: 2,
-    2: 3,
-    7: 4,
-    12: 5,
-    3: 6,
-    8: 7,
-    13: 8,
-    4: 9,
-    9: 10,
-    14: 11,
-    5: 12,
-    10: 13,
-    15: 14,
-}
-
-physical_order = [
-    (1, 1),
-    (1, 2),
-    (1, 3),
-    (6, 1),
-    (6, 2),
-    (6, 3),
-    (11, 1),
-    (11, 2),
-    (11, 3),
-    (2, 1),
-    (2, 2),
-    (2, 3),
-    (7, 1),
-    (7, 2),
-    (7, 3),
-    (12, 1),
-    (12, 2),
-    (12, 3),
-    (3, 1),
-    (3, 2),
-    (3, 3),
-    (8, 1),
-    (8, 2),
-    (8, 3),
-    (13, 1),
-    (13, 2),
-    (13, 3),
-    (4, 1),
-    (4, 2),
-    (4, 3),
-    (9, 1),
-    (9, 2),
-    (9, 3),
-    (14, 1),
-    (14, 2),
-    (14, 3),
-    (5, 1),
-    (5, 2),
-    (5, 3),
-    (10, 1),
-    (10, 2),
-    (10, 3),
-    (15, 1),
-    (15, 2),
-    (15, 3),
-]
+# Animations saved as clip files, e.g. by converter.py
+CLIPS_DIR = os.path.join(SCRIPT_DIR, 'clips')
+
+# Recorded shows (see recording.py)
+RECORDINGS_DIR = os.path.join(SCRIPT_DIR, 'recordings')
+
+# Files and named pipes /start_ticker may read; its 'path' is relative to this
+TICKER_SOURCES_DIR = os.path.join(SCRIPT_DIR, 'ticker_sources')
+
+# Image conversion (see converter.py): sampling pixels per viewBox unit (a
+# display is 120 x 200 units), and the mean brightness that lights a segment
+CONVERTER_SCALE = 0.25
+CONVERTER_THRESHOLD = 0.5
+
+# Parsed presets kept in memory, and how often (seconds) a cached preset is
+# checked against its file's mtime
+PRESET_CACHE_SIZE = 256
+PRESET_CACHE_CHECK_INTERVAL = 1.0
+
+# Wiring/Lookup Setup, derived from the layout
+physical_to_chain = LAYOUT.physical_to_chain
+physical_order = LAYOUT.physical_order
 
 # Ensure presets directory exists
 if not os.path.exists(PRESETS_DIR):
@@ -3,6 +3,8 @@
 import sys
 from unittest.mock import MagicMock
 
+import pytest
+
 # Inject a fake RPi.GPIO module so hardware.py and app.py can be imported
 # without a real Raspberry Pi.
 gpio_mock = MagicMock()
@@ -12,3 +14,35 @@ gpio_mock.HIGH = 1
 gpio_mock.LOW = 0
 sys.modules["RPi"] = MagicMock()
 sys.modules["RPi.GPIO"] = gpio_mock
+
+
+class FakeClock:
+    """Fake monotonic time for injecting as ``clock``
+
+    Tests move it by setting ``now``; with a ``step`` it also moves on that
+    much every time it is read.
+    """
+
+    def __init__(self, now=0.0, step=0.0):
+        self.now = now
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def fake_clock():
+    """Factory for FakeClock: ``fake_clock(now=0.0, step=0.0)``"""
+    return FakeClock
+
+
+@pytest.fixture(autouse=True)
+def flush_display_writer():
+    """Write any coalesced frame before the next test starts counting GPIO calls."""
+    yield
+    if "hardware" in sys.modules:
+        sys.modules["hardware"].writer.flush()
+    # Drop the recorded calls, which otherwise pile up over the whole run
+    gpio_mock.reset_mock()
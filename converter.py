@@ -0,0 +1,299 @@
+import argparse
+import functools
+import os
+from config import (
+    LAYOUT,
+    CONVERTER_SCALE,
+    CONVERTER_THRESHOLD,
+    ANIMATION_FRAME_DURATION,
+)
+from animation import Animation, clip_path, save_clip
+from layout import (
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+    SEGMENT_NAMES,
+    SEGMENT_OUTLINES,
+    segment_center,
+)
+from presets import save_preset
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:
+    Image = None
+
+FITS = ('contain', 'cover', 'stretch')
+
+
+def _inside(points, xs, ys):
+    """Boolean mask of the points ``(xs, ys)`` inside a polygon (even-odd rule)"""
+    inside = np.zeros(xs.shape, dtype=bool)
+    for (x0, y0), (x1, y1) in zip(points, points[1:] + points[:1]):
+        if y0 == y1:
+            continue
+        crosses = (ys >= min(y0, y1)) & (ys < max(y0, y1))
+        at = x0 + (ys - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= crosses & (xs < at)
+    return inside
+
+
+class SegmentSampler:
+    """Per-segment pixel masks for sampling images onto a layout's segments
+
+    Images are resized to ``width`` x ``height`` pixels, ``scale`` pixels per
+    unit of the UI's display drawing, so a pixel maps onto the wall as it
+    is drawn in the browser. Each segment's mask is the set of pixels whose
+    centres fall inside its outline; a segment is lit when the mean
+    brightness over its mask passes the threshold. Segments are numbered
+    ``position * 8 + segment`` in reading order.
+    """
+
+    def __init__(self, layout=LAYOUT, scale=CONVERTER_SCALE):
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        self.layout = layout
+        self.scale = scale
+        cell_w = max(1, round(DISPLAY_WIDTH * scale))
+        cell_h = max(1, round(DISPLAY_HEIGHT * scale))
+        self.width = layout.displays_per_row * cell_w
+        self.height = layout.rows * cell_h
+
+        # Rasterize one display; every display reuses the same local masks
+        ly, lx = np.mgrid[0:cell_h, 0:cell_w]
+        xs = (lx + 0.5) * DISPLAY_WIDTH / cell_w
+        ys = (ly + 0.5) * DISPLAY_HEIGHT / cell_h
+        local = []
+        for name in SEGMENT_NAMES:
+            mask = _inside(list(SEGMENT_OUTLINES[name]), xs, ys)
+            if not mask.any():
+                # Too small to cover a pixel centre: use the pixel under it
+                cx, cy = segment_center(name)
+                mask[
+                    int(cy * cell_h / DISPLAY_HEIGHT), int(cx * cell_w / DISPLAY_WIDTH)
+                ] = True
+            local.append((ly[mask] * self.width + lx[mask]))
+
+        pixels = []
+        counts = []
+        weights = np.zeros((layout.num_positions * 8, layout.num_pcbs), dtype=np.int64)
+        for position in range(layout.num_positions):
+            row, column = layout.display_cell(position)
+            origin = row * cell_h * self.width + column * cell_w
+            for segment in range(8):
+                pixels.append(local[segment] + origin)
+                counts.append(len(local[segment]))
+                chain_index, bit = layout.locate(position, segment)
+                weights[position * 8 + segment, chain_index] = 1 << bit
+        # Pixels grouped by segment, so one reduceat sums every segment at once
+        self.pixels = np.concatenate(pixels)
+        self.counts = np.array(counts)
+        self.starts = np.concatenate(([0], np.cumsum(self.counts)[:-1]))
+        self.weights = weights
+
+    def sample(self, frames):
+        """Mean brightness of every segment for an ``(N, height, width)`` stack"""
+        flat = np.asarray(frames, dtype=np.float32).reshape(len(frames), -1)
+        sums = np.add.reduceat(flat[:, self.pixels], self.starts, axis=1)
+        return sums / self.counts
+
+    def pack(self, lit):
+        """Turn an ``(N, segments)`` boolean array into ``(N, PCB)`` words"""
+        return lit.astype(np.int64) @ self.weights
+
+    def convert(self, frames, threshold=CONVERTER_THRESHOLD, invert=False):
+        """Convert a stack of brightness images (0-1) into PCB words per frame"""
+        levels = self.sample(frames)
+        if invert:
+            levels = 1 - levels
+        return self.pack(levels > threshold)
+
+    def render(self, words):
+        """Draw a frame as a brightness image, lit segments 1 and the rest 0"""
+        words = np.asarray(words, dtype=np.int64)
+        lit = (words[None, :] & self.weights).any(axis=1)
+        image = np.zeros(self.width * self.height, dtype=np.float32)
+        image[self.pixels[np.repeat(lit, self.counts)]] = 1.0
+        return image.reshape(self.height, self.width)
+
+
+@functools.lru_cache(maxsize=8)
+def sampler_for(layout=LAYOUT, scale=CONVERTER_SCALE):
+    """Shared SegmentSampler for a layout and scale"""
+    return SegmentSampler(layout, scale)
+
+
+def fit_frames(frames, width, height, fit='contain'):
+    """Resize an ``(N, h, w)`` stack to ``width`` x ``height``
+
+    'contain' letterboxes the whole image on black, 'cover' fills the wall
+    and crops the overflow, 'stretch' ignores the aspect ratio. Sampling is
+    nearest-pixel, done for every frame in one indexing operation.
+    """
+    if fit not in FITS:
+        raise ValueError(f"Unknown fit: {fit}")
+    frames = np.asarray(frames, dtype=np.float32)
+    _, h, w = frames.shape
+    if fit == 'stretch':
+        sx, sy = w / width, h / height
+    else:
+        pick = max if fit == 'contain' else min
+        sx = sy = pick(w / width, h / height)
+    # Source pixel under the centre of every output pixel, -1 when outside
+    xs = np.floor((np.arange(width) + 0.5 - width / 2) * sx + w / 2).astype(int)
+    ys = np.floor((np.arange(height) + 0.5 - height / 2) * sy + h / 2).astype(int)
+    xs[(xs < 0) | (xs >= w)] = -1
+    ys[(ys < 0) | (ys >= h)] = -1
+    padded = np.zeros((len(frames), h + 1, w + 1), dtype=np.float32)
+    padded[:, :h, :w] = frames
+    return padded[:, ys[:, None], xs[None, :]]
+
+
+def read_netpbm(data):
+    """Decode a binary PGM (P5) or PPM (P6) image into brightness 0-1"""
+    tokens = []
+    offset = 0
+    while len(tokens) < 4:
+        while offset < len(data) and data[offset : offset + 1].isspace():
+            offset += 1
+        if data[offset : offset + 1] == b'#':
+            offset = data.index(b'\n', offset)
+            continue
+        end = offset
+        while end < len(data) and not data[end : end + 1].isspace():
+            end += 1
+        if end == offset:
+            raise ValueError("Truncated image header")
+        tokens.append(data[offset:end])
+        offset = end
+    magic, width, height, maxval = (
+        tokens[0],
+        int(tokens[1]),
+        int(tokens[2]),
+        int(tokens[3]),
+    )
+    if magic not in (b'P5', b'P6') or maxval > 255:
+        raise ValueError("Only 8-bit binary PGM and PPM images are supported")
+    channels = 3 if magic == b'P6' else 1
+    size = width * height * channels
+    pixels = np.frombuffer(data, dtype=np.uint8, count=size, offset=offset + 1)
+    pixels = pixels.reshape(height, width, channels).astype(np.float32) / maxval
+    if channels == 3:
+        return pixels @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return pixels[..., 0]
+
+
+def read_frames(source, frame_duration=None):
+    """Read ``[(image, duration)]`` from an image, an animated GIF or a directory
+
+    Images are returned as brightness arrays from 0 to 1. A directory is
+    read as an image sequence in name order, such as the frames ffmpeg
+    extracts from a video. GIF frame times are kept unless
+    ``frame_duration`` overrides them. Without Pillow only PGM and PPM
+    files can be read.
+    """
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    if isinstance(source, str) and os.path.isdir(source):
+        frames = []
+        for filename in sorted(os.listdir(source)):
+            path = os.path.join(source, filename)
+            if os.path.isfile(path) and not filename.startswith('.'):
+                frames.extend(read_frames(path, frame_duration))
+        return frames
+    default = frame_duration or ANIMATION_FRAME_DURATION
+    if Image is None:
+        if isinstance(source, str):
+            with open(source, 'rb') as f:
+                data = f.read()
+        else:
+            data = source.read()
+        return [(read_netpbm(data), default)]
+    frames = []
+    with Image.open(source) as image:
+        for frame in ImageSequence.Iterator(image):
+            ms = frame.info.get('duration')
+            duration = frame_duration or (ms / 1000 if ms else default)
+            gray = np.asarray(frame.convert('L'), dtype=np.float32) / 255
+            frames.append((gray, duration))
+    return frames
+
+
+def convert(
+    frames,
+    layout=LAYOUT,
+    threshold=CONVERTER_THRESHOLD,
+    invert=False,
+    fit='contain',
+    scale=CONVERTER_SCALE,
+    name=None,
+):
+    """Convert ``[(image, duration)]`` into an Animation for a layout
+
+    Frames of the same size are resized and sampled as one batch.
+    Consecutive frames that come out identical are merged into one longer
+    frame.
+    """
+    if not frames:
+        raise ValueError("No frames to convert")
+    sampler = sampler_for(layout, scale)
+    anim = Animation(name=name, num_pcbs=layout.num_pcbs)
+    shapes = {}
+    for index, (image, _) in enumerate(frames):
+        shapes.setdefault(np.shape(image), []).append(index)
+    words = [None] * len(frames)
+    for indices in shapes.values():
+        stack = np.stack([frames[i][0] for i in indices])
+        fitted = fit_frames(stack, sampler.width, sampler.height, fit)
+        for i, packed in zip(indices, sampler.convert(fitted, threshold, invert)):
+            words[i] = packed.tolist()
+    for packed, (_, duration) in zip(words, frames):
+        if anim.frames and list(anim.frames[-1][0]) == packed:
+            previous, total = anim.frames[-1]
+            anim.frames[-1] = (previous, total + duration)
+        else:
+            anim.add_frame(packed, duration)
+    return anim
+
+
+def convert_to_library(anim, name):
+    """Save a single frame as a preset and anything longer as a clip"""
+    if len(anim) == 1:
+        return 'preset', save_preset(name, list(anim.frames[0][0]))
+    anim.name = name
+    return 'clip', save_clip(name, anim)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert an image, GIF or image sequence into a preset or clip"
+    )
+    parser.add_argument(
+        'source', help="image file, animated GIF or directory of frames"
+    )
+    parser.add_argument('name', help="preset or clip name to save as")
+    parser.add_argument('--threshold', type=float, default=CONVERTER_THRESHOLD)
+    parser.add_argument('--invert', action='store_true', help="light dark areas")
+    parser.add_argument('--fit', choices=FITS, default='contain')
+    parser.add_argument('--fps', type=float, help="override the source frame rate")
+    args = parser.parse_args()
+    try:
+        clip_path(args.name)
+    except ValueError as e:
+        parser.error(str(e))
+
+    frames = read_frames(args.source, 1 / args.fps if args.fps else None)
+    anim = convert(frames, threshold=args.threshold, invert=args.invert, fit=args.fit)
+    kind, saved = convert_to_library(anim, args.name)
+    if saved:
+        print(
+            f"Saved {len(frames)} frames as {kind} {args.name} ({len(anim)} distinct)"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+import threading
+import time
+from collections import deque
+from config import DISPLAY_MIN_INTERVAL
+
+
+class DisplayWriter:
+    """Single owner thread that latches frames through ``write``
+
+    Callers hand over complete encoded frames with ``submit`` and return
+    immediately. The handoff is double-buffered: the writer thread owns the
+    frame it is shifting out while the newest submitted frame waits in the
+    back buffer, replacing any older one (latest frame wins). A frame
+    identical to the last one latched is dropped, and latches are spaced at
+    least ``min_interval`` seconds apart.
+    """
+
+    def __init__(self, write, min_interval=DISPLAY_MIN_INTERVAL, clock=time.monotonic):
+        self.write = write
+        self.min_interval = min_interval
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._pending = None
+        self._busy = False
+        self._paused = False
+        self._running = False
+        self._thread = None
+        self._last_frame = None
+        self._last_write = None
+        self.frames_requested = 0
+        self.frames_written = 0
+        self.frames_unchanged = 0
+        self.frames_coalesced = 0
+        self._recent_writes = deque(maxlen=256)
+
+    def start(self):
+        """Start the writer thread if it is not already running"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._run, name='display-writer', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        """Stop the writer thread, dropping any frame not yet written"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def submit(self, frame):
+        """Hand ``frame`` to the writer thread without waiting for it"""
+        with self._cond:
+            self.frames_requested += 1
+            if self._pending is not None:
+                self.frames_coalesced += 1
+            self._pending = frame
+            self._cond.notify_all()
+        if not self._running:
+            self.start()
+
+    def flush(self, timeout=None):
+        """Block until every submitted frame has been written or dropped
+
+        While paused only the frame being written is waited for; the held
+        frame is written after ``resume``.
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: (
+                    (not self._busy and (self._pending is None or self._paused))
+                    or not self._running
+                ),
+                timeout,
+            )
+
+    def pause(self, timeout=None):
+        """Stop latching frames so another owner can drive the chain
+
+        Waits for a write in progress to finish. Frames submitted while
+        paused are held, the newest replacing older ones as usual.
+        """
+        with self._cond:
+            self._paused = True
+            return self._cond.wait_for(lambda: not self._busy, timeout)
+
+    def resume(self):
+        """Hand the chain back to the writer thread after ``pause``"""
+        with self._cond:
+            self._paused = False
+            self._last_frame = None
+            self._cond.notify_all()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def invalidate(self):
+        """Forget the last latched frame so the next submit is always written"""
+        with self._cond:
+            self._last_frame = None
+
+    def stats(self):
+        """Return the frame counters as a dict"""
+        with self._cond:
+            return {
+                'frames_requested': self.frames_requested,
+                'frames_written': self.frames_written,
+                'frames_unchanged': self.frames_unchanged,
+                'frames_coalesced': self.frames_coalesced,
+            }
+
+    def write_rate(self, window=5.0):
+        """Frames latched per second over the last ``window`` seconds"""
+        since = self.clock() - window
+        with self._cond:
+            recent = sum(1 for t in self._recent_writes if t >= since)
+        return recent / window
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: (
+                        (self._pending is not None and not self._paused)
+                        or not self._running
+                    )
+                )
+                if not self._running:
+                    return
+                if self._last_write is not None:
+                    delay = self._last_write + self.min_interval - self.clock()
+                    if delay > 0:
+                        # Newer frames may replace the pending one meanwhile
+                        self._cond.wait(delay)
+                        continue
+                frame, self._pending = self._pending, None
+                if frame == self._last_frame:
+                    self.frames_unchanged += 1
+                    self._cond.notify_all()
+                    continue
+                self._busy = True
+            try:
+                self.write(frame)
+            except Exception as e:
+                print(f"Error writing frame: {e}")
+                frame = None
+            with self._cond:
+                self._busy = False
+                self._last_frame = frame
+                self._last_write = self.clock()
+                if frame is not None:
+                    self.frames_written += 1
+                    self._recent_writes.append(self._last_write)
+                self._cond.notify_all()
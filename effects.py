@@ -0,0 +1,205 @@
+import functools
+import math
+import time
+from config import LAYOUT, ANIMATION_FRAME_DURATION
+from animation import Animation
+from hardware import get_wall
+from layout import SEGMENT_NAMES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class SegmentField:
+    """The wall as a ``(PCB, display, segment)`` array with a position for each segment
+
+    Index ``[chain index, display, segment]`` addresses segment A-DP of a
+    display on a PCB. ``x`` and ``y`` give every segment's centre as drawn in
+    the UI, scaled so the wall spans 0-1 along its longer side; ``width``
+    and ``height`` are the extents in the same units. Effects build a
+    boolean mask of that shape and ``pack`` turns it into PCB words.
+    """
+
+    def __init__(self, layout=LAYOUT):
+        if np is None:
+            raise RuntimeError("numpy is not installed")
+        self.layout = layout
+        self.shape = (layout.num_pcbs, layout.displays_per_pcb, len(SEGMENT_NAMES))
+        bits = np.zeros(self.shape, dtype=np.uint32)
+        x = np.zeros(self.shape)
+        y = np.zeros(self.shape)
+        for position, (chain_index, shift) in enumerate(layout.positions):
+            display = layout.display_offsets.index(shift)
+            for segment in range(len(SEGMENT_NAMES)):
+                place = chain_index, display, segment
+                bits[place] = layout.locate(position, segment)[1]
+                x[place], y[place] = layout.segment_xy(position, segment)
+        scale = max(layout.wall_width, layout.wall_height)
+        self.x = x / scale
+        self.y = y / scale
+        self.width = layout.wall_width / scale
+        self.height = layout.wall_height / scale
+        self.weights = np.left_shift(np.uint32(1), bits)
+
+    def pack(self, mask):
+        """Pack a boolean mask of ``shape`` into one word per PCB"""
+        # Bits within a PCB never overlap, so the sum is their OR
+        return np.where(mask, self.weights, 0).sum(axis=(1, 2)).tolist()
+
+    def unpack(self, words):
+        """Boolean mask of the segments lit in ``words``"""
+        words = np.asarray(words, dtype=np.uint32).reshape(-1, 1, 1)
+        return (words & self.weights) != 0
+
+    def polar(self, center=(0.5, 0.5)):
+        """Distance and angle of every segment from a point given as fractions of the wall"""
+        dx = self.x - center[0] * self.width
+        dy = self.y - center[1] * self.height
+        return np.hypot(dx, dy), np.arctan2(dy, dx)
+
+
+@functools.lru_cache(maxsize=8)
+def field_for(layout=LAYOUT):
+    """Shared SegmentField for a layout"""
+    return SegmentField(layout)
+
+
+def _rng(seed):
+    return np.random.default_rng(seed)
+
+
+def wipe(field, frames, angle=0.0, width=0.15, fill=False):
+    """A band sweeping across the wall; ``angle`` in degrees, 0 moves left to right
+
+    With ``fill`` everything behind the band's leading edge stays lit.
+    """
+    a = math.radians(angle)
+    t = field.x * math.cos(a) + field.y * math.sin(a)
+    t = t - t.min()
+    span = t.max() or 1.0
+    t = t / span
+    for i in range(frames):
+        edge = (1 + width) * i / max(1, frames - 1)
+        if fill:
+            yield field.pack(t <= edge)
+        else:
+            yield field.pack((t <= edge) & (t > edge - width))
+
+
+def radial_sweep(field, frames, center=(0.5, 0.5), width=0.15, turns=1.0):
+    """A radar arm turning about ``center``; ``width`` is the lit fraction of a turn"""
+    _, theta = field.polar(center)
+    theta = np.mod(theta, 2 * math.pi)
+    arc = width * 2 * math.pi
+    for i in range(frames):
+        arm = 2 * math.pi * turns * i / frames
+        yield field.pack(np.mod(arm - theta, 2 * math.pi) < arc)
+
+
+def rings(field, frames, center=(0.5, 0.5), spacing=0.2, width=0.06):
+    """Concentric rings moving outwards from ``center``"""
+    r, _ = field.polar(center)
+    for i in range(frames):
+        phase = spacing * i / frames
+        yield field.pack(np.mod(r - phase, spacing) < width)
+
+
+def noise(field, frames, scale=4.0, speed=0.1, threshold=0.5, seed=None):
+    """Smooth value noise drifting through time, lit where it exceeds ``threshold``
+
+    A random lattice is interpolated trilinearly at every segment's
+    position, with time as the third axis.
+    """
+    rng = _rng(seed)
+    gx = field.x * scale
+    gy = field.y * scale
+    size_x = int(gx.max()) + 2
+    size_y = int(gy.max()) + 2
+    size_t = int(frames * speed) + 2
+    lattice = rng.random((size_x, size_y, size_t))
+    x0 = gx.astype(int)
+    y0 = gy.astype(int)
+    fx = gx - x0
+    fy = gy - y0
+    # Smoothstep weights hide the lattice
+    fx = fx * fx * (3 - 2 * fx)
+    fy = fy * fy * (3 - 2 * fy)
+    for i in range(frames):
+        t = i * speed
+        t0 = int(t)
+        ft = t - t0
+        ft = ft * ft * (3 - 2 * ft)
+        value = 0.0
+        for dx, wx in ((0, 1 - fx), (1, fx)):
+            for dy, wy in ((0, 1 - fy), (1, fy)):
+                near = lattice[x0 + dx, y0 + dy, t0]
+                far = lattice[x0 + dx, y0 + dy, t0 + 1]
+                value = value + wx * wy * (near * (1 - ft) + far * ft)
+        yield field.pack(value > threshold)
+
+
+def rain(field, frames, drops=12, speed=0.04, length=0.25, spread=0.02, seed=None):
+    """Drops falling down the wall, each leaving a trail ``length`` long"""
+    rng = _rng(seed)
+    x = rng.random(drops) * field.width
+    head = rng.random(drops) * (field.height + length)
+    rate = speed * (0.5 + rng.random(drops))
+    px = field.x[..., None]
+    py = field.y[..., None]
+    for _ in range(frames):
+        behind = head - py
+        lit = (np.abs(px - x) < spread) & (behind >= 0) & (behind < length)
+        yield field.pack(lit.any(axis=-1))
+        head = head + rate
+        done = head - length > field.height
+        if done.any():
+            count = int(done.sum())
+            head[done] = 0.0
+            x[done] = rng.random(count) * field.width
+            rate[done] = speed * (0.5 + rng.random(count))
+
+
+def sparkle(field, frames, rate=0.03, hold=3, seed=None):
+    """Random segments flashing on for ``hold`` frames"""
+    rng = _rng(seed)
+    age = np.zeros(field.shape, dtype=np.int16)
+    for _ in range(frames):
+        age = np.maximum(age - 1, 0)
+        age[rng.random(field.shape) < rate] = hold
+        yield field.pack(age > 0)
+
+
+# Effects available by name, e.g. to /start_animation
+EFFECTS = {
+    'wipe': wipe,
+    'radial_sweep': radial_sweep,
+    'rings': rings,
+    'noise': noise,
+    'rain': rain,
+    'sparkle': sparkle,
+}
+
+
+def effect_animation(
+    name, steps=60, duration=ANIMATION_FRAME_DURATION, wall=None, **params
+):
+    """Compile ``steps`` frames of a named effect into an Animation for a wall"""
+    try:
+        effect = EFFECTS[name]
+    except KeyError:
+        raise ValueError(f"Unknown effect: {name}") from None
+    wall = get_wall(wall)
+    anim = Animation(name=name, num_pcbs=wall.num_pcbs)
+    for words in effect(field_for(wall.layout), steps, **params):
+        anim.add_frame(words, duration)
+    return anim
+
+
+def frame_cost(name, steps=200, layout=LAYOUT, **params):
+    """Mean seconds an effect takes to generate one packed frame"""
+    field = field_for(layout)
+    start = time.perf_counter()
+    count = sum(1 for _ in EFFECTS[name](field, steps, **params))
+    return (time.perf_counter() - start) / count
@@ -0,0 +1,165 @@
+from array import array
+
+SEGMENT_MASK = 0xFFFFFF  # 24 bits per PCB
+
+
+def to_hex(words):
+    """Encode PCB words as a compact string of 6-digit hex words"""
+    return ''.join('%06x' % word for word in words)
+
+
+def from_hex(text):
+    """Decode a string produced by ``to_hex`` back into PCB words"""
+    return [int(text[i : i + 6], 16) for i in range(0, len(text), 6)]
+
+
+def pack_words(words):
+    """Pack PCB words into 3 little-endian bytes each"""
+    data = bytearray(3 * len(words))
+    for i, word in enumerate(words):
+        data[3 * i] = word & 0xFF
+        data[3 * i + 1] = (word >> 8) & 0xFF
+        data[3 * i + 2] = (word >> 16) & 0xFF
+    return bytes(data)
+
+
+def unpack_words(data):
+    """Unpack bytes produced by ``pack_words`` into an array of PCB words"""
+    return array(
+        'I',
+        (
+            data[i] | (data[i + 1] << 8) | (data[i + 2] << 16)
+            for i in range(0, len(data) - 2, 3)
+        ),
+    )
+
+
+class _Row:
+    """List-like view of a single PCB word, indexed by segment"""
+
+    __slots__ = ('_fb', '_pcb')
+
+    def __init__(self, fb, pcb):
+        self._fb = fb
+        self._pcb = pcb
+
+    def __len__(self):
+        return self._fb.segments_per_pcb
+
+    def __getitem__(self, segment):
+        if isinstance(segment, slice):
+            return [self[s] for s in range(*segment.indices(len(self)))]
+        if segment < 0:
+            segment += len(self)
+        return self._fb.get(self._pcb, segment)
+
+    def __setitem__(self, segment, value):
+        if segment < 0:
+            segment += len(self)
+        self._fb.set(self._pcb, segment, value)
+
+    def __iter__(self):
+        word = self._fb.words[self._pcb]
+        for segment in range(len(self)):
+            yield (word >> segment) & 1
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class FrameBuffer:
+    """Bit-packed segment state, one 24-bit word per PCB
+
+    Bit ``n`` of ``words[pcb]`` is segment ``n`` of that PCB. Indexing with
+    ``fb[pcb][segment]`` is supported for code written against the old
+    list-of-lists grid.
+    """
+
+    def __init__(self, num_pcbs, segments_per_pcb=24):
+        self.num_pcbs = num_pcbs
+        self.segments_per_pcb = segments_per_pcb
+        self.words = array('I', [0] * num_pcbs)
+
+    def __len__(self):
+        return self.num_pcbs
+
+    def __getitem__(self, pcb):
+        if pcb < 0:
+            pcb += self.num_pcbs
+        if not 0 <= pcb < self.num_pcbs:
+            raise IndexError('pcb index out of range')
+        return _Row(self, pcb)
+
+    def __iter__(self):
+        for pcb in range(self.num_pcbs):
+            yield _Row(self, pcb)
+
+    def _check(self, pcb, segment):
+        if not 0 <= pcb < self.num_pcbs:
+            raise IndexError('pcb index out of range')
+        if not 0 <= segment < self.segments_per_pcb:
+            raise IndexError('segment index out of range')
+
+    def get(self, pcb, segment):
+        """Return the state (0 or 1) of a single segment"""
+        self._check(pcb, segment)
+        return (self.words[pcb] >> segment) & 1
+
+    def set(self, pcb, segment, value):
+        """Set a single segment on or off"""
+        self._check(pcb, segment)
+        if value:
+            self.words[pcb] |= 1 << segment
+        else:
+            self.words[pcb] &= ~(1 << segment) & SEGMENT_MASK
+
+    def toggle(self, pcb, segment):
+        """Flip a single segment and return its new state"""
+        self._check(pcb, segment)
+        self.words[pcb] ^= 1 << segment
+        return (self.words[pcb] >> segment) & 1
+
+    def set_mask(self, pcb, mask, state):
+        """Switch every segment in ``mask`` on or off"""
+        if state:
+            self.words[pcb] |= mask
+        else:
+            self.words[pcb] &= ~mask & SEGMENT_MASK
+
+    def clear(self):
+        """Switch every segment off"""
+        for pcb in range(self.num_pcbs):
+            self.words[pcb] = 0
+
+    def assign(self, words):
+        """Replace the whole frame with a sequence of PCB words"""
+        if len(words) != self.num_pcbs:
+            raise ValueError(f'expected {self.num_pcbs} words, got {len(words)}')
+        self.words[:] = array('I', words)
+
+    def load_grid(self, grid):
+        """Copy a nested list grid in, leaving cells it does not cover untouched"""
+        for pcb, row in enumerate(grid[: self.num_pcbs]):
+            width = min(len(row), self.segments_per_pcb)
+            word = 0
+            for segment in range(width):
+                if row[segment]:
+                    word |= 1 << segment
+            mask = (1 << width) - 1
+            self.words[pcb] = (self.words[pcb] & ~mask) | word
+
+    def to_grid(self):
+        """Return the frame as a nested list of ints (PCB x segment)"""
+        return [
+            [(word >> segment) & 1 for segment in range(self.segments_per_pcb)]
+            for word in self.words
+        ]
+
+    def copy(self):
+        """Return an independent copy of the frame"""
+        fb = FrameBuffer(self.num_pcbs, self.segments_per_pcb)
+        fb.words[:] = self.words
+        return fb
@@ -0,0 +1,148 @@
+from hardware import default_wall
+
+# Segment bits within a display, matching the A-G/DP order in the UI
+SEG_A = 1 << 0
+SEG_B = 1 << 1
+SEG_C = 1 << 2
+SEG_D = 1 << 3
+SEG_E = 1 << 4
+SEG_F = 1 << 5
+SEG_G = 1 << 6
+SEG_DP = 1 << 7
+
+# 7-segment patterns; letters without a lowercase form fall back to uppercase
+GLYPHS = {
+    ' ': 0,
+    '0': SEG_A | SEG_B | SEG_C | SEG_D | SEG_E | SEG_F,
+    '1': SEG_B | SEG_C,
+    '2': SEG_A | SEG_B | SEG_D | SEG_E | SEG_G,
+    '3': SEG_A | SEG_B | SEG_C | SEG_D | SEG_G,
+    '4': SEG_B | SEG_C | SEG_F | SEG_G,
+    '5': SEG_A | SEG_C | SEG_D | SEG_F | SEG_G,
+    '6': SEG_A | SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    '7': SEG_A | SEG_B | SEG_C,
+    '8': SEG_A | SEG_B | SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    '9': SEG_A | SEG_B | SEG_C | SEG_D | SEG_F | SEG_G,
+    'A': SEG_A | SEG_B | SEG_C | SEG_E | SEG_F | SEG_G,
+    'b': SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    'C': SEG_A | SEG_D | SEG_E | SEG_F,
+    'c': SEG_D | SEG_E | SEG_G,
+    'd': SEG_B | SEG_C | SEG_D | SEG_E | SEG_G,
+    'E': SEG_A | SEG_D | SEG_E | SEG_F | SEG_G,
+    'F': SEG_A | SEG_E | SEG_F | SEG_G,
+    'G': SEG_A | SEG_C | SEG_D | SEG_E | SEG_F,
+    'H': SEG_B | SEG_C | SEG_E | SEG_F | SEG_G,
+    'h': SEG_C | SEG_E | SEG_F | SEG_G,
+    'I': SEG_E | SEG_F,
+    'i': SEG_E,
+    'J': SEG_B | SEG_C | SEG_D | SEG_E,
+    'K': SEG_B | SEG_C | SEG_E | SEG_F | SEG_G,
+    'L': SEG_D | SEG_E | SEG_F,
+    'M': SEG_A | SEG_B | SEG_C | SEG_E | SEG_F,
+    'n': SEG_C | SEG_E | SEG_G,
+    'O': SEG_A | SEG_B | SEG_C | SEG_D | SEG_E | SEG_F,
+    'o': SEG_C | SEG_D | SEG_E | SEG_G,
+    'P': SEG_A | SEG_B | SEG_E | SEG_F | SEG_G,
+    'q': SEG_A | SEG_B | SEG_C | SEG_F | SEG_G,
+    'r': SEG_E | SEG_G,
+    'S': SEG_A | SEG_C | SEG_D | SEG_F | SEG_G,
+    't': SEG_D | SEG_E | SEG_F | SEG_G,
+    'U': SEG_B | SEG_C | SEG_D | SEG_E | SEG_F,
+    'u': SEG_C | SEG_D | SEG_E,
+    'V': SEG_B | SEG_C | SEG_D | SEG_E | SEG_F,
+    'v': SEG_C | SEG_D | SEG_E,
+    'W': SEG_B | SEG_C | SEG_D | SEG_E | SEG_F | SEG_G,
+    'X': SEG_B | SEG_C | SEG_E | SEG_F | SEG_G,
+    'Y': SEG_B | SEG_C | SEG_D | SEG_F | SEG_G,
+    'Z': SEG_A | SEG_B | SEG_D | SEG_E | SEG_G,
+    '-': SEG_G,
+    '_': SEG_D,
+    '=': SEG_D | SEG_G,
+    "'": SEG_B,
+    '"': SEG_B | SEG_F,
+    '[': SEG_A | SEG_D | SEG_E | SEG_F,
+    ']': SEG_A | SEG_B | SEG_C | SEG_D,
+    '?': SEG_A | SEG_B | SEG_E | SEG_G,
+    '°': SEG_A | SEG_B | SEG_F | SEG_G,
+}
+
+
+def glyph(char):
+    """Return the 7-segment pattern for ``char``; unknown characters are blank"""
+    pattern = GLYPHS.get(char)
+    if pattern is None:
+        pattern = GLYPHS.get(char.upper(), GLYPHS.get(char.lower(), 0))
+    return pattern
+
+
+# (chain index, bit shift) of each display on the default wall, in reading order
+POSITIONS = default_wall.positions
+NUM_POSITIONS = len(POSITIONS)
+
+# Glyph patterns rearranged into the default wall's segment wiring
+_PATTERN_MAP = default_wall.layout.pattern_map
+
+# Per-position masks for every known character, so rendering is one OR per cell
+_CHAR_MASKS = [
+    {char: _PATTERN_MAP[glyph(char)] << shift for char in GLYPHS}
+    for _, shift in POSITIONS
+]
+
+
+def _target(wall, words):
+    """Layout and output words for rendering onto ``wall``"""
+    if wall is None:
+        wall = default_wall
+    if words is None:
+        words = [0] * wall.num_pcbs
+    return wall.layout, words
+
+
+def text_to_cells(text):
+    """Split text into one 8-bit pattern per display, folding '.' into the DP"""
+    cells = []
+    for char in text:
+        if char == '.' and cells and not cells[-1] & SEG_DP:
+            cells[-1] |= SEG_DP
+        elif char == '.':
+            cells.append(SEG_DP)
+        else:
+            cells.append(glyph(char))
+    return cells
+
+
+def render_cells(cells, start=0, words=None, wall=None):
+    """OR per-display patterns into PCB words starting at display ``start``"""
+    layout, words = _target(wall, words)
+    positions = layout.positions
+    pattern_map = layout.pattern_map
+    for position, pattern in enumerate(cells, start):
+        if position >= len(positions):
+            break
+        if position < 0 or not pattern:
+            continue
+        chain_index, shift = positions[position]
+        words[chain_index] |= pattern_map[pattern] << shift
+    return words
+
+
+def render_text(text, start=0, words=None, wall=None):
+    """Render a string into PCB words starting at display ``start``
+
+    Characters past the last display are dropped. Pass ``words`` to draw
+    over an existing frame instead of a blank one, and ``wall`` to render
+    for a wall other than the default one.
+    """
+    if (wall is not None and wall is not default_wall) or '.' in text:
+        return render_cells(text_to_cells(text), start, words, wall)
+    _, words = _target(wall, words)
+    for position, char in enumerate(text, start):
+        if position >= NUM_POSITIONS:
+            break
+        if position < 0:
+            continue
+        mask = _CHAR_MASKS[position].get(char)
+        if mask is None:
+            mask = _PATTERN_MAP[glyph(char)] << POSITIONS[position][1]
+        words[POSITIONS[position][0]] |= mask
+    return words
@@ -0,0 +1,312 @@
+import argparse
+import threading
+import time
+from config import (
+    GRAYSCALE_BITS,
+    GRAYSCALE_BASE_INTERVAL,
+    GRAYSCALE_MIN_REFRESH_HZ,
+)
+from backends import encode_frame, output_enable
+from hardware import get_wall
+from metrics import GRAYSCALE_REFRESH_HZ
+
+# Remaining wait below which the refresh loop spins instead of sleeping,
+# since sleep() on the Pi can overshoot by a good fraction of a millisecond
+SPIN_THRESHOLD = 0.0005
+
+# Bit depths covered by refresh_report
+MAX_BITS = 8
+
+
+def bit_planes(levels, bits=GRAYSCALE_BITS):
+    """Split per-segment intensity levels into one frame of PCB words per bit
+
+    ``levels`` holds one sequence of segment levels per PCB (0 is off,
+    ``2 ** bits - 1`` fully on). Plane ``b`` lights the segments whose level
+    has bit ``b`` set and is meant to be shown for ``2 ** b`` time slots.
+    """
+    top = (1 << bits) - 1
+    planes = [[0] * len(levels) for _ in range(bits)]
+    for pcb, segments in enumerate(levels):
+        for segment, level in enumerate(segments):
+            level = min(top, max(0, int(level)))
+            for b in range(bits):
+                if level >> b & 1:
+                    planes[b][pcb] |= 1 << segment
+    return planes
+
+
+def levels_from_words(words, level, segments_per_pcb=24):
+    """Per-segment levels lighting every segment set in ``words`` at ``level``"""
+    return [
+        [level if word >> segment & 1 else 0 for segment in range(segments_per_pcb)]
+        for word in words
+    ]
+
+
+def refresh_report(
+    write_time,
+    base_interval=GRAYSCALE_BASE_INTERVAL,
+    use_oe=False,
+    min_refresh_hz=GRAYSCALE_MIN_REFRESH_HZ,
+    max_bits=MAX_BITS,
+):
+    """Refresh rate each bit depth can reach for a given frame write time
+
+    Without output enable a plane stays lit while the next one is shifted
+    in, so no slot can be shorter than a write. With it the outputs are
+    blanked during each write, which costs brightness (``duty``) instead.
+    """
+    rows = []
+    for bits in range(1, max_bits + 1):
+        slots = (1 << bits) - 1
+        if use_oe:
+            lit = base_interval * slots
+            frame = bits * write_time + lit
+        else:
+            lit = frame = max(base_interval, write_time) * slots
+        refresh_hz = 1.0 / frame if frame else float('inf')
+        rows.append(
+            {
+                'bits': bits,
+                'levels': 1 << bits,
+                'frame_s': frame,
+                'refresh_hz': refresh_hz,
+                'duty': lit / frame if frame else 1.0,
+                'flicker_free': refresh_hz >= min_refresh_hz,
+            }
+        )
+    return rows
+
+
+def recommended_bits(report):
+    """Deepest bit depth in a refresh_report that does not flicker, or None"""
+    ok = [row['bits'] for row in report if row['flicker_free']]
+    return max(ok) if ok else None
+
+
+def measure_write_time(wall=None, samples=20, clock=time.perf_counter):
+    """Time full-frame writes through a wall's backend, returning ``(mean, max)``
+
+    The wall's writer is paused meanwhile and its current frame is what
+    gets written, so nothing visible changes.
+    """
+    wall = get_wall(wall)
+    wall.writer.pause()
+    try:
+        _, words = wall.get_published_frame()
+        frame = encode_frame(words)
+        times = []
+        for _ in range(samples):
+            start = clock()
+            wall.backend.write_frame(frame)
+            times.append(clock() - start)
+    finally:
+        wall.chain_frame = None
+        wall.writer.resume()
+    return sum(times) / len(times), max(times)
+
+
+class GrayscaleRenderer:
+    """Shows per-segment intensity levels on a wall by binary code modulation
+
+    Every frame latches the bit planes one after another, plane ``b`` held
+    for ``base_interval * 2 ** b`` against absolute deadlines, so each
+    segment is lit for a share of the frame proportional to its level.
+    While running the renderer owns the chain: the wall's display writer is
+    paused and picks up the segment grid again on ``stop``.
+
+    With an output enable pin the outputs are blanked while each plane is
+    shifted in and enabled for exactly its slot.
+    """
+
+    def __init__(
+        self,
+        wall=None,
+        bits=GRAYSCALE_BITS,
+        base_interval=GRAYSCALE_BASE_INTERVAL,
+        oe_pin=None,
+        clock=time.perf_counter,
+    ):
+        if not 1 <= bits <= MAX_BITS:
+            raise ValueError(f"bits must be between 1 and {MAX_BITS}")
+        if base_interval <= 0:
+            raise ValueError("base_interval must be positive")
+        self.wall = get_wall(wall)
+        self.bits = bits
+        self.base_interval = base_interval
+        self.oe_pin = oe_pin if oe_pin is not None else self.wall.oe_pin
+        self.clock = clock
+        self._planes = [encode_frame([0] * self.wall.num_pcbs)] * bits
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._reset_stats()
+        GRAYSCALE_REFRESH_HZ.set_function(
+            lambda: self.refresh_hz() if self.running else 0.0, self.wall.name
+        )
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def max_level(self):
+        return (1 << self.bits) - 1
+
+    def set_levels(self, levels):
+        """Show new per-segment levels from the start of the next frame"""
+        if len(levels) != self.wall.num_pcbs:
+            raise ValueError(
+                f"expected levels for {self.wall.num_pcbs} PCBs, got {len(levels)}"
+            )
+        planes = [encode_frame(words) for words in bit_planes(levels, self.bits)]
+        with self._lock:
+            self._planes = planes
+
+    def start(self):
+        """Take over the wall's chain and start refreshing on a background thread"""
+        if self.running:
+            return
+        self.wall.writer.pause()
+        self._reset_stats()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='grayscale', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2):
+        """Stop refreshing and give the chain back to the display writer"""
+        self._running = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def refresh_hz(self):
+        """Frames per second achieved since the renderer started"""
+        if self._last_frame_end is None:
+            return 0.0
+        elapsed = self._last_frame_end - self._first_frame_start
+        return self.frames / elapsed if elapsed > 0 else 0.0
+
+    def stats(self):
+        """Return measured refresh timing as a dict"""
+        writes = self.plane_writes or 1
+        return {
+            'running': self.running,
+            'bits': self.bits,
+            'levels': self.max_level + 1,
+            'base_interval': self.base_interval,
+            'output_enable': self.oe_pin is not None,
+            'frames': self.frames,
+            'refresh_hz': self.refresh_hz(),
+            'write_time_mean': self.write_time_total / writes,
+            'write_time_max': self.write_time_max,
+            'max_lateness': self.max_lateness,
+            'overruns': self.overruns,
+        }
+
+    def _reset_stats(self):
+        self.frames = 0
+        self.plane_writes = 0
+        self.write_time_total = 0.0
+        self.write_time_max = 0.0
+        self.max_lateness = 0.0
+        self.overruns = 0
+        self._first_frame_start = None
+        self._last_frame_end = None
+
+    def _wait_until(self, deadline):
+        remaining = deadline - self.clock()
+        if remaining > SPIN_THRESHOLD:
+            time.sleep(remaining - SPIN_THRESHOLD)
+        while self.clock() < deadline:
+            pass
+
+    def _write_plane(self, backend, frame, deadline):
+        start = self.clock()
+        self.max_lateness = max(self.max_lateness, start - deadline)
+        backend.write_frame(frame)
+        took = self.clock() - start
+        self.plane_writes += 1
+        self.write_time_total += took
+        self.write_time_max = max(self.write_time_max, took)
+
+    def _run(self):
+        wall = self.wall
+        backend = wall.backend
+        frame_start = self.clock()
+        self._first_frame_start = frame_start
+        try:
+            while self._running:
+                with self._lock:
+                    planes = self._planes
+                deadline = frame_start
+                for b, frame in enumerate(planes):
+                    slot = self.base_interval * (1 << b)
+                    if self.oe_pin is None:
+                        # Lit from this latch until the next one
+                        self._wait_until(deadline)
+                        self._write_plane(backend, frame, deadline)
+                        deadline += slot
+                    else:
+                        output_enable(self.oe_pin, False)
+                        self._write_plane(backend, frame, deadline)
+                        output_enable(self.oe_pin, True)
+                        deadline = self.clock() + slot
+                        self._wait_until(deadline)
+                if self.oe_pin is not None:
+                    output_enable(self.oe_pin, False)
+                self.frames += 1
+                now = self.clock()
+                self._last_frame_end = now
+                # Start afresh rather than rushing to catch up after a stall
+                if now - deadline > self.base_interval * (1 << (self.bits - 1)):
+                    self.overruns += 1
+                    deadline = now
+                frame_start = deadline
+        except Exception as e:
+            print(f"Error in grayscale refresh: {e}")
+        finally:
+            self._running = False
+            if self.oe_pin is not None:
+                output_enable(self.oe_pin, True)
+            wall.chain_frame = None
+            wall.writer.resume()
+            wall.update_display()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure frame writes and report the grayscale depths the wall can sustain"
+    )
+    parser.add_argument('--wall', help="wall name (default: the default wall)")
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument('--base-interval', type=float, default=GRAYSCALE_BASE_INTERVAL)
+    parser.add_argument('--min-refresh', type=float, default=GRAYSCALE_MIN_REFRESH_HZ)
+    args = parser.parse_args()
+
+    from hardware import setup_gpio
+
+    setup_gpio()
+    wall = get_wall(args.wall)
+    mean, worst = measure_write_time(wall, args.samples)
+    print(
+        f"Wall {wall.name} ({wall.backend.name}): frame write {mean * 1e3:.3f} ms"
+        f" mean, {worst * 1e3:.3f} ms max"
+    )
+    for use_oe in (False, True):
+        if use_oe and wall.oe_pin is None:
+            continue
+        print('With output enable:' if use_oe else 'Without output enable:')
+        report = refresh_report(worst, args.base_interval, use_oe, args.min_refresh)
+        for row in report:
+            print(
+                f"  {row['bits']} bits ({row['levels']:3d} levels):"
+                f" {row['refresh_hz']:8.1f} Hz, duty {row['duty'] * 100:5.1f}%"
+                f"{'' if row['flicker_free'] else '  flickers'}"
+            )
+        print(f"  Deepest flicker-free depth: {recommended_bits(report)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,80 +1,416 @@
 import RPi.GPIO as GPIO
+import threading
 import time
-from config import SDI_PIN, CLOCK_PIN, LE_PIN, NUM_PCBS, NUM_SEGMENTS_PER_PCB
+from config import (
+    LAYOUT,
+    OUTPUT_BACKEND,
+    PARTIAL_REFRESH,
+    SDI_PIN,
+    CLOCK_PIN,
+    LE_PIN,
+    SPI_BUS,
+    SPI_DEVICE,
+    WALLS,
+    DEFAULT_WALL,
+)
+from layout import load_layout
+from framebuffer import FrameBuffer
+from backends import (  # noqa: F401
+    BitBangBackend,
+    SpiBackend,
+    SharedClockGroup,
+    BYTES_PER_PCB,
+    encode_frame,
+    output_enable,
+    shift_needed,
+    shift_out,
+    latch,
+)
+from display import DisplayWriter
+from metrics import (
+    DISPLAY_UPDATE_SECONDS,
+    DISPLAY_WRITE_SECONDS,
+    DISPLAY_FRAMES_WRITTEN,
+    DISPLAY_FRAMES_PER_SECOND,
+    PCBS_SHIFTED,
+    PCBS_SKIPPED,
+    GRID_LOCK_WAIT_SECONDS,
+    TimedRLock,
+)
+from simulator import SimulatorBackend
 
-# Global segment state grid (15 x 24), initially all off
-segment_grid = [[0 for _ in range(NUM_SEGMENTS_PER_PCB)] for _ in range(NUM_PCBS)]
+# Operations accepted by apply_segment_ops
+SEGMENT_OPS = ('set', 'clear', 'toggle')
 
+# Modes for partial refresh, see config.PARTIAL_REFRESH
+PARTIAL_REFRESH_MODES = ('off', 'on', 'compare')
 
-def setup_gpio():
-    """Initialize GPIO pins for the display"""
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(SDI_PIN, GPIO.OUT)
-    GPIO.setup(CLOCK_PIN, GPIO.OUT)
-    GPIO.setup(LE_PIN, GPIO.OUT)
+# Segment bit masks for each display on a PCB of the default layout
+DISPLAY_MASKS = LAYOUT.display_masks
+
+
+class UnknownWallError(LookupError):
+    """Raised when a request names a wall that is not configured"""
+
+
+class Wall:
+    """One shift-register chain: its wiring, frame buffer and display writer
+
+    Every wall has its own writer thread, so several walls are refreshed in
+    parallel rather than one after another.
+    """
+
+    def __init__(
+        self,
+        name,
+        layout=LAYOUT,
+        backend=None,
+        partial_refresh=PARTIAL_REFRESH,
+        oe_pin=None,
+    ):
+        if partial_refresh not in PARTIAL_REFRESH_MODES:
+            raise ValueError(f"Unknown partial refresh mode: {partial_refresh!r}")
+        self.name = name
+        self.layout = layout
+        self.num_pcbs = layout.num_pcbs
+        self.backend = backend if backend is not None else BitBangBackend()
+        self.oe_pin = oe_pin
+        self.positions = layout.positions
+
+        # Segment state, one packed 24-bit word per PCB, initially all off
+        self.segment_grid = FrameBuffer(layout.num_pcbs, layout.segments_per_pcb)
+
+        # Held while reading or modifying segment_grid; take it around a
+        # sequence of changes that must reach the display as a single frame.
+        # Time spent waiting for it while contended is recorded in the metrics
+        self.grid_lock = TimedRLock(GRID_LOCK_WAIT_SECONDS.labels(name))
+
+        # Last frame handed to the display, bumped only when the content
+        # changes so that viewers can wait for real changes instead of polling
+        self.frame_version = 0
+        self.published_words = list(self.segment_grid.words)
+        self.frame_changed = threading.Condition()
+
+        # Owns the hardware: the only thread that ever drives this chain
+        self.writer = DisplayWriter(self.write_frame)
+
+        # Encoded frame the shift registers hold, while the writer knows it
+        self.partial_refresh = partial_refresh
+        self.chain_frame = None
+        self.frames_partial = 0
+        self.pcbs_shifted = 0
+        self.pcbs_skipped = 0
+
+        # Recorder capturing every latched frame, while recording
+        self.recorder = None
+
+        self._update_seconds = DISPLAY_UPDATE_SECONDS.labels(name)
+        self._frames_written = DISPLAY_FRAMES_WRITTEN.labels(name)
+        self._pcbs_shifted = PCBS_SHIFTED.labels(name)
+        self._pcbs_skipped = PCBS_SKIPPED.labels(name)
+        DISPLAY_FRAMES_PER_SECOND.set_function(self.writer.write_rate, name)
+
+    def setup(self):
+        """Set up the backend, falling back to bit-banging if it fails"""
+        try:
+            self.backend.setup()
+        except Exception as e:
+            fallback = getattr(self.backend, 'fallback', None)
+            if fallback is None:
+                raise
+            print(
+                f"Error setting up {self.backend.name} backend for wall {self.name}, falling back to bit-bang: {e}"
+            )
+            self.backend = fallback()
+            self.backend.setup()
+        self.chain_frame = None
+        if self.oe_pin is not None:
+            GPIO.setup(self.oe_pin, GPIO.OUT)
+            output_enable(self.oe_pin, True)
+
+    def set_backend(self, new_backend):
+        """Replace the output backend used to drive the chain
+
+        The writer is paused around the swap so the old backend is never
+        closed in the middle of a write.
+        """
+        was_paused = self.writer.paused
+        self.writer.pause()
+        try:
+            self.backend.close()
+            self.backend = new_backend
+            self.chain_frame = None
+            self.writer.invalidate()
+        finally:
+            if not was_paused:
+                self.writer.resume()
+
+    def write_frame(self, frame):
+        """Latch an encoded frame through the current backend
+
+        With partial refresh on, only the PCBs that have to move are shifted
+        when the chain's current contents allow it. Backends sharing their
+        clock with other chains always get the full frame.
+        """
+        backend = self.backend
+        num_pcbs = len(frame) // BYTES_PER_PCB
+        shift = num_pcbs
+        if self.partial_refresh != 'off' and getattr(backend, 'partial_shift', False):
+            shift = shift_needed(self.chain_frame, frame)
+        data = frame
+        if self.partial_refresh == 'on' and shift < num_pcbs:
+            data = frame[len(frame) - shift * BYTES_PER_PCB :]
+            self.frames_partial += 1
+        # Unknown until the write completes; a failed write may leave anything
+        self.chain_frame = None
+        start = time.perf_counter()
+        backend.write_frame(data)
+        DISPLAY_WRITE_SECONDS.labels(self.name, backend.name).observe(
+            time.perf_counter() - start
+        )
+        if self.backend is backend:
+            self.chain_frame = frame
+        recorder = self.recorder
+        if recorder is not None:
+            recorder.capture(frame)
+        self._frames_written.inc()
+        self.pcbs_shifted += len(data) // BYTES_PER_PCB
+        self.pcbs_skipped += num_pcbs - shift
+        self._pcbs_shifted.inc(len(data) // BYTES_PER_PCB)
+        self._pcbs_skipped.inc(num_pcbs - shift)
+
+    def refresh_stats(self):
+        """Return partial refresh counters as a dict"""
+        return {
+            'partial_refresh': self.partial_refresh,
+            'frames_partial': self.frames_partial,
+            'pcbs_shifted': self.pcbs_shifted,
+            'pcbs_skipped': self.pcbs_skipped,
+        }
+
+    def clear_display(self):
+        """Clear all segments on the display"""
+        with self.grid_lock:
+            self.chain_frame = None
+            self.writer.invalidate()
+            self.writer.submit(encode_frame([0] * self.num_pcbs))
+
+    def update_display(self):
+        """Hand the current segment grid state to the display writer
+
+        Returns the frame version now being shown. The frame is submitted
+        while the grid lock is held, so frames reach the writer in the same
+        order as their versions.
+        """
+        start = time.perf_counter()
+        with self.grid_lock:
+            words = list(self.segment_grid.words)
+            with self.frame_changed:
+                if words != self.published_words:
+                    self.published_words = words
+                    self.frame_version += 1
+                    self.frame_changed.notify_all()
+                version = self.frame_version
+            self.writer.submit(encode_frame(words))
+        self._update_seconds.observe(time.perf_counter() - start)
+        return version
+
+    def show_frame(self, words):
+        """Replace the whole grid with ``words`` and send it to the display"""
+        with self.grid_lock:
+            self.segment_grid.assign(words)
+            return self.update_display()
+
+    def get_published_frame(self):
+        """Return ``(version, words)`` for the frame last handed to the display"""
+        with self.frame_changed:
+            return self.frame_version, self.published_words
+
+    def wait_for_frame(self, version, timeout=None):
+        """Wait for a frame newer than ``version``
 
+        Returns ``(version, words)``, or None if nothing changed before the timeout.
+        """
+        with self.frame_changed:
+            if not self.frame_changed.wait_for(
+                lambda: self.frame_version != version, timeout
+            ):
+                return None
+            return self.frame_version, self.published_words
 
-def shift_out(data):
-    """Shift out 16 bits of data to the shift registers"""
-    for bit in range(16):
-        GPIO.output(SDI_PIN, (data & (1 << (15 - bit))) != 0)
-        GPIO.output(CLOCK_PIN, GPIO.HIGH)
-        time.sleep(0.0001)
-        GPIO.output(CLOCK_PIN, GPIO.LOW)
+    def set_display_state(self, chain_index, display_num, state):
+        """Set the state of an entire display"""
+        mask = self.layout.display_masks.get(display_num)
+        if mask is None:
+            return
+        with self.grid_lock:
+            self.segment_grid.set_mask(chain_index, mask, state)
 
+    def clear_all_segments(self):
+        """Reset all segments to off state"""
+        with self.grid_lock:
+            self.segment_grid.clear()
 
-def latch():
-    """Latch the data to the display"""
-    GPIO.output(LE_PIN, GPIO.HIGH)
-    time.sleep(0.0001)
-    GPIO.output(LE_PIN, GPIO.LOW)
+    def check_segment(self, pcb, segment):
+        """Raise ValueError unless ``pcb``/``segment`` address a segment of this wall"""
+        if (
+            not 0 <= pcb < self.num_pcbs
+            or not 0 <= segment < self.layout.segments_per_pcb
+        ):
+            raise ValueError(f"Segment out of range: pcb={pcb} segment={segment}")
+
+    def toggle_segment(self, pcb, segment):
+        """Toggle the state of a single segment; ValueError if it is out of range"""
+        self.check_segment(pcb, segment)
+        with self.grid_lock:
+            self.segment_grid.toggle(pcb, segment)
+            self.update_display()
+        return True
+
+    def apply_segment_ops(self, ops):
+        """Apply a list of set/clear/toggle operations as a single frame
+
+        Each op is a dict with ``op``, ``pcb`` and ``segment`` keys. Every op
+        is validated before any is applied; a ValueError is raised for bad
+        input. Returns the frame version now being shown.
+        """
+        parsed = []
+        for op in ops:
+            try:
+                kind = op['op']
+                pcb = int(op['pcb'])
+                segment = int(op['segment'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Malformed operation: {op!r}") from None
+            if kind not in SEGMENT_OPS:
+                raise ValueError(f"Unknown operation: {kind!r}")
+            self.check_segment(pcb, segment)
+            parsed.append((kind, pcb, segment))
+
+        with self.grid_lock:
+            for kind, pcb, segment in parsed:
+                if kind == 'toggle':
+                    self.segment_grid.toggle(pcb, segment)
+                else:
+                    self.segment_grid.set(pcb, segment, kind == 'set')
+            return self.update_display()
+
+
+def build_walls(configs):
+    """Create walls from config dicts, wiring shared-clock groups together"""
+    groups = {}
+    built = {}
+    for cfg in configs:
+        name = cfg['name']
+        layout = cfg.get('layout', LAYOUT)
+        if isinstance(layout, str):
+            layout = load_layout(layout)
+        num_pcbs = layout.num_pcbs
+        le_pin = cfg.get('le_pin', LE_PIN)
+        if cfg.get('group'):
+            group = groups.get(cfg['group'])
+            if group is None:
+                group = groups[cfg['group']] = SharedClockGroup(
+                    cfg.get('clock_pin', CLOCK_PIN), le_pin
+                )
+            backend = group.add_member(cfg.get('sdi_pin', SDI_PIN), num_pcbs)
+        elif cfg.get('backend', OUTPUT_BACKEND) == 'spi':
+            backend = SpiBackend(
+                cfg.get('spi_bus', SPI_BUS),
+                cfg.get('spi_device', SPI_DEVICE),
+                le_pin=le_pin,
+            )
+        elif cfg.get('backend', OUTPUT_BACKEND) == 'simulator':
+            backend = SimulatorBackend(num_pcbs)
+        else:
+            backend = BitBangBackend(
+                cfg.get('sdi_pin', SDI_PIN), cfg.get('clock_pin', CLOCK_PIN), le_pin
+            )
+        built[name] = Wall(
+            name,
+            layout,
+            backend,
+            cfg.get('partial_refresh', PARTIAL_REFRESH),
+            cfg.get('oe_pin'),
+        )
+    return built
+
+
+# Every wall driven by this process, by name
+walls = build_walls(WALLS)
+default_wall = walls[DEFAULT_WALL]
+
+
+def get_wall(name=None):
+    """Return the named wall, or the default wall when no name is given"""
+    if isinstance(name, Wall):
+        return name
+    if not name:
+        return default_wall
+    try:
+        return walls[name]
+    except KeyError:
+        raise UnknownWallError(f"Unknown wall: {name}") from None
+
+
+# The default wall's state, for code that drives a single wall
+segment_grid = default_wall.segment_grid
+grid_lock = default_wall.grid_lock
+writer = default_wall.writer
+
+
+def setup_gpio():
+    """Initialize GPIO pins for every wall"""
+    GPIO.setmode(GPIO.BCM)
+    for wall in walls.values():
+        wall.setup()
+
+
+def set_backend(new_backend):
+    """Replace the output backend used to drive the default wall"""
+    default_wall.set_backend(new_backend)
 
 
 def clear_display():
-    """Clear all segments on the display"""
-    for _ in range(2 * NUM_PCBS):
-        shift_out(0x0000)
-    latch()
+    """Clear all segments on the default wall"""
+    default_wall.clear_display()
 
 
 def update_display():
-    """Update the display with the current segment grid state"""
-    for pcb in reversed(range(NUM_PCBS)):
-        data1 = 0
-        data2 = 0
-        for segment in range(NUM_SEGMENTS_PER_PCB):
-            if segment < 8:
-                data1 |= segment_grid[pcb][segment] << segment
-            else:
-                data2 |= segment_grid[pcb][segment] << (segment - 8)
-        shift_out(data1)
-        shift_out(data2)
-    latch()
+    """Hand the default wall's segment grid to its display writer"""
+    return default_wall.update_display()
+
+
+def show_frame(words):
+    """Replace the default wall's grid with ``words`` and display it"""
+    return default_wall.show_frame(words)
+
+
+def get_published_frame():
+    """Return ``(version, words)`` for the default wall's last frame"""
+    return default_wall.get_published_frame()
+
+
+def wait_for_frame(version, timeout=None):
+    """Wait for a frame on the default wall newer than ``version``"""
+    return default_wall.wait_for_frame(version, timeout)
 
 
 def set_display_state(chain_index, display_num, state):
-    """Set the state of an entire display"""
-    if display_num == 1:
-        seg_range = range(0, 8)
-    elif display_num == 2:
-        seg_range = range(16, 24)
-    elif display_num == 3:
-        seg_range = range(8, 16)
-    else:
-        return
-    for s in seg_range:
-        segment_grid[chain_index][s] = 1 if state else 0
+    """Set the state of an entire display on the default wall"""
+    default_wall.set_display_state(chain_index, display_num, state)
 
 
 def clear_all_segments():
-    """Reset all segments to off state"""
-    for i in range(NUM_PCBS):
-        for j in range(NUM_SEGMENTS_PER_PCB):
-            segment_grid[i][j] = 0
+    """Reset all segments on the default wall to off state"""
+    default_wall.clear_all_segments()
 
 
 def toggle_segment(pcb, segment):
-    """Toggle the state of a single segment"""
-    segment_grid[pcb][segment] = 1 - segment_grid[pcb][segment]
-    update_display()
-    return True
+    """Toggle the state of a single segment on the default wall"""
+    return default_wall.toggle_segment(pcb, segment)
+
+
+def apply_segment_ops(ops):
+    """Apply segment operations to the default wall as a single frame"""
+    return default_wall.apply_segment_ops(ops)
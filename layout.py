@@ -0,0 +1,224 @@
+import json
+import math
+from array import array
+
+# Segment names in the order glyph patterns use them (bit 0 = A ... bit 7 = DP)
+SEGMENT_NAMES = ('A', 'B', 'C', 'D', 'E', 'F', 'G', 'DP')
+
+# How PCBs are numbered on the wall, and the orders the chain can run in
+NUMBERINGS = ('row-major', 'column-major')
+CHAIN_ORDERS = ('row-major', 'column-major', 'serpentine-rows', 'serpentine-columns')
+
+# Each PCB word carries 24 bits on the wire: three 8-bit displays
+MAX_PCB_BITS = 24
+
+# Outline of each segment in one display's 120 x 200 viewBox, as drawn by
+# templates/index.html; the decimal point circle is approximated by an octagon
+DISPLAY_WIDTH, DISPLAY_HEIGHT = 120, 200
+SEGMENT_OUTLINES = {
+    'A': ((35, 20), (85, 20), (77, 32), (43, 32)),
+    'B': ((95, 30), (107, 42), (107, 78), (95, 90), (83, 78), (83, 42)),
+    'C': ((95, 110), (107, 122), (107, 158), (95, 170), (83, 158), (83, 122)),
+    'D': ((35, 180), (85, 180), (77, 168), (43, 168)),
+    'E': ((25, 110), (37, 122), (37, 158), (25, 170), (13, 158), (13, 122)),
+    'F': ((25, 30), (37, 42), (37, 78), (25, 90), (13, 78), (13, 42)),
+    'G': ((35, 100), (43, 92), (77, 92), (85, 100), (77, 108), (43, 108)),
+    'DP': tuple(
+        (105 + 7 * math.cos(i * math.pi / 4), 180 + 7 * math.sin(i * math.pi / 4))
+        for i in range(8)
+    ),
+}
+
+
+def segment_center(name):
+    """Centre of a segment's outline within its display's viewBox"""
+    xs, ys = zip(*SEGMENT_OUTLINES[name])
+    return (min(xs) + max(xs)) / 2, (min(ys) + max(ys)) / 2
+
+
+def _grid_order(rows, columns, order):
+    """Return the (row, column) cells of a grid visited in ``order``"""
+    cells = []
+    if order in ('row-major', 'serpentine-rows'):
+        for row in range(rows):
+            cols = range(columns)
+            if order == 'serpentine-rows' and row % 2:
+                cols = reversed(cols)
+            cells.extend((row, col) for col in cols)
+    else:
+        for col in range(columns):
+            rws = range(rows)
+            if order == 'serpentine-columns' and col % 2:
+                rws = reversed(rws)
+            cells.extend((row, col) for row in rws)
+    return cells
+
+
+class Layout:
+    """Geometry and wiring of a wall of PCBs, with flat lookup tables
+
+    PCBs sit in a ``rows`` x ``columns`` grid and are labelled 1..N in
+    ``numbering`` order; the shift-register chain visits them in
+    ``chain_order``. Each PCB carries ``displays_per_pcb`` displays whose
+    8-bit patterns start at ``display_offsets`` in the PCB word, and
+    ``segment_bits`` gives the bit wired to each of segments A-G and DP.
+
+    Everything the render path needs is computed once here: ``positions``
+    holds ``(chain index, shift)`` for each display in reading order,
+    ``segment_chain``/``segment_bit`` give the chain index and word bit
+    for ``position * 8 + segment``, and ``pattern_map`` translates a glyph
+    pattern into the wired bit order.
+    """
+
+    def __init__(
+        self,
+        rows=5,
+        columns=3,
+        numbering='column-major',
+        chain_order='row-major',
+        displays_per_pcb=3,
+        display_offsets=None,
+        segment_bits=None,
+        name=None,
+    ):
+        if rows < 1 or columns < 1:
+            raise ValueError("Layout needs at least one row and column")
+        if numbering not in NUMBERINGS:
+            raise ValueError(f"Unknown PCB numbering: {numbering!r}")
+        if chain_order not in CHAIN_ORDERS:
+            raise ValueError(f"Unknown chain order: {chain_order!r}")
+        if display_offsets is None:
+            display_offsets = (
+                [0, 16, 8][:displays_per_pcb] if displays_per_pcb <= 3 else []
+            )
+        if len(display_offsets) != displays_per_pcb or displays_per_pcb < 1:
+            raise ValueError("display_offsets must give one offset per display")
+        if any(
+            offset % 8 or not 0 <= offset <= MAX_PCB_BITS - 8
+            for offset in display_offsets
+        ):
+            raise ValueError(
+                f"Display offsets must be 0, 8 or 16, got {display_offsets}"
+            )
+        if len(set(display_offsets)) != len(display_offsets):
+            raise ValueError("Display offsets must not overlap")
+        if segment_bits is None:
+            segment_bits = {name: bit for bit, name in enumerate(SEGMENT_NAMES)}
+        names, bits = sorted(segment_bits), sorted(segment_bits.values())
+        if names != sorted(SEGMENT_NAMES) or bits != list(range(8)):
+            raise ValueError("segment_bits must map A-G and DP onto bits 0-7")
+
+        self.name = name
+        self.rows = rows
+        self.columns = columns
+        self.numbering = numbering
+        self.chain_order = chain_order
+        self.displays_per_pcb = displays_per_pcb
+        self.display_offsets = list(display_offsets)
+        self.segment_bits = dict(segment_bits)
+        self.num_pcbs = rows * columns
+        self.segments_per_pcb = MAX_PCB_BITS
+
+        numbered = _grid_order(rows, columns, numbering)
+        chained = _grid_order(rows, columns, chain_order)
+        label_at = {cell: label for label, cell in enumerate(numbered, 1)}
+        chain_at = {cell: index for index, cell in enumerate(chained)}
+
+        # PCB labels row by row, as drawn in the UI
+        self.pcb_labels = [
+            [label_at[(row, col)] for col in range(columns)] for row in range(rows)
+        ]
+        self.physical_to_chain = {label_at[cell]: chain_at[cell] for cell in numbered}
+        self.physical_order = [
+            (label, display)
+            for row in self.pcb_labels
+            for label in row
+            for display in range(1, displays_per_pcb + 1)
+        ]
+        self.display_masks = {
+            display: 0xFF << offset
+            for display, offset in enumerate(self.display_offsets, 1)
+        }
+
+        self.positions = [
+            (self.physical_to_chain[label], self.display_offsets[display - 1])
+            for label, display in self.physical_order
+        ]
+        self.num_positions = len(self.positions)
+
+        # Displays sit edge to edge as the UI draws them; extents in viewBox units
+        self.displays_per_row = columns * displays_per_pcb
+        self.wall_width = self.displays_per_row * DISPLAY_WIDTH
+        self.wall_height = rows * DISPLAY_HEIGHT
+
+        # Flat tables indexed by position * 8 + segment: wiring and centre
+        wired = [self.segment_bits[name] for name in SEGMENT_NAMES]
+        centers = [segment_center(name) for name in SEGMENT_NAMES]
+        self.segment_chain = array('H')
+        self.segment_bit = array('B')
+        self.segment_x = array('d')
+        self.segment_y = array('d')
+        for position, (chain_index, shift) in enumerate(self.positions):
+            left, top = self.display_origin(position)
+            for bit, (cx, cy) in zip(wired, centers):
+                self.segment_chain.append(chain_index)
+                self.segment_bit.append(shift + bit)
+                self.segment_x.append(left + cx)
+                self.segment_y.append(top + cy)
+
+        self.pattern_map = [
+            sum(1 << wired[bit] for bit in range(8) if pattern >> bit & 1)
+            for pattern in range(256)
+        ]
+
+        # (word bit, segment name) pairs of each display, in A-DP order, for the UI
+        self.display_segments = [
+            [(offset + self.segment_bits[name], name) for name in SEGMENT_NAMES]
+            for offset in self.display_offsets
+        ]
+
+    def display_cell(self, position):
+        """Return the ``(row, column)`` of a display in the wall's grid of displays
+
+        Displays are placed edge to edge as the UI draws them, PCBs in their
+        grid and each PCB's displays side by side.
+        """
+        return divmod(position, self.displays_per_row)
+
+    def display_origin(self, position):
+        """Top-left corner of a display, in viewBox units across the whole wall"""
+        row, column = self.display_cell(position)
+        return column * DISPLAY_WIDTH, row * DISPLAY_HEIGHT
+
+    def locate(self, position, segment):
+        """Return ``(chain index, word bit)`` of segment 0-7 (A-DP) of a display"""
+        index = position * 8 + segment
+        return self.segment_chain[index], self.segment_bit[index]
+
+    def segment_xy(self, position, segment):
+        """Return a segment's centre in viewBox units across the whole wall"""
+        index = position * 8 + segment
+        return self.segment_x[index], self.segment_y[index]
+
+    def to_dict(self):
+        """Return the settings this layout was built from"""
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'columns': self.columns,
+            'numbering': self.numbering,
+            'chain_order': self.chain_order,
+            'displays_per_pcb': self.displays_per_pcb,
+            'display_offsets': self.display_offsets,
+            'segment_bits': self.segment_bits,
+        }
+
+
+def load_layout(path):
+    """Load a Layout from a JSON layout file"""
+    with open(path, 'r') as f:
+        settings = json.load(f)
+    try:
+        return Layout(**settings)
+    except TypeError as e:
+        raise ValueError(f"Invalid layout file {path}: {e}") from None
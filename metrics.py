@@ -0,0 +1,314 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Default latency buckets in seconds, from 50us up to 2.5s
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)  # fmt: skip
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    inner = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"'))
+        for k, v in pairs
+    )
+    return '{' + inner + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Family:
+    """A named metric with zero or more label dimensions"""
+
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._default = self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """Return the child metric for one combination of label values"""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Family):
+    """Monotonically increasing total"""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_child(self, values, child):
+        yield f"{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Family):
+    """Distribution of observed values in fixed cumulative buckets"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labels)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, values, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(
+                self.label_names, values, [('le', _format_value(float(bound)))]
+            )
+            yield f"{self.name}_bucket{labels} {cumulative}"
+        labels = _format_labels(self.label_names, values)
+        yield f"{self.name}_sum{labels} {_format_value(total)}"
+        yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge(_Family):
+    """Value read from callbacks when the metrics are collected"""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return None
+
+    def __init__(self, name, help, labels=()):
+        super().__init__(name, help, labels)
+        self._children.clear()
+
+    def set_function(self, fn, *values):
+        """Report ``fn()`` for the given label values"""
+        with self._lock:
+            self._children[tuple(str(v) for v in values)] = fn
+
+    def _render_child(self, values, fn):
+        try:
+            value = fn()
+        except Exception as e:
+            print(f"Error collecting {self.name}: {e}")
+            return
+        yield f"{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}"
+
+
+class Registry:
+    """Collection of metric families rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def register(self, family):
+        with self._lock:
+            if family.name in self._families:
+                raise ValueError(f"Duplicate metric: {family.name}")
+            self._families[family.name] = family
+        return family
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, labels=()):
+        return self.register(Gauge(name, help, labels))
+
+    def get(self, name):
+        return self._families[name]
+
+    def render(self):
+        """Return every metric as Prometheus exposition text"""
+        with self._lock:
+            families = list(self._families.values())
+        lines = []
+        for family in families:
+            lines.extend(family.render())
+        return '\n'.join(lines) + '\n'
+
+
+class TimedRLock:
+    """Re-entrant lock that records how long callers wait when it is contended
+
+    An uncontended acquire costs one extra non-blocking attempt and is not
+    timed, so the lock can stay instrumented in the hot path.
+    """
+
+    def __init__(self, wait_histogram):
+        self._lock = threading.RLock()
+        self.wait_histogram = wait_histogram
+
+    def acquire(self, blocking=True, timeout=-1):
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        self.wait_histogram.observe(time.perf_counter() - start)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+# Shared registry served at /metrics, and the metrics the app records
+registry = Registry()
+
+DISPLAY_UPDATE_SECONDS = registry.histogram(
+    'segwall_display_update_seconds',
+    "Time for update_display to publish a frame and hand it to the writer",
+    ('wall',),
+)
+DISPLAY_WRITE_SECONDS = registry.histogram(
+    'segwall_display_write_seconds',
+    "Time to shift a frame out and latch it",
+    ('wall', 'backend'),
+)
+DISPLAY_FRAMES_WRITTEN = registry.counter(
+    'segwall_display_frames_written_total', "Frames latched onto the wall", ('wall',)
+)
+DISPLAY_FRAMES_PER_SECOND = registry.gauge(
+    'segwall_display_frames_per_second',
+    "Frames latched per second over the last few seconds",
+    ('wall',),
+)
+PCBS_SHIFTED = registry.counter(
+    'segwall_pcbs_shifted_total', "PCBs shifted into the chain", ('wall',)
+)
+PCBS_SKIPPED = registry.counter(
+    'segwall_pcbs_skipped_total',
+    "PCBs partial refresh left out of frames, or would have in compare mode",
+    ('wall',),
+)
+GRID_LOCK_WAIT_SECONDS = registry.histogram(
+    'segwall_grid_lock_wait_seconds',
+    "Time spent waiting for a contended segment grid lock",
+    ('wall',),
+)
+GPIO_CALLS_PER_FRAME = registry.histogram(
+    'segwall_gpio_calls_per_frame',
+    "GPIO output calls made to latch one frame",
+    ('backend',),
+    buckets=(2, 8, 64, 256, 1024, 2048, 4096, 8192, 16384),
+)
+BITBANG_DELAY_SECONDS = registry.counter(
+    'segwall_bitbang_delay_seconds_total',
+    "Requested sleep time inside bit-banged shifts and latches",
+)
+GRAYSCALE_REFRESH_HZ = registry.gauge(
+    'segwall_grayscale_refresh_hz',
+    "Frames per second of the running grayscale refresh loop",
+    ('wall',),
+)
+PRESET_IO_SECONDS = registry.histogram(
+    'segwall_preset_io_seconds', "Time to read or write a preset file", ('op',)
+)
+ANIMATION_LATENESS_SECONDS = registry.histogram(
+    'segwall_animation_lateness_seconds', "How late each animation frame was shown"
+)
+ANIMATION_FRAMES_DROPPED = registry.counter(
+    'segwall_animation_frames_dropped_total',
+    "Animation frames skipped because their slot had passed",
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'segwall_http_request_seconds',
+    "Time to handle an HTTP request, excluding streamed bodies",
+    ('endpoint', 'method'),
+)
+HTTP_WORKERS_BUSY = registry.gauge(
+    'segwall_http_workers_busy', "Production server workers handling a connection"
+)
+HTTP_CONNECTIONS_WAITING = registry.gauge(
+    'segwall_http_connections_waiting', "Accepted connections waiting for a worker"
+)
+HTTP_CONNECTIONS_REJECTED = registry.counter(
+    'segwall_http_connections_rejected_total',
+    "Connections answered with 503 because every worker was busy",
+)
+HTTP_REQUESTS = registry.counter(
+    'segwall_http_requests_total', "HTTP requests handled", ('endpoint', 'status')
+)
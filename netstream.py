@@ -0,0 +1,243 @@
+import argparse
+import socket
+import struct
+import threading
+import time
+from config import (
+    NUM_PCBS,
+    NETSTREAM_HOST,
+    NETSTREAM_PORT,
+    NETSTREAM_RESET_TIMEOUT,
+)
+from framebuffer import pack_words, unpack_words
+
+# Each datagram is a header followed by the packed frame, 3 bytes per PCB:
+# magic, protocol version, wall index (order of config.WALLS), sequence
+PACKET_MAGIC = b'7SGF'
+PACKET_VERSION = 1
+HEADER = struct.Struct('>4sBBI')
+MAX_PACKET = HEADER.size + 3 * 255
+
+SEQUENCE_MOD = 1 << 32
+
+
+def encode_packet(words, sequence, wall_index=0):
+    """Build a frame datagram for the PCB words of one wall"""
+    header = HEADER.pack(
+        PACKET_MAGIC, PACKET_VERSION, wall_index, sequence % SEQUENCE_MOD
+    )
+    return header + pack_words(words)
+
+
+def decode_packet(data):
+    """Split a frame datagram into ``(wall_index, sequence, words)``"""
+    if len(data) < HEADER.size:
+        raise ValueError("Packet too short")
+    magic, version, wall_index, sequence = HEADER.unpack_from(data)
+    if magic != PACKET_MAGIC or version != PACKET_VERSION:
+        raise ValueError("Not a frame packet")
+    payload = data[HEADER.size :]
+    if len(payload) % 3:
+        raise ValueError("Truncated frame")
+    return wall_index, sequence, unpack_words(payload)
+
+
+def is_newer(sequence, last):
+    """True if ``sequence`` comes after ``last``, allowing for wraparound"""
+    return 0 < (sequence - last) % SEQUENCE_MOD < SEQUENCE_MOD // 2
+
+
+class FrameListener:
+    """Receives frame datagrams and shows them without going through HTTP
+
+    Only frames newer than the last one shown on their wall are accepted;
+    duplicates and late, reordered datagrams are dropped. When several
+    frames for a wall are already queued in the socket only the newest is
+    shown. If a wall receives nothing for ``reset_timeout`` seconds the
+    next sequence number is accepted as is, so a restarted sender is
+    picked up again.
+    """
+
+    def __init__(
+        self,
+        host=NETSTREAM_HOST,
+        port=NETSTREAM_PORT,
+        walls=None,
+        reset_timeout=NETSTREAM_RESET_TIMEOUT,
+        clock=time.monotonic,
+    ):
+        if walls is None:
+            # Imported here so the sender below works without RPi.GPIO
+            from hardware import walls as configured
+
+            walls = list(configured.values())
+        self.host = host
+        self.port = port
+        self.walls = list(walls)
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.sock = None
+        self._thread = None
+        self._running = False
+        self._last = {}  # wall index -> (sequence, received_at)
+        self.frames_received = 0
+        self.frames_shown = 0
+        self.frames_stale = 0
+        self.frames_superseded = 0
+        self.frames_invalid = 0
+
+    def start(self):
+        """Bind the socket and start receiving on a background thread"""
+        if self._running:
+            return
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind((self.host, self.port))
+        self.sock.settimeout(0.5)
+        self.port = self.sock.getsockname()[1]
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='netstream', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2):
+        """Stop receiving and close the socket"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def accept(self, data):
+        """Validate a datagram; return ``(wall, sequence, words)`` or None to drop it"""
+        self.frames_received += 1
+        try:
+            wall_index, sequence, words = decode_packet(data)
+            wall = self.walls[wall_index]
+        except (ValueError, IndexError):
+            self.frames_invalid += 1
+            return None
+        if len(words) != wall.num_pcbs:
+            self.frames_invalid += 1
+            return None
+        now = self.clock()
+        last = self._last.get(wall_index)
+        if (
+            last is not None
+            and now - last[1] < self.reset_timeout
+            and not is_newer(sequence, last[0])
+        ):
+            self.frames_stale += 1
+            return None
+        self._last[wall_index] = (sequence, now)
+        return wall, sequence, words
+
+    def handle_packets(self, packets):
+        """Show the newest valid frame for each wall among ``packets``"""
+        latest = {}
+        for data in packets:
+            accepted = self.accept(data)
+            if accepted is None:
+                continue
+            wall = accepted[0]
+            if wall.name in latest:
+                self.frames_superseded += 1
+            latest[wall.name] = accepted
+        for wall, _, words in latest.values():
+            wall.show_frame(words)
+            self.frames_shown += 1
+
+    def stats(self):
+        """Return receive counters as a dict"""
+        return {
+            'port': self.port,
+            'frames_received': self.frames_received,
+            'frames_shown': self.frames_shown,
+            'frames_stale': self.frames_stale,
+            'frames_superseded': self.frames_superseded,
+            'frames_invalid': self.frames_invalid,
+        }
+
+    def _run(self):
+        while self._running:
+            try:
+                packets = [self.sock.recv(MAX_PACKET)]
+            except socket.timeout:
+                continue
+            except OSError as e:
+                if self._running:
+                    print(f"Error receiving frame: {e}")
+                continue
+            # Drain whatever else is already queued so only the newest is shown
+            while True:
+                try:
+                    packets.append(self.sock.recv(MAX_PACKET, socket.MSG_DONTWAIT))
+                except (BlockingIOError, OSError):
+                    break
+            try:
+                self.handle_packets(packets)
+            except Exception as e:
+                print(f"Error showing streamed frame: {e}")
+
+
+class FrameSender:
+    """Client side of the protocol: sends frames with increasing sequence numbers"""
+
+    def __init__(self, host='127.0.0.1', port=NETSTREAM_PORT, wall_index=0):
+        self.address = (host, port)
+        self.wall_index = wall_index
+        self.sequence = 0
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, words):
+        """Send one frame of PCB words"""
+        self.sequence = (self.sequence + 1) % SEQUENCE_MOD
+        self.sock.sendto(
+            encode_packet(words, self.sequence, self.wall_index), self.address
+        )
+
+    def close(self):
+        self.sock.close()
+
+
+def demo_frame(step, num_pcbs=NUM_PCBS):
+    """Frame ``step`` of a simple test pattern: one lit display moving down the chain"""
+    words = [0] * num_pcbs
+    position = step % (num_pcbs * 3)
+    words[position // 3] = 0xFF << (8 * (position % 3))
+    return words
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream frames to the wall over UDP")
+    parser.add_argument('host', nargs='?', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=NETSTREAM_PORT)
+    parser.add_argument(
+        '--wall', type=int, default=0, help="wall index in config.WALLS"
+    )
+    parser.add_argument('--pcbs', type=int, default=NUM_PCBS)
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    args = parser.parse_args()
+
+    sender = FrameSender(args.host, args.port, args.wall)
+    interval = 1.0 / args.fps
+    deadline = time.monotonic()
+    end = deadline + args.seconds
+    step = 0
+    try:
+        while deadline < end:
+            sender.send(demo_frame(step, args.pcbs))
+            step += 1
+            deadline += interval
+            time.sleep(max(0.0, deadline - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sender.close()
+    print(f"Sent {step} frames to {args.host}:{args.port}")
+
+
+if __name__ == '__main__':
+    main()
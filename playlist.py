@@ -0,0 +1,306 @@
+import datetime
+import threading
+import time
+from config import PLAYLIST_ITEM_DURATION, PLAYLIST_IDLE_POLL, ANIMATION_FRAME_DURATION
+from animation import chase_animation, preset_animation, load_clip
+from effects import effect_animation
+from glyphs import render_text
+from hardware import get_wall
+from presets import load_frame
+
+
+def parse_window(window):
+    """Turn ``{'start': 'HH:MM', 'end': 'HH:MM'}`` into minutes since midnight"""
+    if not window:
+        return None
+    try:
+        bounds = []
+        for key in ('start', 'end'):
+            hours, minutes = (int(part) for part in str(window[key]).split(':'))
+            if not (0 <= hours < 24 and 0 <= minutes < 60):
+                raise ValueError
+            bounds.append(hours * 60 + minutes)
+    except (KeyError, TypeError, ValueError):
+        raise ValueError(f"Bad time window: {window}") from None
+    return tuple(bounds)
+
+
+class PlaylistItem:
+    """One entry of a playlist, compiled to frames in memory
+
+    ``frames`` is a list of ``(words, duration)``. With a ``duration`` the
+    frames repeat until it is used up; without one they play once.
+    ``window`` limits the item to a time of day and may wrap past midnight.
+    """
+
+    def __init__(self, kind, name, frames, duration=None, window=None):
+        self.kind = kind
+        self.name = name
+        self.frames = frames
+        self.duration = duration
+        self.window = window
+
+    def active(self, now):
+        """Whether the item may play at datetime ``now``"""
+        if self.window is None:
+            return True
+        start, end = self.window
+        minute = now.hour * 60 + now.minute
+        if start <= end:
+            return start <= minute < end
+        return minute >= start or minute < end
+
+    def to_dict(self):
+        return {
+            'type': self.kind,
+            'name': self.name,
+            'frames': len(self.frames),
+            'duration': self.duration,
+        }
+
+
+def compile_item(spec, wall=None):
+    """Build a PlaylistItem from a request dict, loading every frame it needs
+
+    ``type`` is 'preset' (``name``), 'text' (``text``, ``position``) or
+    'animation' (``presets``, a ``clip``, an ``effect`` with ``steps``/``params``, or the
+    chase), each with an optional ``duration`` and ``window``.
+    """
+    if not isinstance(spec, dict):
+        raise ValueError(f"Playlist item must be an object: {spec!r}")
+    wall = get_wall(wall)
+    kind = spec.get('type', 'preset')
+    duration = spec.get('duration')
+    duration = float(duration) if duration is not None else None
+    if duration is not None and duration <= 0:
+        raise ValueError('item duration must be positive')
+    window = parse_window(spec.get('window'))
+    if kind == 'preset':
+        name = spec['name']
+        words = load_frame(name, wall.num_pcbs)
+        if words is None:
+            raise ValueError(f"Preset not found: {name}")
+        duration = duration or PLAYLIST_ITEM_DURATION
+        frames = [(words, duration)]
+    elif kind == 'text':
+        name = spec['text']
+        words = render_text(name, int(spec.get('position', 0)), wall=wall)
+        duration = duration or PLAYLIST_ITEM_DURATION
+        frames = [(words, duration)]
+    elif kind == 'animation':
+        frame_duration = float(spec.get('frame_duration', ANIMATION_FRAME_DURATION))
+        if spec.get('presets'):
+            anim = preset_animation(spec['presets'], frame_duration, wall)
+        elif spec.get('clip'):
+            anim = load_clip(spec['clip'], wall)
+            if anim is None:
+                raise ValueError(f"Clip not found: {spec['clip']}")
+        elif spec.get('effect'):
+            anim = effect_animation(
+                spec['effect'],
+                int(spec.get('steps', 60)),
+                frame_duration,
+                wall,
+                **spec.get('params', {}),
+            )
+        else:
+            anim = chase_animation(frame_duration, wall)
+        name = spec.get('name', anim.name)
+        frames = list(anim)
+    else:
+        raise ValueError(f"Unknown item type: {kind}")
+    return PlaylistItem(kind, name, frames, duration, window)
+
+
+class PlaylistPlayer:
+    """Plays playlist items on one timing loop with drift correction
+
+    Every frame's deadline is the previous deadline plus its duration, and
+    an item with a duration ends at its start deadline plus that duration,
+    so slow frames or GPIO never push the schedule back. Pausing shifts the
+    outstanding deadlines by the time spent paused. Items outside their
+    time window are passed over; if a whole pass finds nothing to play the
+    loop checks again every ``PLAYLIST_IDLE_POLL`` seconds.
+    """
+
+    def __init__(self, show, clock=time.monotonic, now=datetime.datetime.now):
+        self.show = show
+        self.clock = clock
+        self.now = now
+        self.items = []
+        self.loop = True
+        self._lock = threading.Lock()
+        # Serialises start/stop; _lock guards the position the loop updates
+        self._control_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._reset()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, items, loop=True):
+        """Play compiled ``items`` in the background, replacing any current playlist"""
+        with self._control_lock:
+            self._stop_locked()
+            self.items = list(items)
+            self.loop = loop
+            self._stop = threading.Event()
+            self._reset()
+            thread = threading.Thread(
+                target=self._run, args=(self._stop,), name='playlist', daemon=True
+            )
+            thread.start()
+            self._thread = thread
+
+    def stop(self, timeout=2):
+        """Stop playback and wait for the loop to finish"""
+        with self._control_lock:
+            self._stop_locked(timeout)
+
+    def _stop_locked(self, timeout=2):
+        self._stop.set()
+        self._wake.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def pause(self):
+        """Hold the current frame until resumed"""
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = self.clock()
+
+    def resume(self):
+        """Continue from where playback was paused"""
+        with self._lock:
+            if self._paused_at is None:
+                return
+            self._shift(self.clock() - self._paused_at)
+            self._paused_at = None
+        self._wake.set()
+
+    def skip(self, index=None):
+        """Move on to the next item, or to item ``index``"""
+        if index is not None and not 0 <= index < len(self.items):
+            raise ValueError(f"No playlist item {index}")
+        with self._lock:
+            self._skip_to = self.index + 1 if index is None else index
+        self._wake.set()
+
+    def status(self):
+        """Return the playlist position and timing counters as a dict"""
+        with self._lock:
+            now = self._paused_at if self._paused_at is not None else self.clock()
+            item = self.items[self.index] if self.index < len(self.items) else None
+            return {
+                'running': self.running,
+                'paused': self._paused_at is not None,
+                'index': self.index,
+                'count': len(self.items),
+                'item': item.to_dict() if item else None,
+                'elapsed': max(0.0, now - self._item_start) if item else 0.0,
+                'remaining': (
+                    max(0.0, self._item_end - now)
+                    if item and self._item_end is not None
+                    else None
+                ),
+                'passes': self.passes,
+                'frames_shown': self.frames_shown,
+                'frames_dropped': self.frames_dropped,
+                'max_lateness': self.max_lateness,
+            }
+
+    def _reset(self):
+        self.index = 0
+        self.passes = 0
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.max_lateness = 0.0
+        self._deadline = self._item_start = self.clock()
+        self._item_end = None
+        self._paused_at = None
+        self._skip_to = None
+
+    def _shift(self, delay):
+        self._deadline += delay
+        self._item_start += delay
+        if self._item_end is not None:
+            self._item_end += delay
+
+    def _run(self, stop):
+        with self._lock:
+            self._deadline = self.clock()
+        while not stop.is_set():
+            played = False
+            while self.index < len(self.items) and not stop.is_set():
+                item = self.items[self.index]
+                if item.active(self.now()):
+                    self._play_item(item, stop)
+                    played = True
+                with self._lock:
+                    if self._skip_to is not None:
+                        self.index, self._skip_to = self._skip_to, None
+                        self._deadline = self.clock()
+                        if self._paused_at is not None:
+                            self._paused_at = self._deadline
+                    else:
+                        self.index += 1
+            if stop.is_set():
+                return
+            with self._lock:
+                self.passes += 1
+                if not self.loop:
+                    return
+                self.index = 0
+            if not played:
+                stop.wait(PLAYLIST_IDLE_POLL)
+                with self._lock:
+                    self._deadline = self.clock()
+
+    def _play_item(self, item, stop):
+        with self._lock:
+            self._item_start = self._deadline
+            self._item_end = (
+                self._deadline + item.duration if item.duration is not None else None
+            )
+        while True:
+            for words, duration in item.frames:
+                with self._lock:
+                    if self._item_end is not None and self._deadline >= self._item_end:
+                        return
+                    show_at = self._deadline
+                    self._deadline += duration
+                    if self._item_end is not None:
+                        self._deadline = min(self._deadline, self._item_end)
+                    slot = self._deadline - show_at
+                lateness = self.clock() - show_at
+                if lateness > slot:
+                    self.frames_dropped += 1
+                else:
+                    self.max_lateness = max(self.max_lateness, lateness)
+                    self.show(words)
+                    self.frames_shown += 1
+                if not self._wait(stop):
+                    return
+            if item.duration is None:
+                return
+
+    def _wait(self, stop):
+        """Sleep until the current deadline; False if stopped or skipped"""
+        while True:
+            with self._lock:
+                # Cleared before checking, so a wake-up after the check is kept
+                self._wake.clear()
+                if stop.is_set() or self._skip_to is not None:
+                    return False
+                paused = self._paused_at is not None
+                remaining = self._deadline - self.clock()
+            if paused:
+                self._wake.wait()
+            elif remaining <= 0:
+                return True
+            else:
+                self._wake.wait(remaining)
@@ -1,30 +1,109 @@
 import os
 import json
-from config import PRESETS_DIR
-from hardware import segment_grid, update_display
+import struct
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from config import (
+    PRESETS_DIR,
+    NUM_PCBS,
+    NUM_SEGMENTS_PER_PCB,
+    PRESET_CACHE_SIZE,
+    PRESET_CACHE_CHECK_INTERVAL,
+)
+from framebuffer import FrameBuffer, pack_words, unpack_words
+from hardware import get_wall
+from metrics import PRESET_IO_SECONDS
 
+# Presets are stored as a 7-byte header (magic, version, 16-bit PCB count)
+# followed by 3 bytes per PCB. Version 1 files, with a 1-byte count, are
+# still read.
+PRESET_EXT = '.seg'
+LEGACY_EXT = '.json'
+PRESET_MAGIC = b'7SEG'
+PRESET_VERSION = 2
+PRESET_HEADER = struct.Struct('<4sBH')
 
-def save_preset(name, grid_state):
-    """Save the current grid state as a preset"""
-    filename = os.path.join(PRESETS_DIR, f"{name}.json")
-    print(f"Saving preset to: {filename}")
+
+def encode_preset(words):
+    """Encode PCB words as the contents of a preset file"""
+    header = PRESET_HEADER.pack(PRESET_MAGIC, PRESET_VERSION, len(words))
+    return header + pack_words(words)
+
+
+def decode_preset(data):
+    """Decode the contents of a preset file into the PCB words it stores"""
+    if len(data) < 6 or data[:4] != PRESET_MAGIC:
+        raise ValueError("Not a preset file")
+    if data[4] == 1:
+        count, offset = data[5], 6
+    elif data[4] == PRESET_VERSION and len(data) >= PRESET_HEADER.size:
+        count, offset = PRESET_HEADER.unpack_from(data)[2], PRESET_HEADER.size
+    else:
+        raise ValueError("Not a preset file")
+    words = unpack_words(data[offset : offset + 3 * count])
+    if len(words) != count:
+        raise ValueError("Truncated preset file")
+    return words
+
+
+def _grid_to_words(grid_state):
+    """Accept either a nested list grid or a sequence of PCB words"""
+    if isinstance(grid_state, FrameBuffer):
+        return grid_state.words
+    if grid_state and not isinstance(grid_state[0], int):
+        fb = FrameBuffer(len(grid_state), NUM_SEGMENTS_PER_PCB)
+        fb.load_grid(grid_state)
+        return fb.words
+    return grid_state
+
+
+def _write_preset(filename, words):
+    with PRESET_IO_SECONDS.labels('write').time():
+        with open(filename, 'wb') as f:
+            f.write(encode_preset(words))
+    os.chmod(filename, 0o666)  # Make file readable/writable by all users
+
+
+def _migrate_legacy(name):
+    """Convert a legacy JSON preset to the binary format, returning its words"""
+    legacy = os.path.join(PRESETS_DIR, f"{name}{LEGACY_EXT}")
+    with open(legacy, 'r') as f:
+        words = _grid_to_words(json.load(f))
     try:
-        with open(filename, 'w') as f:
-            json.dump(grid_state, f)
-        os.chmod(filename, 0o666)  # Make file readable/writable by all users
-    except Exception as e:
-        print(f"Error saving preset: {e}")
-        return False
-    return True
+        _write_preset(os.path.join(PRESETS_DIR, f"{name}{PRESET_EXT}"), words)
+        os.remove(legacy)
+        print(f"Migrated preset to binary format: {name}")
+    except OSError as e:
+        print(f"Error migrating preset {name}: {e}")
+    return words
 
 
-def load_preset(name):
-    """Load a preset from file and return the grid state"""
-    filename = os.path.join(PRESETS_DIR, f"{name}.json")
+def _preset_path(name):
+    return os.path.join(PRESETS_DIR, f"{name}{PRESET_EXT}")
+
+
+def _read_frame(name):
+    """Read a preset from disk, migrating a legacy JSON file if needed"""
+    with PRESET_IO_SECONDS.labels('read').time():
+        return _read_frame_file(name)
+
+
+def _read_frame_file(name):
+    filename = _preset_path(name)
     print(f"Loading preset from: {filename}")
     try:
-        with open(filename, 'r') as f:
-            return json.load(f)
+        with open(filename, 'rb') as f:
+            return decode_preset(f.read())
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading preset: {e}")
+        return None
+
+    try:
+        return _migrate_legacy(name)
     except FileNotFoundError:
         print(f"Preset not found: {filename}")
         return None
@@ -33,32 +112,187 @@ def load_preset(name):
         return None
 
 
-def apply_preset(name):
-    """Load a preset and apply it to the display"""
-    global segment_grid
+def _list_names(directory):
+    names = set()
+    for filename in os.listdir(directory):
+        name, ext = os.path.splitext(filename)
+        if ext in (PRESET_EXT, LEGACY_EXT):
+            names.add(name)
+    return sorted(names)
+
+
+class PresetRepository:
+    """In-memory cache of parsed preset frames and the sorted name index
+
+    Entries are revalidated against the file's mtime, at most once every
+    ``check_interval`` seconds, so a show loop replaying the same presets
+    does not touch the filesystem. The least recently used frames are
+    evicted beyond ``max_entries``. Presets saved or deleted through this
+    module update the cache directly.
+    """
+
+    def __init__(
+        self,
+        max_entries=PRESET_CACHE_SIZE,
+        check_interval=PRESET_CACHE_CHECK_INTERVAL,
+        clock=time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._frames = OrderedDict()  # path -> [mtime_ns, checked_at, words]
+        self._index = None  # [directory, mtime_ns, checked_at, names]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name):
+        """Return a copy of the preset's PCB words, or None if it does not exist"""
+        path = _preset_path(name)
+        now = self.clock()
+        with self._lock:
+            entry = self._frames.get(path)
+            if entry is not None and self._still_valid(path, entry, now):
+                self._frames.move_to_end(path)
+                self.hits += 1
+                return array('I', entry[2])
+            self._frames.pop(path, None)
+            self.misses += 1
+
+        words = _read_frame(name)
+        if words is None:
+            return None
+        self.put(name, words)
+        return array('I', words)
 
-    loaded_grid = load_preset(name)
-    if loaded_grid is None:
+    def put(self, name, words):
+        """Cache ``words`` for a preset that has just been written to disk"""
+        path = _preset_path(name)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return
+        with self._lock:
+            self._frames[path] = [mtime, self.clock(), array('I', words)]
+            self._frames.move_to_end(path)
+            while len(self._frames) > self.max_entries:
+                self._frames.popitem(last=False)
+            self._index = None
+
+    def remove(self, name):
+        """Drop a preset from the cache"""
+        with self._lock:
+            self._frames.pop(_preset_path(name), None)
+            self._index = None
+
+    def names(self):
+        """Return the sorted list of preset names"""
+        directory = PRESETS_DIR
+        now = self.clock()
+        with self._lock:
+            index = self._index
+            if index is not None and index[0] == directory:
+                if now - index[2] < self.check_interval:
+                    return list(index[3])
+                if os.stat(directory).st_mtime_ns == index[1]:
+                    index[2] = now
+                    return list(index[3])
+        mtime = os.stat(directory).st_mtime_ns
+        names = _list_names(directory)
+        with self._lock:
+            self._index = [directory, mtime, now, names]
+        return list(names)
+
+    def clear(self):
+        """Forget every cached frame and the name index"""
+        with self._lock:
+            self._frames.clear()
+            self._index = None
+
+    def stats(self):
+        """Return cache counters as a dict"""
+        with self._lock:
+            return {
+                'entries': len(self._frames),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _still_valid(self, path, entry, now):
+        if now - entry[1] < self.check_interval:
+            return True
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        if mtime != entry[0]:
+            return False
+        entry[1] = now
+        return True
+
+
+# Shared cache used by the module-level preset functions
+repository = PresetRepository()
+
+
+def save_preset(name, grid_state):
+    """Save a grid state (nested list or PCB words) as a preset"""
+    filename = _preset_path(name)
+    print(f"Saving preset to: {filename}")
+    try:
+        words = _grid_to_words(grid_state)
+        _write_preset(filename, words)
+        legacy = os.path.join(PRESETS_DIR, f"{name}{LEGACY_EXT}")
+        if os.path.exists(legacy):
+            os.remove(legacy)
+    except Exception as e:
+        print(f"Error saving preset: {e}")
+        repository.remove(name)
         return False
+    repository.put(name, words)
+    return True
 
-    # Copy to the global segment grid
-    for i in range(len(segment_grid)):
-        for j in range(len(segment_grid[i])):
-            if i < len(loaded_grid) and j < len(loaded_grid[i]):
-                segment_grid[i][j] = loaded_grid[i][j]
 
-    update_display()
+def load_frame(name, num_pcbs=NUM_PCBS):
+    """Load a preset and return its PCB words, from cache where possible
+
+    Presets saved from a shorter or longer wall are padded with blank PCBs
+    or truncated to ``num_pcbs``.
+    """
+    words = repository.get(name)
+    if words is None or len(words) == num_pcbs:
+        return words
+    words.extend([0] * (num_pcbs - len(words)))
+    return words[:num_pcbs]
+
+
+def load_preset(name):
+    """Load a preset from file and return the grid state"""
+    words = load_frame(name)
+    if words is None:
+        return None
+    fb = FrameBuffer(NUM_PCBS, NUM_SEGMENTS_PER_PCB)
+    fb.assign(words)
+    return fb.to_grid()
+
+
+def apply_preset(name, wall=None):
+    """Load a preset and apply it to the display of ``wall`` (default wall if None)"""
+    wall = get_wall(wall)
+    words = load_frame(name, wall.num_pcbs)
+    if words is None:
+        return False
+
+    with wall.grid_lock:
+        wall.segment_grid.assign(words)
+        wall.update_display()
     return True
 
 
 def get_all_presets():
     """Get a list of all available presets"""
     try:
-        presets = []
-        for filename in os.listdir(PRESETS_DIR):
-            if filename.endswith('.json'):
-                presets.append(filename[:-5])  # Remove .json extension
-        return sorted(presets)
+        return repository.names()
     except Exception as e:
         print(f"Error getting presets: {e}")
         return []
@@ -66,12 +300,16 @@ def get_all_presets():
 
 def delete_preset(name):
     """Delete a preset file"""
-    filename = os.path.join(PRESETS_DIR, f"{name}.json")
-    try:
-        os.remove(filename)
-        return True
-    except FileNotFoundError:
-        return False
-    except Exception as e:
-        print(f"Error deleting preset: {e}")
-        return False
+    repository.remove(name)
+    deleted = False
+    for ext in (PRESET_EXT, LEGACY_EXT):
+        filename = os.path.join(PRESETS_DIR, f"{name}{ext}")
+        try:
+            os.remove(filename)
+            deleted = True
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error deleting preset: {e}")
+            return False
+    return deleted
@@ -0,0 +1,411 @@
+import argparse
+import mmap
+import os
+import struct
+import threading
+import time
+from config import RECORDINGS_DIR
+from backends import BYTES_PER_PCB, decode_frame, encode_frame
+from hardware import get_wall
+
+# A recording is a fixed header followed by one record per latched frame:
+# an 8-byte timestamp in microseconds from the start, then the frame exactly
+# as encoded for the chain (4 bytes per PCB, furthest PCB first)
+RECORDING_EXT = '.sgr'
+RECORDING_MAGIC = b'7SGR'
+RECORDING_VERSION = 1
+RECORDING_HEADER = struct.Struct('<4sBBHIQ')
+TIMESTAMP = struct.Struct('<Q')
+
+
+def recording_path(name):
+    """Path of the named recording; ValueError unless ``name`` is a plain file name"""
+    if not name or name in ('.', '..') or '/' in name or '\\' in name or '\0' in name:
+        raise ValueError(f"Invalid recording name: {name!r}")
+    return os.path.join(RECORDINGS_DIR, f"{name}{RECORDING_EXT}")
+
+
+def get_all_recordings():
+    """Get a sorted list of saved recording names"""
+    try:
+        return sorted(
+            filename[: -len(RECORDING_EXT)]
+            for filename in os.listdir(RECORDINGS_DIR)
+            if filename.endswith(RECORDING_EXT)
+        )
+    except FileNotFoundError:
+        return []
+
+
+class Recorder:
+    """Appends encoded frames with their timestamps to a recording file
+
+    Attach one to ``wall.recorder`` and every frame the wall latches is
+    captured, timed from the first. The frame count and total duration in
+    the header are filled in by ``close``; a file that was never closed is
+    still readable, its length taken from the file size.
+    """
+
+    def __init__(self, path, num_pcbs, clock=time.monotonic):
+        self.path = path
+        self.num_pcbs = num_pcbs
+        self.clock = clock
+        self.frames = 0
+        self.last_timestamp = 0
+        self._start = None
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'wb')
+        self._write_header(0)
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def capture(self, frame, timestamp=None):
+        """Append an encoded frame; ``timestamp`` in seconds defaults to the time since the first"""
+        if len(frame) != self.num_pcbs * BYTES_PER_PCB:
+            raise ValueError(f'expected a frame for {self.num_pcbs} PCBs')
+        with self._lock:
+            if self._file.closed:
+                return
+            if timestamp is None:
+                now = self.clock()
+                if self._start is None:
+                    self._start = now
+                timestamp = now - self._start
+            micros = max(self.last_timestamp, round(timestamp * 1e6))
+            self._file.write(TIMESTAMP.pack(micros))
+            self._file.write(frame)
+            self.frames += 1
+            self.last_timestamp = micros
+
+    def close(self, end=None):
+        """Finish the file; ``end`` in seconds is when the last frame stops showing"""
+        with self._lock:
+            if self._file.closed:
+                return
+            if end is None:
+                end = self.clock() - self._start if self._start is not None else 0.0
+            self._write_header(max(self.last_timestamp, round(end * 1e6)))
+            self._file.close()
+
+    def _write_header(self, duration):
+        self._file.seek(0)
+        self._file.write(
+            RECORDING_HEADER.pack(
+                RECORDING_MAGIC,
+                RECORDING_VERSION,
+                BYTES_PER_PCB,
+                self.num_pcbs,
+                self.frames,
+                duration,
+            )
+        )
+        self._file.seek(0, os.SEEK_END)
+
+
+def write_recording(path, frames, num_pcbs):
+    """Write ``(words, duration)`` frames to a recording, one at a time
+
+    ``frames`` can be an Animation, a Transition or a generator, so a long
+    generated show is streamed to disk without being held in memory.
+    Returns the number of frames written.
+    """
+    recorder = Recorder(path, num_pcbs)
+    timestamp = 0.0
+    try:
+        for words, duration in frames:
+            recorder.capture(encode_frame(words), timestamp)
+            timestamp += duration
+    finally:
+        recorder.close(timestamp)
+    return recorder.frames
+
+
+class Recording:
+    """A recording file mapped into memory
+
+    Opening reads only the header, so even an hour-long show opens at once.
+    ``frame(i)`` is a memoryview into the mapping that can be written to
+    the chain as is; pages are read from disk as playback reaches them and
+    can be dropped again by the kernel, so little stays resident.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a recording file") from None
+        if hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._map.madvise(mmap.MADV_SEQUENTIAL)
+        self._view = memoryview(self._map)
+        try:
+            self._read_header()
+        except ValueError:
+            self.close()
+            raise
+
+    def _read_header(self):
+        if len(self._view) < RECORDING_HEADER.size:
+            raise ValueError("Not a recording file")
+        magic, version, bytes_per_pcb, num_pcbs, count, duration = (
+            RECORDING_HEADER.unpack_from(self._view)
+        )
+        if magic != RECORDING_MAGIC or version != RECORDING_VERSION:
+            raise ValueError("Not a recording file")
+        if bytes_per_pcb != BYTES_PER_PCB:
+            raise ValueError("Recording was made for a different chain format")
+        self.num_pcbs = num_pcbs
+        self.frame_size = num_pcbs * BYTES_PER_PCB
+        self.record_size = TIMESTAMP.size + self.frame_size
+        available = (len(self._view) - RECORDING_HEADER.size) // self.record_size
+        # A recording that was never closed has no count; trust the file size
+        self.count = count if 0 < count <= available else available
+        last = self.timestamp(self.count - 1) if self.count else 0.0
+        self.duration = max(duration / 1e6, last)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _offset(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return RECORDING_HEADER.size + index * self.record_size
+
+    def timestamp(self, index):
+        """Seconds from the start of the recording at which frame ``index`` is shown"""
+        (micros,) = TIMESTAMP.unpack_from(self._view, self._offset(index))
+        return micros / 1e6
+
+    def frame(self, index):
+        """Encoded frame ``index`` as a memoryview into the file, without copying"""
+        start = self._offset(index) + TIMESTAMP.size
+        return self._view[start : start + self.frame_size]
+
+    def words(self, index):
+        """PCB words of frame ``index``"""
+        return decode_frame(self.frame(index))
+
+    def close(self):
+        """Unmap the file, or leave it mapped until the last frame view is freed"""
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
+        self._file.close()
+
+
+class RecordingPlayer:
+    """Plays a recording straight to a wall's chain from a background thread
+
+    Like the grayscale renderer it pauses the wall's display writer and
+    writes frames itself, handing each mapped frame to ``write_frame``
+    without decoding or copying it. Frames are timed against absolute
+    deadlines from their timestamps; when playback falls behind, frames
+    whose successor is also due are skipped. When playback ends the writer
+    takes over again and the segment grid is shown.
+    """
+
+    def __init__(self, wall=None, clock=time.monotonic):
+        self.wall = get_wall(wall)
+        self.clock = clock
+        self.recording = None
+        self.speed = 1.0
+        self._stop = threading.Event()
+        self._thread = None
+        # Serialises play/stop so concurrent requests can't orphan a thread
+        self._control_lock = threading.Lock()
+        self._reset_stats()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def play(self, recording, loop=False, speed=1.0):
+        """Play an open Recording (or a path to one) in the background"""
+        if speed <= 0:
+            raise ValueError('speed must be positive')
+        with self._control_lock:
+            self._stop_locked()
+            if not isinstance(recording, Recording):
+                recording = Recording(recording)
+            if recording.num_pcbs != self.wall.num_pcbs:
+                recording.close()
+                raise ValueError(
+                    f"Recording is for {recording.num_pcbs} PCBs, wall {self.wall.name} has {self.wall.num_pcbs}"
+                )
+            self.recording = recording
+            self.speed = float(speed)
+            self._reset_stats()
+            self._stop = threading.Event()
+            thread = threading.Thread(
+                target=self._run,
+                args=(recording, loop, self._stop),
+                name='recording',
+                daemon=True,
+            )
+            self.wall.writer.pause()
+            try:
+                thread.start()
+            except BaseException:
+                self.wall.writer.resume()
+                recording.close()
+                raise
+            self._thread = thread
+
+    def stop(self, timeout=2):
+        """Stop playback and give the chain back to the display writer"""
+        with self._control_lock:
+            self._stop_locked(timeout)
+
+    def _stop_locked(self, timeout=2):
+        self._stop.set()
+        thread, self._thread = self._thread, None
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def stats(self):
+        """Return playback position and counters as a dict"""
+        recording = self.recording
+        return {
+            'running': self.running,
+            'path': recording.path if recording else None,
+            'frames': len(recording) if recording else 0,
+            'duration': recording.duration if recording else 0.0,
+            'index': self.index,
+            'passes': self.passes,
+            'frames_shown': self.frames_shown,
+            'frames_dropped': self.frames_dropped,
+            'max_lateness': self.max_lateness,
+        }
+
+    def _reset_stats(self):
+        self.index = 0
+        self.passes = 0
+        self.frames_shown = 0
+        self.frames_dropped = 0
+        self.max_lateness = 0.0
+
+    def _run(self, recording, loop, stop):
+        wall = self.wall
+        count = len(recording)
+        period = recording.duration or (recording.timestamp(count - 1) if count else 0)
+        start = self.clock()
+        try:
+            while count and not stop.is_set():
+                index = 0
+                while index < count and not stop.is_set():
+                    deadline = start + recording.timestamp(index) / self.speed
+                    if stop.wait(max(0.0, deadline - self.clock())):
+                        return
+                    now = self.clock()
+                    # Skip ahead to the newest frame that is already due
+                    while (
+                        index + 1 < count
+                        and start + recording.timestamp(index + 1) / self.speed <= now
+                    ):
+                        index += 1
+                        self.frames_dropped += 1
+                    deadline = start + recording.timestamp(index) / self.speed
+                    self.max_lateness = max(self.max_lateness, now - deadline)
+                    self.index = index
+                    wall.write_frame(recording.frame(index))
+                    self.frames_shown += 1
+                    index += 1
+                self.passes += 1
+                if not loop or stop.is_set():
+                    # Hold the last frame for the rest of the recording
+                    stop.wait(max(0.0, start + period / self.speed - self.clock()))
+                    return
+                start += max(period, 1e-3) / self.speed
+        except Exception as e:
+            print(f"Error playing recording: {e}")
+        finally:
+            # Drop the wall's reference into the mapping before it is closed
+            wall.chain_frame = None
+            wall.writer.resume()
+            wall.update_display()
+            recording.close()
+
+
+def start_recording(name, wall=None):
+    """Capture every frame ``wall`` latches into a named recording"""
+    wall = get_wall(wall)
+    stop_recording(wall)
+    wall.recorder = Recorder(recording_path(name), wall.num_pcbs)
+    return wall.recorder
+
+
+def stop_recording(wall=None):
+    """Stop capturing on ``wall``; returns the number of frames recorded, or None"""
+    wall = get_wall(wall)
+    recorder, wall.recorder = wall.recorder, None
+    if recorder is None:
+        return None
+    recorder.close()
+    return recorder.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Inspect, play or generate recorded shows"
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    info = commands.add_parser('info', help="print a recording's header")
+    info.add_argument('path')
+    play = commands.add_parser('play', help="play a recording on the wall")
+    play.add_argument('path')
+    play.add_argument('--wall')
+    play.add_argument('--loop', action='store_true')
+    play.add_argument('--speed', type=float, default=1.0)
+    effect = commands.add_parser('effect', help="render an effect into a recording")
+    effect.add_argument('name')
+    effect.add_argument('path')
+    effect.add_argument('--steps', type=int, default=600)
+    effect.add_argument('--duration', type=float, default=1 / 30)
+    args = parser.parse_args()
+
+    if args.command == 'info':
+        with Recording(args.path) as recording:
+            print(
+                f"{len(recording)} frames for {recording.num_pcbs} PCBs,"
+                f" {recording.duration:.3f} s"
+            )
+    elif args.command == 'effect':
+        from config import LAYOUT
+        from effects import EFFECTS, field_for
+
+        frames = (
+            (words, args.duration)
+            for words in EFFECTS[args.name](field_for(LAYOUT), args.steps)
+        )
+        count = write_recording(args.path, frames, LAYOUT.num_pcbs)
+        print(f"Wrote {count} frames to {args.path}")
+    else:
+        from hardware import setup_gpio
+
+        setup_gpio()
+        player = RecordingPlayer(args.wall)
+        player.play(args.path, loop=args.loop, speed=args.speed)
+        try:
+            while player.running:
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            player.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import queue
+import threading
+from werkzeug.serving import BaseWSGIServer
+from config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_THREADS,
+    SERVER_BACKLOG,
+    SERVER_BACKEND,
+)
+from metrics import (
+    HTTP_CONNECTIONS_REJECTED,
+    HTTP_CONNECTIONS_WAITING,
+    HTTP_WORKERS_BUSY,
+)
+
+try:
+    import waitress
+except ImportError:
+    waitress = None
+
+# Sent to connections that arrive while every worker is busy and the queue is full
+REJECT_RESPONSE = (
+    b'HTTP/1.0 503 Service Unavailable\r\n'
+    b'Retry-After: 1\r\n'
+    b'Content-Length: 0\r\n'
+    b'Connection: close\r\n\r\n'
+)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling connections on a fixed pool of worker threads
+
+    Unlike Werkzeug's threaded server, which starts a thread per connection,
+    at most ``threads`` requests run at once and ``backlog`` more wait for a
+    free worker. Connections beyond that get an immediate 503 instead of
+    piling up. Every ``/stream`` viewer holds a worker while connected;
+    the app caps them below ``threads`` so other requests still get one.
+    """
+
+    multithread = True
+
+    def __init__(
+        self,
+        host=SERVER_HOST,
+        port=SERVER_PORT,
+        app=None,
+        threads=SERVER_THREADS,
+        backlog=SERVER_BACKLOG,
+        handler=None,
+    ):
+        if threads < 1 or backlog < 1:
+            raise ValueError("threads and backlog must be positive")
+        super().__init__(host, port, app, handler)
+        self.threads = threads
+        self.backlog = backlog
+        self._queue = queue.Queue(maxsize=backlog)
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.handled = 0
+        self.rejected = 0
+        self._workers = [
+            threading.Thread(target=self._work, name=f'http-{i}', daemon=True)
+            for i in range(threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+        HTTP_WORKERS_BUSY.set_function(lambda: self.busy)
+        HTTP_CONNECTIONS_WAITING.set_function(self._queue.qsize)
+
+    def process_request(self, request, client_address):
+        """Queue a connection for the workers, or turn it away when full"""
+        try:
+            self._queue.put_nowait((request, client_address))
+        except queue.Full:
+            self.rejected += 1
+            HTTP_CONNECTIONS_REJECTED.inc()
+            try:
+                request.sendall(REJECT_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def server_close(self):
+        """Close the socket and let idle workers exit"""
+        super().server_close()
+        for _ in self._workers:
+            try:
+                self._queue.put(None, timeout=1)
+            except queue.Full:
+                break
+
+    def _work(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            request, client_address = item
+            with self._lock:
+                self.busy += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._lock:
+                    self.busy -= 1
+                    self.handled += 1
+
+    def stats(self):
+        """Return worker pool counters as a dict"""
+        with self._lock:
+            return {
+                'threads': self.threads,
+                'backlog': self.backlog,
+                'busy': self.busy,
+                'waiting': self._queue.qsize(),
+                'handled': self.handled,
+                'rejected': self.rejected,
+            }
+
+
+def create_server(
+    app,
+    host=SERVER_HOST,
+    port=SERVER_PORT,
+    threads=SERVER_THREADS,
+    backlog=SERVER_BACKLOG,
+    backend=SERVER_BACKEND,
+    handler=None,
+):
+    """Create the production server: waitress if chosen and installed, else the pooled server"""
+    if backend == 'waitress':
+        if waitress is not None:
+            return waitress.create_server(
+                app,
+                host=host,
+                port=port,
+                threads=threads,
+                connection_limit=threads + backlog,
+            )
+        print("waitress is not installed, using the pooled server")
+    return PooledWSGIServer(host, port, app, threads, backlog, handler)
+
+
+def serve(app, **kwargs):
+    """Serve ``app`` until interrupted"""
+    server = create_server(app, **kwargs)
+    host = kwargs.get('host', SERVER_HOST)
+    port = kwargs.get('port', SERVER_PORT)
+    print(f"Serving on {host}:{port} with {type(server).__name__}")
+    if not isinstance(server, PooledWSGIServer):
+        server.run()
+        return
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
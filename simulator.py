@@ -0,0 +1,323 @@
+import argparse
+import os
+import sys
+import threading
+import time
+import types
+from config import NUM_PCBS, LAYOUT
+
+# Bits each PCB holds in the chain: two 16-bit shift registers
+BITS_PER_PCB = 32
+
+# Latched frames `python simulator.py` keeps per wall; more with --ppm, so
+# the image sequence written at exit covers a longer session
+CLI_MAX_FRAMES = 1000
+CLI_PPM_MAX_FRAMES = 100000
+
+
+class ShiftChain:
+    """Model of the daisy-chained shift registers behind one wall
+
+    Every rising clock edge shifts the bit on SDI in at the Pi end and
+    pushes the rest one place further down the chain; bits shifted past
+    the far end are lost. The outputs only change on a rising latch edge,
+    when they copy the whole shift register. ``frames`` records each latch
+    as ``(timestamp, words)`` with words in chain order, PCB 0 nearest
+    the Pi.
+    """
+
+    def __init__(
+        self, num_pcbs=NUM_PCBS, clock=time.monotonic, max_frames=None, on_latch=None
+    ):
+        self.num_pcbs = num_pcbs
+        self.clock = clock
+        self.max_frames = max_frames
+        self.on_latch = on_latch
+        self.num_bits = BITS_PER_PCB * num_pcbs
+        self._mask = (1 << self.num_bits) - 1
+        self.register = 0
+        self.outputs = 0
+        self.bits_clocked = 0
+        self.frames = []
+        self._lock = threading.Lock()
+
+    def clock_in(self, bit):
+        """Shift one bit in at the Pi end of the chain"""
+        self.register = ((self.register << 1) | (1 if bit else 0)) & self._mask
+        self.bits_clocked += 1
+
+    def shift_bytes(self, data):
+        """Shift whole bytes in, MSB first, as SPI or ``shift_out`` would"""
+        for byte in data:
+            self.register = ((self.register << 8) | byte) & self._mask
+        self.bits_clocked += 8 * len(data)
+
+    def latch(self):
+        """Copy the shift register to the outputs and record the frame"""
+        self.outputs = self.register
+        words = self.words()
+        with self._lock:
+            self.frames.append((self.clock(), words))
+            if self.max_frames is not None and len(self.frames) > self.max_frames:
+                del self.frames[0]
+        if self.on_latch is not None:
+            self.on_latch(words)
+
+    def words(self):
+        """Decode the latched outputs into PCB words"""
+        # Imported here so install() can run before backends pulls in RPi.GPIO
+        from backends import decode_frame
+
+        return decode_frame(self.outputs.to_bytes(self.num_bits // 8, 'big'))
+
+    @property
+    def last_words(self):
+        """PCB words of the most recent latch, or None"""
+        with self._lock:
+            return self.frames[-1][1] if self.frames else None
+
+    def frame_intervals(self):
+        """Seconds between consecutive latches"""
+        with self._lock:
+            times = [t for t, _ in self.frames]
+        return [b - a for a, b in zip(times, times[1:])]
+
+
+class SimulatedGPIO(types.ModuleType):
+    """Stand-in for the ``RPi.GPIO`` module that drives ShiftChains
+
+    Chains are attached to the pins they are wired to. Pin writes are
+    watched for rising edges: the clock samples each attached chain's SDI
+    pin and the latch copies its register to the outputs. Chains sharing a
+    clock and latch pin behave like a SharedClockGroup on real hardware.
+    """
+
+    BCM = 11
+    BOARD = 10
+    OUT = 0
+    IN = 1
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        super().__init__('RPi.GPIO')
+        self.mode = None
+        self.levels = {}
+        self.configured = {}
+        self._chains = []  # (chain, sdi_pin, clock_pin, le_pin)
+
+    def attach(self, chain, sdi_pin, clock_pin, le_pin):
+        """Wire ``chain`` to the given pins"""
+        self._chains.append((chain, sdi_pin, clock_pin, le_pin))
+        return chain
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, **kwargs):
+        self.configured[pin] = direction
+        self.levels.setdefault(pin, self.LOW)
+
+    def output(self, pin, value):
+        value = 1 if value else 0
+        rising = value and not self.levels.get(pin)
+        self.levels[pin] = value
+        if not rising:
+            return
+        for chain, sdi_pin, clock_pin, le_pin in self._chains:
+            if pin == clock_pin:
+                chain.clock_in(self.levels.get(sdi_pin, 0))
+            elif pin == le_pin:
+                chain.latch()
+
+    def input(self, pin):
+        return self.levels.get(pin, self.LOW)
+
+    def cleanup(self, *pins):
+        self.levels.clear()
+        self.configured.clear()
+
+
+def install():
+    """Register a SimulatedGPIO as ``RPi.GPIO`` so hardware code runs off-Pi
+
+    Must be called before ``backends``/``hardware`` are imported.
+    """
+    gpio = SimulatedGPIO()
+    package = types.ModuleType('RPi')
+    package.GPIO = gpio
+    sys.modules['RPi'] = package
+    sys.modules['RPi.GPIO'] = gpio
+    return gpio
+
+
+class SimulatorBackend:
+    """Output backend feeding a ShiftChain instead of real pins
+
+    Frames go through the same shift and latch model as the real chain,
+    without the bit-bang delays, and every latch is recorded.
+    """
+
+    name = 'simulator'
+    partial_shift = True
+
+    def __init__(
+        self, num_pcbs=NUM_PCBS, clock=time.monotonic, max_frames=None, on_latch=None
+    ):
+        self.chain = ShiftChain(num_pcbs, clock, max_frames, on_latch)
+
+    @property
+    def frames(self):
+        return self.chain.frames
+
+    @property
+    def last_words(self):
+        return self.chain.last_words
+
+    def setup(self):
+        pass
+
+    def write_frame(self, frame):
+        self.chain.shift_bytes(frame)
+        self.chain.latch()
+
+    def close(self):
+        pass
+
+
+# Segment geometry shared by the renderers: (segment name, x0, y0, x1, y1) in a
+# 6 x 10 cell per display, with the decimal point bottom right
+_SEGMENT_RECTS = (
+    ('A', 1, 0, 4, 1),
+    ('B', 4, 1, 5, 5),
+    ('C', 4, 5, 5, 9),
+    ('D', 1, 9, 4, 10),
+    ('E', 0, 5, 1, 9),
+    ('F', 0, 1, 1, 5),
+    ('G', 1, 4, 4, 5),
+    ('DP', 5, 9, 6, 10),
+)
+_CELL_W, _CELL_H = 7, 11
+
+
+def _lit_segments(words, layout):
+    """Yield ``(row, column, display, lit segment names)`` for every display"""
+    for row, labels in enumerate(layout.pcb_labels):
+        for col, label in enumerate(labels):
+            word = words[layout.physical_to_chain[label]]
+            for display, offset in enumerate(layout.display_offsets):
+                lit = {
+                    name
+                    for name, bit in layout.segment_bits.items()
+                    if word >> (offset + bit) & 1
+                }
+                yield row, col, display, lit
+
+
+def render_terminal(words, layout=LAYOUT):
+    """Draw a frame as text, three lines per row of PCBs"""
+    width = layout.columns * (layout.displays_per_pcb * 4 + 2)
+    lines = [[' '] * width for _ in range(layout.rows * 3)]
+    for row, col, display, lit in _lit_segments(words, layout):
+        x = col * (layout.displays_per_pcb * 4 + 2) + display * 4
+        y = row * 3
+        if 'A' in lit:
+            lines[y][x + 1] = '_'
+        if 'F' in lit:
+            lines[y + 1][x] = '|'
+        if 'G' in lit:
+            lines[y + 1][x + 1] = '_'
+        if 'B' in lit:
+            lines[y + 1][x + 2] = '|'
+        if 'E' in lit:
+            lines[y + 2][x] = '|'
+        if 'D' in lit:
+            lines[y + 2][x + 1] = '_'
+        if 'C' in lit:
+            lines[y + 2][x + 2] = '|'
+        if 'DP' in lit:
+            lines[y + 2][x + 3] = '.'
+    return '\n'.join(''.join(line).rstrip() for line in lines)
+
+
+def render_ppm(words, layout=LAYOUT, scale=4, on=(255, 40, 20), off=(40, 10, 10)):
+    """Draw a frame as a binary PPM image and return its bytes"""
+    pcb_w = layout.displays_per_pcb * _CELL_W + 2
+    width = layout.columns * pcb_w * scale
+    height = layout.rows * (_CELL_H + 1) * scale
+    pixels = bytearray(width * height * 3)
+    for row, col, display, lit in _lit_segments(words, layout):
+        left = (col * pcb_w + display * _CELL_W) * scale
+        top = row * (_CELL_H + 1) * scale
+        for name, x0, y0, x1, y1 in _SEGMENT_RECTS:
+            color = bytes(on if name in lit else off)
+            run = color * ((x1 - x0) * scale)
+            for y in range(top + y0 * scale, top + y1 * scale):
+                start = (y * width + left + x0 * scale) * 3
+                pixels[start : start + len(run)] = run
+    return b'P6 %d %d 255\n' % (width, height) + bytes(pixels)
+
+
+def write_image_sequence(frames, directory, layout=LAYOUT, scale=4):
+    """Write recorded ``(timestamp, words)`` frames as numbered PPM files"""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for index, (_, words) in enumerate(frames):
+        path = os.path.join(directory, f"frame_{index:05d}.ppm")
+        with open(path, 'wb') as f:
+            f.write(render_ppm(words, layout, scale))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run the web UI against a simulated wall"
+    )
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument(
+        '--quiet', action='store_true', help="don't draw frames in the terminal"
+    )
+    parser.add_argument(
+        '--ppm', metavar='DIR', help="write the latched frames as PPM images at exit"
+    )
+    parser.add_argument(
+        '--max-frames',
+        type=int,
+        help=f"latched frames to keep (default {CLI_MAX_FRAMES}, "
+        f"or {CLI_PPM_MAX_FRAMES} with --ppm)",
+    )
+    args = parser.parse_args()
+    max_frames = args.max_frames or (CLI_PPM_MAX_FRAMES if args.ppm else CLI_MAX_FRAMES)
+
+    install()
+    import hardware
+    from app import app
+
+    def show(words):
+        if not args.quiet:
+            sys.stdout.write('\x1b[H\x1b[2J' + render_terminal(words) + '\n')
+            sys.stdout.flush()
+
+    backends = []
+    for wall in hardware.walls.values():
+        backend = SimulatorBackend(
+            wall.num_pcbs,
+            max_frames=max_frames,
+            on_latch=show if wall is hardware.default_wall else None,
+        )
+        wall.set_backend(backend)
+        backends.append(backend)
+    try:
+        app.run(host='0.0.0.0', port=args.port, threaded=True)
+    finally:
+        if args.ppm:
+            paths = write_image_sequence(backends[0].frames, args.ppm)
+            print(f"Wrote {len(paths)} frames to {args.ppm}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,36 @@
 // Global variables
 var hoverEnabled = false;
-var animationPolling = null;
-var isAnimating = false;
+var segmentElements = null;
+var frameStream = null;
+
+// Hover edits are buffered and sent to /batch_update together
+var BATCH_FLUSH_MS = 100;
+var pendingOps = [];
+var batchTimer = null;
+var batchesInFlight = 0;
+var deferredFrame = null;
+
+// Wall this page controls, when the server drives more than one
+var wallName = null;
+
+// Address a request to this page's wall
+function wallUrl(url) {
+    if (!wallName) {
+        return url;
+    }
+    return url + (url.indexOf('?') === -1 ? '?' : '&') + 'wall=' + encodeURIComponent(wallName);
+}
+
+$.ajaxPrefilter(function(options) {
+    options.url = wallUrl(options.url);
+});
 
 $(document).ready(function() {
+    wallName = $('body').data('wall') || null;
     // Set up event handlers
     setupEventHandlers();
+    // Follow the wall state pushed by the server
+    connectFrameStream();
 });
 
 function setupEventHandlers() {
@@ -36,23 +61,7 @@ function setupEventHandlers() {
                 if (response.success) {
                     $this.text('Start Animation');
                     $this.removeClass('btn-danger').addClass('btn-success');
-                    
-                    // Stop polling when animation stops
-                    isAnimating = false;
-                    if (animationPolling) {
-                        clearInterval(animationPolling);
-                        animationPolling = null;
-                    }
-                    
-                    // Make one final request to get the current state after stopping
-                    setTimeout(function() {
-                        $.getJSON('/get_grid_state', function(stateResponse) {
-                            if (stateResponse.success) {
-                                updateDisplayFromGrid(stateResponse.grid);
-                                showToast('Animation stopped', 'info');
-                            }
-                        });
-                    }, 300); // Wait a moment for the server to process the stop command
+                    showToast('Animation stopped', 'info');
                 }
             });
         } else {
@@ -61,10 +70,6 @@ function setupEventHandlers() {
                     $this.text('Stop Animation');
                     $this.removeClass('btn-success').addClass('btn-danger');
                     showToast('Animation started', 'success');
-                    
-                    // Start polling when animation starts
-                    isAnimating = true;
-                    animationPolling = setInterval(pollGridState, 200); // Poll every 200ms
                 }
             });
         }
@@ -76,11 +81,11 @@ function setupEventHandlers() {
         }
     });
 
-    $(".segment, .dp").hover(debounce(function() {
+    $(".segment, .dp").hover(function() {
         if (hoverEnabled) {
-            toggleSegment($(this));
+            queueToggle($(this));
         }
-    }, 50), function() {});
+    }, function() {});
 
     // Preset management functionality
     $("#savePresetBtn").click(function() {
@@ -109,7 +114,13 @@ function setupEventHandlers() {
             return;
         }
 
-        $.post('/load_preset', { name: name }, function(response) {
+        const data = { name: name };
+        const transition = $("#transitionSelect").val();
+        if (transition) {
+            data.transition = transition;
+        }
+
+        $.post('/load_preset', data, function(response) {
             if (response.success) {
                 // Update all segments based on loaded state
                 updateDisplayFromGrid(response.grid);
@@ -200,33 +211,115 @@ function updateDisplayFromGrid(grid) {
     });
 }
 
-// Function to poll the current state during animation
-function pollGridState() {
-    $.getJSON('/get_grid_state', function(response) {
-        if (response.success) {
-            updateDisplayFromGrid(response.grid);
+// Decode a frame sent as 6-digit hex words, one per PCB
+function decodeFrame(hex) {
+    const words = [];
+    for (let i = 0; i < hex.length; i += 6) {
+        words.push(parseInt(hex.substr(i, 6), 16));
+    }
+    return words;
+}
+
+// Function to update the display from packed per-PCB words
+function updateDisplayFromWords(words) {
+    if (!segmentElements) {
+        segmentElements = $(".segment, .dp").toArray();
+    }
+    segmentElements.forEach(el => {
+        const pcb = parseInt(el.getAttribute('data-pcb'), 10);
+        const segment = parseInt(el.getAttribute('data-segment'), 10);
+        el.classList.toggle('on', ((words[pcb] >> segment) & 1) === 1);
+    });
+}
+
+// Receive a frame from the server whenever the wall changes
+function connectFrameStream() {
+    if (!window.EventSource) {
+        return;
+    }
+    frameStream = new EventSource(wallUrl('/stream'));
+    frameStream.onmessage = function(event) {
+        const frame = { version: parseInt(event.lastEventId, 10), words: decodeFrame(event.data) };
+        // Don't undo local hover edits the server has not seen yet
+        if (pendingOps.length || batchesInFlight) {
+            deferredFrame = frame;
+            return;
         }
+        updateDisplayFromWords(frame.words);
+    };
+}
+
+// Toggle a segment locally and queue it for the next batch
+function queueToggle(segmentElement) {
+    segmentElement.toggleClass('on');
+    pendingOps.push({
+        op: 'toggle',
+        pcb: segmentElement.data('pcb'),
+        segment: segmentElement.data('segment')
+    });
+    if (!batchTimer) {
+        batchTimer = setTimeout(flushBatch, BATCH_FLUSH_MS);
+    }
+}
+
+function flushBatch() {
+    batchTimer = null;
+    if (!pendingOps.length) {
+        return;
+    }
+    const ops = pendingOps;
+    pendingOps = [];
+    batchesInFlight++;
+    $.ajax({
+        url: '/batch_update',
+        type: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({ ops: ops })
+    }).done(function(response) {
+        if (!response.success) {
+            showToast(`Error: ${response.error}`, 'error');
+        }
+        // A rejected batch has no version: fall back to the server's frame
+        finishBatch(response.success ? response.version : null);
+    }).fail(function() {
+        showToast('Error: batch update failed', 'error');
+        finishBatch(null);
     });
 }
 
+function finishBatch(version) {
+    batchesInFlight--;
+    if (batchesInFlight || pendingOps.length) {
+        return;
+    }
+    if (!deferredFrame) {
+        if (version == null) {
+            // Nothing arrived meanwhile; drop the local toggles the server refused
+            $.get('/get_grid_state', function(response) {
+                if (response.success) {
+                    updateDisplayFromGrid(response.grid);
+                }
+            });
+        }
+        return;
+    }
+    // Frames older than our batch would briefly revert the edits
+    if (version == null || deferredFrame.version >= version) {
+        updateDisplayFromWords(deferredFrame.words);
+    }
+    deferredFrame = null;
+}
+
 function toggleSegment(segmentElement) {
     var pcb = segmentElement.data('pcb');
     var segment = segmentElement.data('segment');
     $.post('/toggle_segment', { pcb: pcb, segment: segment }, function(response) {
         if (response.success) {
-            segmentElement.toggleClass('on');
+            segmentElement.toggleClass('on', response.state === 1);
         }
     });
 }
 
-function debounce(func, wait) {
-    let timeout;
-    return function(...args) {
-        clearTimeout(timeout);
-        timeout = setTimeout(() => func.apply(this, args), wait);
-    };
-}
-
 function updatePresetDropdown(presets) {
     const $select = $("#presetSelect");
     $select.empty();
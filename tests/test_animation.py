@@ -0,0 +1,241 @@
+"""Tests for animation.py — frame compilation and the deadline scheduler."""
+
+import threading
+import time
+import pytest
+from animation import Animation, AnimationPlayer, chase_animation, preset_animation
+from config import NUM_PCBS
+
+
+def _words(first):
+    return [first] + [0] * (NUM_PCBS - 1)
+
+
+def _overrunning_show(clock, seconds):
+    """A show whose first frame takes ``seconds`` of fake time to draw"""
+
+    def show(words):
+        if clock.now == 0:
+            clock.now += seconds
+
+    return show
+
+
+# ── Animation ─────────────────────────────────────────────────────────
+
+
+def test_add_frame_stores_packed_words():
+    anim = Animation()
+    anim.add_frame(_words(7), 0.25)
+    words, duration = anim.frames[0]
+    assert list(words) == _words(7)
+    assert duration == 0.25
+
+
+def test_add_frame_validates():
+    anim = Animation()
+    with pytest.raises(ValueError):
+        anim.add_frame([0, 0], 0.1)
+    with pytest.raises(ValueError):
+        anim.add_frame(_words(0), 0)
+
+
+def test_chase_animation_lights_one_display_per_frame():
+    from config import physical_order
+
+    anim = chase_animation(0.1)
+    assert len(anim) == len(physical_order)
+    for words, duration in anim:
+        lit = [w for w in words if w]
+        assert len(lit) == 1
+        assert bin(lit[0]).count("1") == 8
+        assert duration == 0.1
+
+
+def test_preset_animation(tmp_path, monkeypatch):
+    import presets as presets_mod
+
+    monkeypatch.setattr(presets_mod, "PRESETS_DIR", str(tmp_path))
+    presets_mod.save_preset("one", [[1]])
+    anim = preset_animation(["one"], 0.2)
+    assert list(anim.frames[0][0]) == _words(1)
+    with pytest.raises(ValueError):
+        preset_animation(["missing"])
+
+
+# ── AnimationPlayer ───────────────────────────────────────────────────
+
+
+def test_run_shows_frames_in_order(fake_clock):
+    clock = fake_clock()
+    shown = []
+
+    def show(words):
+        shown.append(words[0])
+        clock.now += 0.01
+
+    player = AnimationPlayer(show=show, clock=clock)
+    player.run(Animation([(_words(i), 0.01) for i in range(5)]))
+    assert shown == [0, 1, 2, 3, 4]
+    assert player.frames_shown == 5
+
+
+def test_run_targets_absolute_deadlines(fake_clock):
+    clock = fake_clock()
+    player = AnimationPlayer(show=_overrunning_show(clock, 0.015), clock=clock)
+    player.run(Animation([(_words(0), 0.01)] * 3))
+    # The first frame's overrun is taken out of the next slot rather than
+    # pushing the rest of the schedule back
+    assert player.frames_shown == 3
+    assert player.max_lateness == pytest.approx(0.005)
+
+
+def test_frames_dropped_when_behind(fake_clock):
+    clock = fake_clock()
+    shown = []
+
+    def slow_show(words):
+        shown.append(words[0])
+        clock.now += 0.035
+
+    player = AnimationPlayer(show=slow_show, clock=clock)
+    player.run(Animation([(_words(i), 0.01) for i in range(6)]))
+    # The last frame is shown late rather than dropped, so the run ends on it
+    assert shown == [0, 3, 5]
+    assert player.frames_dropped == 3
+
+
+def test_speed_scales_duration(fake_clock):
+    clock = fake_clock()
+    player = AnimationPlayer(show=_overrunning_show(clock, 0.015), clock=clock)
+    player.set_speed(4)
+    player.run(Animation([(_words(0), 0.04)] * 3))
+    # At 4x each 40 ms frame gets a 10 ms slot, which the overrun exceeds
+    assert player.max_lateness == pytest.approx(0.005)
+
+
+def test_set_speed_rejects_non_positive():
+    with pytest.raises(ValueError):
+        AnimationPlayer().set_speed(0)
+
+
+def test_play_loops_until_stopped(fake_clock):
+    shown = []
+    player = AnimationPlayer(show=lambda w: shown.append(w[0]), clock=fake_clock())
+    anim = Animation([(_words(1), 0.005), (_words(2), 0.005)])
+    player.play(anim, loop=True)
+    deadline = time.monotonic() + 2
+    while len(shown) < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert player.running
+    player.stop()
+    assert not player.running
+    assert shown[:4] == [1, 2, 1, 2]
+
+
+def test_play_accepts_generator(fake_clock):
+    shown = []
+    player = AnimationPlayer(show=lambda w: shown.append(w[0]), clock=fake_clock())
+    player.play(((_words(i), 0.001) for i in range(3)), loop=True)
+    player._thread.join(timeout=2)
+    assert shown == [0, 1, 2]
+
+
+def test_concurrent_play_and_stop_leave_no_thread_running(fake_clock):
+    threads = set()
+
+    def show(words):
+        threads.add(threading.current_thread())
+
+    player = AnimationPlayer(show=show, clock=fake_clock())
+    anim = Animation([(_words(1), 0.005), (_words(2), 0.005)])
+    errors = []
+
+    def hammer():
+        try:
+            for _ in range(20):
+                player.play(anim, loop=True)
+                player.stop()
+                player.play(anim, loop=True)
+        except Exception as e:
+            errors.append(e)
+
+    callers = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join(10)
+    player.stop()
+    assert errors == []
+    assert not player.running
+    assert threads
+    assert not any(t.is_alive() for t in threads)
+
+
+def test_stats():
+    player = AnimationPlayer(show=lambda w: None)
+    player.run(Animation([(_words(0), 0.001)]))
+    stats = player.stats()
+    assert stats["frames_shown"] == 1
+    assert stats["running"] is False
+    assert set(stats) >= {"frames_late", "frames_dropped", "max_lateness", "speed"}
+
+
+# ── Clip files ────────────────────────────────────────────────────────
+
+
+def test_clip_roundtrip():
+    from animation import decode_clip, encode_clip
+
+    anim = Animation([(_words(i), 0.04 * (i + 1)) for i in range(3)], name="c")
+    data = encode_clip(anim)
+    assert len(data) == 12 + 3 * (2 + 3 * NUM_PCBS)
+    clip = decode_clip(data, "c")
+    assert [list(w) for w, _ in clip] == [list(w) for w, _ in anim]
+    assert [d for _, d in clip] == pytest.approx([0.04, 0.08, 0.12])
+    with pytest.raises(ValueError):
+        decode_clip(b"7SEG" + data[4:])
+    with pytest.raises(ValueError):
+        decode_clip(data[:-1])
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "../x", "a/b", "a\\b", "a\0b", None])
+def test_clip_names_must_stay_in_clips_dir(tmp_path, monkeypatch, name):
+    import animation
+
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(tmp_path / "clips"))
+    anim = Animation([(_words(1), 0.1)] * 2)
+    with pytest.raises(ValueError):
+        animation.save_clip(name, anim)
+    with pytest.raises(ValueError):
+        animation.load_clip(name)
+    assert list(tmp_path.rglob("*.sgc")) == []
+
+
+def test_clip_symlink_leading_outside_is_rejected(tmp_path, monkeypatch):
+    import animation
+
+    clips = tmp_path / "clips"
+    clips.mkdir()
+    (tmp_path / "outside.sgc").write_bytes(b"")
+    (clips / "link.sgc").symlink_to(tmp_path / "outside.sgc")
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(clips))
+    with pytest.raises(ValueError):
+        animation.load_clip("link")
+
+
+def test_save_and_load_clip(tmp_path, monkeypatch):
+    import animation
+    from hardware import Wall
+    from layout import Layout
+    from simulator import SimulatorBackend
+
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(tmp_path / "clips"))
+    assert animation.get_all_clips() == []
+    anim = Animation([(_words(1), 0.1), (_words(2), 0.1)])
+    assert animation.save_clip("two", anim)
+    assert animation.get_all_clips() == ["two"]
+    assert len(animation.load_clip("two")) == 2
+    assert animation.load_clip("missing") is None
+    small = Wall("small", Layout(rows=1, columns=2), SimulatorBackend(2))
+    assert list(animation.load_clip("two", small).frames[0][0]) == [1, 0]
@@ -1,6 +1,8 @@
 """Tests for app.py — Flask routes via the test client."""
 
 import json
+import re
+import time
 import pytest
 
 
@@ -20,6 +22,16 @@ def client(monkeypatch, tmp_path):
         yield c
 
 
+@pytest.fixture(autouse=True)
+def stop_shows():
+    """Stop anything a test left playing so it can't draw into the next one."""
+    yield
+    import app as app_mod
+
+    for wall in app_mod.walls.values():
+        app_mod._take_over(wall)
+
+
 @pytest.fixture(autouse=True)
 def reset_grid():
     from hardware import segment_grid
@@ -52,6 +64,20 @@ def test_toggle_segment(client):
     assert segment_grid[0][0] == 1
 
 
+@pytest.mark.parametrize(
+    "pcb, segment", [("0", "24"), ("0", "40"), ("0", "-1"), ("15", "0"), ("x", "0")]
+)
+def test_toggle_segment_rejects_bad_segment(client, pcb, segment):
+    from hardware import segment_grid
+
+    resp = client.post("/toggle_segment", data={"pcb": pcb, "segment": segment})
+    assert resp.status_code == 400
+    data = json.loads(resp.data)
+    assert data["success"] is False
+    assert data["error"]
+    assert all(word == 0 for word in segment_grid.words)
+
+
 def test_toggle_segment_twice(client):
     from hardware import segment_grid
 
@@ -75,6 +101,111 @@ def test_clear_all(client):
         assert all(v == 0 for v in row)
 
 
+# ── Playlist routes ──────────────────────────────────────────────────
+
+
+def test_playlist_routes(client):
+    client.post("/toggle_segment", data={"pcb": "0", "segment": "0"})
+    client.post("/save_preset", data={"name": "first"})
+    items = [
+        {"type": "preset", "name": "first", "duration": 5},
+        {"type": "text", "text": "hi", "duration": 5},
+    ]
+    data = json.loads(client.post("/start_playlist", json={"items": items}).data)
+    assert data == {"success": True, "count": 2}
+    assert json.loads(client.post("/pause_playlist").data)["success"] is True
+    status = json.loads(client.get("/playlist_status").data)
+    assert status["running"] and status["paused"]
+    assert status["item"]["name"] == "first"
+    client.post("/resume_playlist")
+    client.post("/skip_playlist")
+    import app as app_mod
+
+    playlist = app_mod.playlists[app_mod.default_wall.name]
+    deadline = time.monotonic() + 2
+    while playlist.status()["index"] != 1 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert json.loads(client.get("/playlist_status").data)["item"]["type"] == "text"
+    data = json.loads(client.post("/skip_playlist", data={"index": "7"}).data)
+    assert data["success"] is False
+    client.post("/stop_playlist")
+    assert json.loads(client.get("/playlist_status").data)["running"] is False
+
+
+def test_start_playlist_rejects_missing_preset(client):
+    items = [{"type": "preset", "name": "ghost"}]
+    data = json.loads(client.post("/start_playlist", json={"items": items}).data)
+    assert data["success"] is False
+    assert "ghost" in data["error"]
+    data = json.loads(client.post("/start_playlist", json={"items": []}).data)
+    assert data["success"] is False
+
+
+@pytest.mark.parametrize(
+    "items",
+    [["x"], [3], {"type": "preset"}, [{"type": "text", "window": {"start": "12:75"}}]],
+)
+def test_start_playlist_rejects_malformed_items(client, items):
+    resp = client.post("/start_playlist", json={"items": items})
+    assert resp.status_code == 400
+    assert json.loads(resp.data)["success"] is False
+
+
+# ── Recording routes ─────────────────────────────────────────────────
+
+
+def test_record_and_play_back(client, monkeypatch, tmp_path):
+    import app as app_mod
+    import recording
+
+    monkeypatch.setattr(recording, "RECORDINGS_DIR", str(tmp_path))
+    data = json.loads(client.post("/start_recording", data={"name": "take"}).data)
+    assert data["success"] is True
+    client.post("/toggle_segment", data={"pcb": "0", "segment": "1"})
+    app_mod.default_wall.writer.flush(timeout=2)
+    status = json.loads(client.get("/recording_status").data)
+    assert status["recording"] is True
+    data = json.loads(client.post("/stop_recording").data)
+    assert data["success"] is True
+    assert data["frames"] >= 1
+    assert data["recordings"] == ["take"]
+
+    resp = client.post("/play_recording", data={"name": "take"})
+    assert json.loads(resp.data)["success"] is True
+    client.post("/stop_playback")
+    playback = json.loads(client.get("/recording_status").data)["playback"]
+    assert playback["running"] is False
+    assert playback["frames"] == data["frames"]
+
+
+def test_recording_route_errors(client, monkeypatch, tmp_path):
+    import recording
+
+    monkeypatch.setattr(recording, "RECORDINGS_DIR", str(tmp_path))
+    assert json.loads(client.post("/stop_recording").data)["success"] is False
+    assert json.loads(client.post("/start_recording").data)["success"] is False
+    data = json.loads(client.post("/play_recording", data={"name": "none"}).data)
+    assert data["error"] == "Recording not found"
+
+
+@pytest.mark.parametrize("name", ["../escape", "sub/take", "..", "a\\b"])
+def test_recording_routes_reject_unsafe_names(client, monkeypatch, tmp_path, name):
+    import recording
+    from hardware import default_wall
+
+    recordings = tmp_path / "recordings"
+    recordings.mkdir()
+    monkeypatch.setattr(recording, "RECORDINGS_DIR", str(recordings))
+    data = json.loads(client.post("/start_recording", data={"name": name}).data)
+    assert data["success"] is False
+    assert "Invalid recording name" in data["error"]
+    assert default_wall.recorder is None
+    data = json.loads(client.post("/play_recording", data={"name": name}).data)
+    assert data["success"] is False
+    assert "Invalid recording name" in data["error"]
+    assert list(tmp_path.rglob("*.sgr")) == []
+
+
 # ── Preset routes ────────────────────────────────────────────────────
 
 
@@ -109,6 +240,41 @@ def test_load_preset_missing(client):
     assert data["success"] is False
 
 
+def test_load_preset_with_transition(client, monkeypatch):
+    import app as app_mod
+    from hardware import segment_grid
+
+    monkeypatch.setattr(app_mod.player, "clock", lambda: 0.0)
+    client.post("/toggle_segment", data={"pcb": "1", "segment": "3"})
+    client.post("/toggle_segment", data={"pcb": "2", "segment": "5"})
+    client.post("/save_preset", data={"name": "target"})
+    client.post("/clear_all")
+    resp = client.post(
+        "/load_preset",
+        data={
+            "name": "target",
+            "transition": "dissolve",
+            "steps": "4",
+            "duration": "0.04",
+        },
+    )
+    data = json.loads(resp.data)
+    assert data["success"] is True
+    assert data["steps"] == 4
+    assert data["grid"][1][3] == 1
+    app_mod.player._thread.join(timeout=2)
+    assert app_mod.player.stats()["frames_shown"] == 4
+    assert segment_grid[1][3] == 1 and segment_grid[2][5] == 1
+
+
+def test_load_preset_with_unknown_transition(client):
+    client.post("/save_preset", data={"name": "blank"})
+    resp = client.post("/load_preset", data={"name": "blank", "transition": "spin"})
+    assert json.loads(resp.data)["success"] is False
+    resp = client.post("/load_preset", data={"name": "nope", "transition": "wipe"})
+    assert json.loads(resp.data)["error"] == "Preset not found"
+
+
 def test_delete_preset(client):
     client.post("/save_preset", data={"name": "todelete"})
     resp = client.post("/delete_preset", data={"name": "todelete"})
@@ -152,11 +318,9 @@ def test_start_animation(client):
     resp = client.post("/start_animation")
     data = json.loads(resp.data)
     assert data["success"] is True
-    assert app_mod.animation_running is True
+    assert app_mod.player.running is True
     # Clean up — stop the animation thread
-    app_mod.animation_running = False
-    if app_mod.animation_thread:
-        app_mod.animation_thread.join(timeout=2)
+    app_mod.player.stop()
 
 
 def test_stop_animation(client):
@@ -166,6 +330,547 @@ def test_stop_animation(client):
     resp = client.post("/stop_animation")
     data = json.loads(resp.data)
     assert data["success"] is True
-    assert app_mod.animation_running is False
-    if app_mod.animation_thread:
-        app_mod.animation_thread.join(timeout=2)
+    assert app_mod.player.running is False
+
+
+def test_start_animation_uploaded_frames(client, monkeypatch):
+    import app as app_mod
+    from hardware import segment_grid
+
+    # A frozen clock keeps every frame on time however slow the machine is
+    monkeypatch.setattr(app_mod.player, "clock", lambda: 0.0)
+    frames = [{"words": "000001" + "000000" * 14, "duration": 0.01}]
+    resp = client.post("/start_animation", json={"frames": frames, "loop": False})
+    assert json.loads(resp.data)["success"] is True
+    app_mod.player._thread.join(timeout=2)
+    assert segment_grid[0][0] == 1
+    assert app_mod.player.stats()["frames_shown"] == 1
+
+
+def test_start_animation_effect(client, monkeypatch):
+    pytest.importorskip("numpy")
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod.player, "clock", lambda: 0.0)
+    resp = client.post(
+        "/start_animation",
+        json={
+            "effect": "wipe",
+            "steps": 4,
+            "duration": 0.01,
+            "loop": False,
+            "params": {"fill": True},
+        },
+    )
+    assert json.loads(resp.data)["success"] is True
+    app_mod.player._thread.join(timeout=2)
+    assert app_mod.player.stats()["frames_shown"] == 4
+
+
+def test_start_animation_unknown_effect(client):
+    pytest.importorskip("numpy")
+    resp = client.post("/start_animation", json={"effect": "fireworks"})
+    assert json.loads(resp.data)["success"] is False
+
+
+def test_convert_media_and_play_clip(client, monkeypatch, tmp_path):
+    np = pytest.importorskip("numpy")
+    import io
+    import animation
+    import app as app_mod
+    import converter
+    from config import NUM_PCBS
+
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(tmp_path / "clips"))
+    monkeypatch.setattr(converter, "Image", None)
+    pixels = np.full((40, 60), 255, dtype=np.uint8)
+    image = b"P5 60 40 255\n" + pixels.tobytes()
+    resp = client.post(
+        "/convert_media",
+        data={"name": "white", "file": (io.BytesIO(image), "white.pgm")},
+        content_type="multipart/form-data",
+    )
+    data = json.loads(resp.data)
+    assert data["success"] is True
+    assert data["kind"] == "preset"
+    assert "white" in data["presets"]
+
+    animation.save_clip("blink", animation.Animation([([1] * NUM_PCBS, 0.01)] * 2))
+    resp = client.post("/start_animation", json={"clip": "blink", "loop": False})
+    assert json.loads(resp.data)["success"] is True
+    app_mod.player._thread.join(timeout=2)
+    resp = client.post("/start_animation", json={"clip": "gone"})
+    assert json.loads(resp.data)["success"] is False
+
+
+def test_clip_routes_reject_unsafe_names(client, monkeypatch, tmp_path):
+    import io
+    import animation
+
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(tmp_path / "clips"))
+    resp = client.post(
+        "/convert_media",
+        data={"name": "../../x", "file": (io.BytesIO(b"P5 1 1 255\n\x00"), "x.pgm")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+    assert "Invalid clip name" in json.loads(resp.data)["error"]
+    resp = client.post("/start_animation", json={"clip": "../x"})
+    assert "Invalid clip name" in json.loads(resp.data)["error"]
+    items = [{"type": "animation", "clip": "../x"}]
+    resp = client.post("/start_playlist", json={"items": items})
+    assert resp.status_code == 400
+    assert list(tmp_path.rglob("*.sgc")) == []
+    assert list(tmp_path.rglob("*.seg")) == []
+
+
+def test_convert_media_requires_file(client):
+    resp = client.post("/convert_media", data={"name": "x"})
+    assert json.loads(resp.data)["success"] is False
+
+
+def test_start_animation_from_presets(client, monkeypatch):
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod.player, "clock", lambda: 0.0)
+    client.post("/toggle_segment", data={"pcb": "0", "segment": "0"})
+    client.post("/save_preset", data={"name": "a"})
+    resp = client.post(
+        "/start_animation",
+        json={"presets": ["a", "a"], "duration": 0.01, "loop": False},
+    )
+    assert json.loads(resp.data)["success"] is True
+    app_mod.player._thread.join(timeout=2)
+    assert app_mod.player.stats()["frames_shown"] == 2
+
+
+def test_start_animation_missing_preset(client):
+    resp = client.post("/start_animation", json={"presets": ["ghost"]})
+    data = json.loads(resp.data)
+    assert data["success"] is False
+
+
+def test_animation_speed_and_status(client):
+    import app as app_mod
+
+    resp = client.post("/animation_speed", data={"speed": "2"})
+    assert json.loads(resp.data)["success"] is True
+    resp = client.get("/animation_status")
+    data = json.loads(resp.data)
+    assert data["speed"] == 2.0
+    assert "frames_late" in data and "frames_dropped" in data
+    app_mod.player.set_speed(1)
+
+
+def test_animation_speed_invalid(client):
+    resp = client.post("/animation_speed", data={"speed": "0"})
+    assert json.loads(resp.data)["success"] is False
+
+
+# ── GET /display_stats ────────────────────────────────────────────────
+
+
+def test_display_stats(client):
+    client.post("/toggle_segment", data={"pcb": "0", "segment": "1"})
+    resp = client.get("/display_stats")
+    data = json.loads(resp.data)
+    assert data["success"] is True
+    assert data["frames_requested"] >= data["frames_written"]
+
+
+# ── Grayscale ─────────────────────────────────────────────────────────
+
+
+def test_grayscale_start_status_stop(client):
+    import app as app_mod
+    from hardware import default_wall
+
+    resp = client.post("/start_grayscale", json={"level": 3, "bits": 2})
+    assert json.loads(resp.data)["success"] is True
+    try:
+        assert default_wall.writer.paused
+        data = json.loads(client.get("/grayscale_status").data)
+        assert data["running"] is True
+        assert data["levels"] == 4
+        assert len(data["report"]) == 8
+    finally:
+        resp = client.post("/stop_grayscale")
+    assert json.loads(resp.data)["success"] is True
+    assert not default_wall.writer.paused
+    assert "main" not in app_mod.grayscale_renderers
+    data = json.loads(client.get("/grayscale_status").data)
+    assert data["running"] is False
+
+
+DRAWING_REQUESTS = [
+    ("/toggle_segment", {"data": {"pcb": "0", "segment": "0"}}),
+    ("/batch_update", {"json": {"ops": [{"op": "set", "pcb": 0, "segment": 0}]}}),
+    ("/show_text", {"data": {"text": "8"}}),
+    ("/clear_all", {}),
+    ("/stop_animation", {}),
+    ("/start_animation", {"json": {"loop": False}}),
+    ("/start_ticker", {"data": {"text": "1", "cps": "500"}}),
+]
+
+
+@pytest.mark.parametrize("url, kwargs", DRAWING_REQUESTS)
+def test_drawing_requests_stop_grayscale(client, url, kwargs):
+    import app as app_mod
+    from hardware import default_wall
+
+    client.post("/start_grayscale", json={"level": 3, "bits": 2})
+    assert default_wall.writer.paused
+    resp = client.post(url, **kwargs)
+    assert json.loads(resp.data)["success"] is True
+    assert "main" not in app_mod.grayscale_renderers
+    assert not default_wall.writer.paused
+
+
+@pytest.mark.parametrize("url, kwargs", DRAWING_REQUESTS)
+def test_drawing_requests_stop_recording_playback(
+    client, monkeypatch, tmp_path, url, kwargs
+):
+    import app as app_mod
+    import recording
+    from hardware import default_wall
+
+    monkeypatch.setattr(recording, "RECORDINGS_DIR", str(tmp_path))
+    num_pcbs = default_wall.num_pcbs
+    frames = [([i + 1] * num_pcbs, 0.5) for i in range(2)]
+    recording.write_recording(recording.recording_path("loop"), frames, num_pcbs)
+    client.post("/play_recording", data={"name": "loop", "loop": "1"})
+    assert app_mod.recording_players["main"].running
+    resp = client.post(url, **kwargs)
+    assert json.loads(resp.data)["success"] is True
+    assert not app_mod.recording_players["main"].running
+    assert not default_wall.writer.paused
+
+
+def test_load_preset_closes_live_ticker(client):
+    import app as app_mod
+
+    client.post("/save_preset", data={"name": "still"})
+    client.post("/start_ticker", data={"text": "1", "live": "1"})
+    feed = app_mod.ticker_feeds["main"]
+    resp = client.post("/load_preset", data={"name": "still"})
+    assert json.loads(resp.data)["success"] is True
+    assert feed.closed
+    assert "main" not in app_mod.ticker_feeds
+    assert not app_mod.player.running
+
+
+def test_grayscale_rejects_bad_levels(client):
+    resp = client.post("/start_grayscale", json={"levels": [[1, 2]]})
+    data = json.loads(resp.data)
+    assert data["success"] is False
+    client.post("/stop_grayscale")
+
+
+# ── GET /stream ───────────────────────────────────────────────────────
+
+
+def test_toggle_segment_returns_state(client):
+    resp = client.post("/toggle_segment", data={"pcb": "3", "segment": "2"})
+    assert json.loads(resp.data)["state"] == 1
+    resp = client.post("/toggle_segment", data={"pcb": "3", "segment": "2"})
+    assert json.loads(resp.data)["state"] == 0
+
+
+def test_writes_return_frame_version(client):
+    from hardware import default_wall
+
+    first = json.loads(
+        client.post("/toggle_segment", data={"pcb": "1", "segment": "1"}).data
+    )["version"]
+    assert first == default_wall.frame_version
+    second = json.loads(client.post("/clear_all").data)["version"]
+    assert second == first + 1
+    client.post("/toggle_segment", data={"pcb": "1", "segment": "1"})
+    client.post("/save_preset", data={"name": "versioned"})
+    client.post("/clear_all")
+    data = json.loads(client.post("/load_preset", data={"name": "versioned"}).data)
+    assert data["version"] == default_wall.frame_version
+
+
+def test_stream_pushes_frames_as_hex(client):
+    from config import NUM_PCBS
+
+    client.post("/clear_all")
+    resp = client.get("/stream")
+    assert resp.mimetype == "text/event-stream"
+    events = iter(resp.response)
+
+    first = next(events).decode()
+    data = first.split("data: ")[1].strip()
+    assert data == "000000" * NUM_PCBS
+
+    client.post("/toggle_segment", data={"pcb": "1", "segment": "0"})
+    second = next(events).decode()
+    data = second.split("data: ")[1].strip()
+    assert data[6:12] == "000001"
+    resp.close()
+
+
+def test_stream_keepalive_when_idle(client, monkeypatch):
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod, "STREAM_KEEPALIVE", 0.01)
+    resp = client.get("/stream")
+    events = iter(resp.response)
+    next(events)
+    assert next(events) == b": keepalive\n\n"
+    resp.close()
+
+
+def test_stream_limit_stays_below_workers_but_above_zero():
+    import app as app_mod
+
+    assert app_mod._stream_limit(8, 16) == 8
+    assert app_mod._stream_limit(8, 4) == 3
+    assert app_mod._stream_limit(8, 1) == 1
+
+
+def test_stream_rejects_viewers_over_the_limit(client, monkeypatch):
+    import threading
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod, "stream_slots", threading.BoundedSemaphore(1))
+    first = client.get("/stream")
+    assert first.status_code == 200
+    resp = client.get("/stream")
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"]
+    first.close()
+    again = client.get("/stream")
+    assert again.status_code == 200
+    again.close()
+
+
+# ── POST /batch_update ────────────────────────────────────────────────
+
+
+def test_batch_update(client):
+    from hardware import segment_grid
+
+    ops = [
+        {"op": "set", "pcb": 0, "segment": 3},
+        {"op": "toggle", "pcb": 5, "segment": 20},
+    ]
+    resp = client.post("/batch_update", json={"ops": ops})
+    data = json.loads(resp.data)
+    assert data["success"] is True
+    assert isinstance(data["version"], int)
+    assert segment_grid[0][3] == 1
+    assert segment_grid[5][20] == 1
+
+
+def test_batch_update_invalid_op(client):
+    resp = client.post("/batch_update", json={"ops": [{"op": "set", "pcb": 0}]})
+    data = json.loads(resp.data)
+    assert data["success"] is False
+    assert "error" in data
+
+
+def test_batch_update_requires_list(client):
+    resp = client.post("/batch_update", data={"ops": "nope"})
+    data = json.loads(resp.data)
+    assert data["success"] is False
+
+
+# ── POST /show_text ───────────────────────────────────────────────────
+
+
+def test_show_text(client):
+    from hardware import segment_grid
+    from glyphs import POSITIONS, GLYPHS
+
+    resp = client.post("/show_text", data={"text": "42", "position": "0"})
+    data = json.loads(resp.data)
+    assert data["success"] is True
+    chain, shift = POSITIONS[0]
+    assert (segment_grid.words[chain] >> shift) & 0xFF == GLYPHS["4"]
+
+
+def test_show_text_overlay(client):
+    from hardware import segment_grid
+
+    client.post("/toggle_segment", data={"pcb": "14", "segment": "23"})
+    client.post("/show_text", data={"text": "1", "overlay": "1"})
+    assert segment_grid[14][23] == 1
+    client.post("/show_text", data={"text": "1"})
+    assert segment_grid[14][23] == 0
+
+
+def test_show_text_bad_position(client):
+    resp = client.post("/show_text", data={"text": "1", "position": "x"})
+    assert json.loads(resp.data)["success"] is False
+
+
+# ── Ticker routes ─────────────────────────────────────────────────────
+
+
+def test_start_ticker_and_append(client):
+    import app as app_mod
+
+    resp = client.post("/start_ticker", data={"text": "HI", "cps": "200", "live": "1"})
+    assert json.loads(resp.data)["success"] is True
+    assert app_mod.player.running
+    resp = client.post("/ticker_append", data={"text": "there"})
+    assert json.loads(resp.data)["success"] is True
+    client.post("/stop_animation")
+    assert not app_mod.player.running
+    resp = client.post("/ticker_append", data={"text": "late"})
+    assert json.loads(resp.data)["success"] is False
+
+
+def test_ticker_append_rejects_text_past_the_cap(client, monkeypatch):
+    import app as app_mod
+    import ticker
+
+    monkeypatch.setattr(app_mod, "TickerFeed", lambda text: ticker.TickerFeed(text, 8))
+    client.post("/start_ticker", data={"text": "", "cps": "1", "live": "1"})
+    resp = client.post("/ticker_append", data={"text": "1234"})
+    assert json.loads(resp.data)["success"] is True
+    resp = client.post("/ticker_append", data={"text": "123456789"})
+    assert resp.status_code == 429
+    assert json.loads(resp.data)["error"] == "Ticker queue is full"
+
+
+def test_start_ticker_finishes(client, monkeypatch):
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod.player, "clock", lambda: 0.0)
+    client.post("/start_ticker", data={"text": "1", "cps": "500", "width": "2"})
+    app_mod.player._thread.join(timeout=2)
+    assert app_mod.player.stats()["frames_shown"] == 3
+
+
+def test_start_ticker_from_file(client, monkeypatch, tmp_path):
+    import app as app_mod
+    import ticker
+
+    monkeypatch.setattr(ticker, "TICKER_SOURCES_DIR", str(tmp_path))
+    (tmp_path / "feed.txt").write_text("42\n")
+    resp = client.post("/start_ticker", data={"path": "feed.txt", "cps": "500"})
+    assert json.loads(resp.data)["success"] is True
+    app_mod.player._thread.join(timeout=2)
+    assert not app_mod.player.running
+
+
+@pytest.mark.parametrize("path", ["/dev/zero", "../outside.txt", "."])
+def test_start_ticker_rejects_paths_outside_sources(
+    client, monkeypatch, tmp_path, path
+):
+    import app as app_mod
+    import ticker
+
+    sources = tmp_path / "sources"
+    sources.mkdir()
+    (tmp_path / "outside.txt").write_text("secret\n")
+    monkeypatch.setattr(ticker, "TICKER_SOURCES_DIR", str(sources))
+    resp = client.post("/start_ticker", data={"path": path})
+    data = json.loads(resp.data)
+    assert data["success"] is False
+    assert str(sources) in data["error"]
+    assert not app_mod.player.running
+
+
+def test_start_ticker_bad_params(client):
+    resp = client.post("/start_ticker", data={"text": "x", "cps": "0"})
+    assert json.loads(resp.data)["success"] is False
+
+
+# ── Walls ─────────────────────────────────────────────────────────────
+
+
+def test_list_walls(client):
+    from hardware import default_wall
+
+    data = json.loads(client.get("/walls").data)
+    assert data["success"] is True
+    assert data["default"] == default_wall.name
+    assert {"name": default_wall.name, "num_pcbs": 15} in [
+        {k: w[k] for k in ("name", "num_pcbs")} for w in data["walls"]
+    ]
+
+
+def test_route_selects_wall_by_name(client):
+    from hardware import default_wall, segment_grid
+
+    client.post(
+        "/toggle_segment", data={"pcb": "1", "segment": "2", "wall": default_wall.name}
+    )
+    assert segment_grid[1][2] == 1
+
+
+def test_unknown_wall_rejected(client):
+    resp = client.post(
+        "/toggle_segment", data={"pcb": "0", "segment": "0", "wall": "nope"}
+    )
+    assert resp.status_code == 404
+    assert json.loads(resp.data)["success"] is False
+    resp = client.post("/start_animation", json={"wall": "nope"})
+    assert resp.status_code == 404
+
+
+@pytest.mark.parametrize("body", [[1], "main", 3])
+def test_non_object_json_body_uses_default_wall(client, body):
+    resp = client.post("/clear_all", json=body)
+    assert resp.status_code == 200
+    assert json.loads(resp.data)["success"] is True
+
+
+@pytest.mark.parametrize(
+    "url", ["/start_animation", "/batch_update", "/start_playlist", "/load_preset"]
+)
+def test_routes_survive_non_object_json(client, url):
+    resp = client.post(url, json=[1])
+    assert resp.status_code < 500
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"json": {"transition": "dissolve"}}])
+def test_load_preset_requires_name(client, kwargs):
+    resp = client.post("/load_preset", **kwargs)
+    assert resp.status_code == 400
+    assert json.loads(resp.data)["error"] == "Preset name is required"
+
+
+def test_index_renders_layout(client):
+    from config import NUM_PCBS
+
+    html = client.get("/").data.decode()
+    assert html.count('class="pcb-container"') == NUM_PCBS
+    assert "repeat(3, 1fr)" in html
+
+
+def _chain_indices_by_label(html):
+    """Map each PCB title in the rendered page to the data-pcb values under it"""
+    found = {}
+    for block in html.split('<div class="pcb-title">PCB ')[1:]:
+        label, _, rest = block.partition("<")
+        found[int(label)] = set(re.findall(r'data-pcb="(\d+)"', rest))
+    return found
+
+
+def test_index_addresses_segments_by_chain_position(client):
+    found = _chain_indices_by_label(client.get("/").data.decode())
+    assert found[1] == {"0"}
+    assert found[6] == {"1"}
+    assert found[2] == {"3"}
+
+
+def test_index_renders_non_identity_layout(client):
+    from flask import render_template
+    from app import app
+    from config import SCRIPT_DIR
+    from layout import load_layout
+
+    layout = load_layout(f"{SCRIPT_DIR}/layouts/10x6-serpentine.json")
+    with app.test_request_context("/"):
+        html = render_template("index.html", presets=[], layout=layout, wall="big")
+    found = _chain_indices_by_label(html)
+    assert len(found) == 60
+    assert [found[label] for label in range(11, 21)] == [
+        {str(chain)} for chain in range(19, 9, -1)
+    ]
+    assert found[10] == {"9"} and found[21] == {"20"}
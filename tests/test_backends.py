@@ -0,0 +1,177 @@
+"""Tests for backends.py — frame encoding and the output backends."""
+
+import pytest
+import backends as backends_mod
+from backends import (
+    BitBangBackend,
+    FakeBackend,
+    SharedClockGroup,
+    SpiBackend,
+    create_backend,
+    decode_frame,
+    encode_frame,
+    shift_needed,
+)
+
+
+class FakeSpiDev:
+    def __init__(self):
+        self.transfers = []
+        self.closed = False
+
+    def writebytes2(self, data):
+        self.transfers.append(bytes(data))
+
+    def close(self):
+        self.closed = True
+
+
+# ── encode_frame / decode_frame ───────────────────────────────────────
+
+
+def test_encode_frame_length():
+    assert len(encode_frame([0] * 15)) == 60
+
+
+def test_encode_frame_matches_bitbang_order():
+    # PCB 0 is shifted last, low byte first as a 16-bit word
+    frame = encode_frame([0xABCDEF, 0, 0])
+    assert frame[-4:] == bytes([0x00, 0xEF, 0xAB, 0xCD])
+    assert frame[:8] == bytes(8)
+
+
+def test_decode_roundtrip():
+    words = [0x000001, 0xFFFFFF, 0x123456, 0x800000]
+    assert decode_frame(encode_frame(words)) == words
+
+
+# ── BitBangBackend ────────────────────────────────────────────────────
+
+
+def test_bitbang_shifts_every_bit_then_latches():
+    gpio = backends_mod.GPIO
+    gpio.output.reset_mock()
+    BitBangBackend().write_frame(encode_frame([0] * 15))
+    # 30 shifts x 16 bits x 3 calls, plus 2 calls to latch
+    assert gpio.output.call_count == 30 * 48 + 2
+
+
+# ── SpiBackend ────────────────────────────────────────────────────────
+
+
+def test_spi_single_bulk_transfer():
+    spi = FakeSpiDev()
+    backend = SpiBackend(spi=spi)
+    backend.setup()
+    frame = encode_frame(list(range(15)))
+    backend.write_frame(frame)
+    assert spi.transfers == [frame]
+    assert spi.mode == 0
+
+
+def test_spi_setup_without_spidev(monkeypatch):
+    monkeypatch.setattr(backends_mod, "spidev", None)
+    with pytest.raises(RuntimeError):
+        SpiBackend().setup()
+
+
+def test_spi_close():
+    spi = FakeSpiDev()
+    backend = SpiBackend(spi=spi)
+    backend.close()
+    assert spi.closed is True
+    assert backend.spi is None
+
+
+# ── SharedClockGroup ──────────────────────────────────────────────────
+
+
+def test_shared_clock_group_shifts_chains_in_lockstep(monkeypatch):
+    monkeypatch.setattr(backends_mod, "clock_delay", lambda s: None)
+    gpio = backends_mod.GPIO
+    group = SharedClockGroup(clock_pin=11, le_pin=5)
+    short = group.add_member(sdi_pin=20, num_pcbs=1)
+    long = group.add_member(sdi_pin=21, num_pcbs=2)
+    long.write_frame(encode_frame([0, 0]))
+    gpio.output.reset_mock()
+    short.write_frame(encode_frame([0xFFFFFF]))
+
+    calls = [c.args for c in gpio.output.call_args_list]
+    clocks = [c for c in calls if c == (11, gpio.HIGH)]
+    latches = [c for c in calls if c[0] == 5]
+    # One clock per bit of the longest chain, one latch for the whole group
+    assert len(clocks) == 8 * 8
+    assert len(latches) == 2
+    short_bits = [c[1] for c in calls if c[0] == 20]
+    # The shorter chain is padded at the front so its data lands last
+    frame = encode_frame([0xFFFFFF])
+    expected = [(byte >> bit) & 1 for byte in frame for bit in range(7, -1, -1)]
+    assert short_bits == [0] * 32 + expected
+    assert all(c[1] == 0 for c in calls if c[0] == 21)
+
+
+def test_shared_clock_group_setup_once():
+    gpio = backends_mod.GPIO
+    group = SharedClockGroup(clock_pin=11, le_pin=5)
+    first = group.add_member(20, 1)
+    second = group.add_member(21, 1)
+    gpio.setup.reset_mock()
+    first.setup()
+    second.setup()
+    assert gpio.setup.call_count == 4
+
+
+# ── FakeBackend / create_backend ──────────────────────────────────────
+
+
+# ── shift_needed ──────────────────────────────────────────────────────
+
+
+def test_shift_needed_unknown_contents_is_full_frame():
+    frame = encode_frame([1, 2, 3])
+    assert shift_needed(None, frame) == 3
+    assert shift_needed(encode_frame([1, 2]), frame) == 3
+
+
+def test_shift_needed_same_frame_is_zero():
+    frame = encode_frame([1, 2, 3])
+    assert shift_needed(frame, frame) == 0
+
+
+def test_shift_needed_content_moving_down_the_chain():
+    held = encode_frame([1, 2, 3, 4])
+    assert shift_needed(held, encode_frame([9, 1, 2, 3])) == 1
+    assert shift_needed(held, encode_frame([8, 9, 1, 2])) == 2
+
+
+def test_shift_needed_change_nearest_pi_needs_matching_shifted_contents():
+    # Shifting moves everything along, so a change at PCB 0 only saves
+    # work when the old contents moved one place equal the new ones
+    assert shift_needed(encode_frame([1, 2, 3]), encode_frame([5, 2, 3])) == 3
+    assert shift_needed(encode_frame([0, 0, 0]), encode_frame([5, 0, 0])) == 1
+
+
+def test_spi_empty_frame_only_latches():
+    spi = FakeSpiDev()
+    backend = SpiBackend(spi=spi)
+    backend.write_frame(b"")
+    assert spi.transfers == []
+
+
+def test_fake_backend_records_frames():
+    fake = FakeBackend()
+    assert fake.last_words is None
+    fake.write_frame(encode_frame([5, 6, 7]))
+    assert len(fake.frames) == 1
+    assert fake.last_words == [5, 6, 7]
+
+
+def test_create_backend_by_name():
+    assert isinstance(create_backend("bitbang"), BitBangBackend)
+    assert isinstance(create_backend("spi"), SpiBackend)
+    assert isinstance(create_backend("fake"), FakeBackend)
+
+
+def test_create_backend_unknown():
+    with pytest.raises(ValueError):
+        create_backend("parallel-port")
@@ -0,0 +1,90 @@
+"""Tests for bench.py — fake GPIO, statistics and result comparison."""
+
+import json
+import pytest
+import bench
+
+
+def test_summarize_percentiles():
+    stats = bench.summarize([0.001 * i for i in range(1, 101)])
+    assert stats["count"] == 100
+    assert round(stats["min_us"]) == 1000
+    assert round(stats["p50_us"]) == 51000
+    assert round(stats["max_us"]) == 100000
+
+
+def test_summarize_empty():
+    assert bench.summarize([]) == {"count": 0}
+
+
+def test_fake_gpio_is_restored():
+    saved = bench.backends.GPIO
+    with bench.fake_gpio() as gpio:
+        assert bench.backends.GPIO is gpio
+    assert bench.backends.GPIO is saved
+
+
+def test_shift_counts_gpio_calls():
+    result = bench.bench_shift(2)
+    # 30 shifts x 16 bits x 3 calls, plus 2 calls to latch
+    assert result["gpio_calls_per_frame"] == 30 * 48 + 2
+    assert result["sleeps_per_frame"] == 30 * 16 + 1
+
+
+def test_partial_refresh_comparison():
+    result = bench.bench_partial(4)
+    assert result["scroll"]["off"]["pcbs_per_frame"] == 15
+    assert result["scroll"]["on"]["pcbs_per_frame"] < 15
+    assert (
+        result["scroll"]["on"]["gpio_calls_per_frame"]
+        < result["scroll"]["off"]["gpio_calls_per_frame"]
+    )
+
+
+def test_convert_reports_throughput():
+    pytest.importorskip("numpy")
+    result = bench.bench_convert(5)
+    assert result["frames"] == 5
+    assert result["frames_per_second"] > 0
+
+
+def test_load_ramps_clients():
+    result = bench.bench_load(
+        [1, 2], 3, threads=2, backlog=4, viewers=1, max_p95_ms=1000
+    )
+    assert set(result["levels"]) == {"1", "2"}
+    assert result["levels"]["2"]["count"] == 6
+    assert result["levels"]["2"]["errors"] == 0
+    assert result["max_clients"] == 2
+
+
+def test_compare_reports_changes():
+    old = {"results": {"a": {"mean_us": 10.0, "count": 5}, "gone": 1}}
+    new = {"results": {"a": {"mean_us": 15.0, "count": 5}, "extra": 2}}
+    assert bench.compare(old, new) == [
+        ("a.count", 5, 5, 0.0),
+        ("a.mean_us", 10.0, 15.0, 50.0),
+    ]
+
+
+def test_main_writes_json(tmp_path):
+    out = tmp_path / "results.json"
+    bench.main(["--only", "encode", "--only", "endpoints", "--iterations", "2",
+                "--clients", "2", "--requests", "2", "--output", str(out)])  # fmt: skip
+    document = json.loads(out.read_text())
+    assert document["version"] == bench.RESULTS_VERSION
+    assert set(document["results"]) == {"encode", "endpoints"}
+    assert document["results"]["endpoints"]["toggle_segment"]["count"] == 4
+    assert document["results"]["endpoints"]["get_grid_state"]["requests_per_s"] > 0
+
+
+def test_fake_gpio_leaves_time_sleep_alone():
+    import time
+    import backends
+
+    real_sleep = time.sleep
+    with bench.fake_gpio() as gpio:
+        assert time.sleep is real_sleep
+        backends.clock_delay(0.5)
+        assert gpio.sleeps == 1
+    assert backends.clock_delay is real_sleep
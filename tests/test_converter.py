@@ -0,0 +1,135 @@
+"""Tests for converter.py — segment sampling masks and image conversion."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import converter  # noqa: E402
+from config import LAYOUT, NUM_PCBS  # noqa: E402
+from layout import Layout  # noqa: E402
+
+
+@pytest.fixture
+def sampler():
+    return converter.sampler_for(LAYOUT)
+
+
+def _pgm(image):
+    pixels = (np.asarray(image) * 255).astype(np.uint8)
+    height, width = pixels.shape
+    return b"P5\n# test\n%d %d\n255\n" % (width, height) + pixels.tobytes()
+
+
+# ── Sampling masks ────────────────────────────────────────────────────
+
+
+def test_masks_cover_every_segment(sampler):
+    assert len(sampler.counts) == LAYOUT.num_positions * 8
+    assert sampler.counts.min() > 0
+    # Segment outlines never overlap, so no pixel belongs to two segments
+    assert len(np.unique(sampler.pixels)) == len(sampler.pixels)
+    assert sampler.width == 9 * 30 and sampler.height == 5 * 50
+
+
+def test_tiny_scale_still_samples_every_segment():
+    small = converter.SegmentSampler(Layout(rows=1, columns=1), scale=0.05)
+    assert small.counts.min() > 0
+
+
+def test_sampler_is_cached():
+    assert converter.sampler_for(LAYOUT) is converter.sampler_for(LAYOUT)
+
+
+def test_render_and_convert_roundtrip(sampler):
+    words = [int(w) for w in np.random.default_rng(4).integers(0, 1 << 24, NUM_PCBS)]
+    image = sampler.render(words)
+    assert sampler.convert(image[None])[0].tolist() == words
+    assert sampler.convert(1 - image[None], invert=True)[0].tolist() == words
+
+
+def test_pixels_land_on_the_segment_drawn_there(sampler):
+    # Light only the top-left display's pixels: reading position 0
+    image = np.zeros((sampler.height, sampler.width))
+    image[:50, :30] = 1
+    words = sampler.convert(image[None])[0]
+    index, _ = LAYOUT.locate(0, 0)
+    expected = sum(1 << LAYOUT.locate(0, s)[1] for s in range(8))
+    assert words[index] == expected
+    assert sum(int(w).bit_count() for w in words) == 8
+
+
+# ── Resizing ──────────────────────────────────────────────────────────
+
+
+def test_fit_frames_modes():
+    frames = np.ones((2, 10, 40))
+    contain = converter.fit_frames(frames, 20, 20, "contain")
+    assert contain.shape == (2, 20, 20)
+    # A wide image is letterboxed: black above and below
+    assert contain[0, 0].sum() == 0 and contain[0, 10].sum() == 20
+    assert converter.fit_frames(frames, 20, 20, "cover").min() == 1
+    assert converter.fit_frames(frames, 20, 20, "stretch").min() == 1
+    with pytest.raises(ValueError):
+        converter.fit_frames(frames, 20, 20, "tile")
+
+
+# ── Reading and converting files ──────────────────────────────────────
+
+
+def test_read_netpbm_gray_and_color():
+    image = np.array([[0.0, 1.0], [1.0, 0.0]])
+    assert (converter.read_netpbm(_pgm(image)) == image).all()
+    ppm = b"P6 1 1 255\n" + bytes([255, 255, 255])
+    assert converter.read_netpbm(ppm)[0, 0] == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        converter.read_netpbm(b"P3 1 1 255\n1 1 1")
+
+
+def test_read_frames_from_directory(tmp_path, monkeypatch, sampler):
+    monkeypatch.setattr(converter, "Image", None)
+    for i in range(3):
+        words = [0] * NUM_PCBS
+        words[i] = 0xFF
+        (tmp_path / f"frame_{i}.pgm").write_bytes(_pgm(sampler.render(words)))
+    frames = converter.read_frames(str(tmp_path), frame_duration=0.04)
+    assert [d for _, d in frames] == [0.04] * 3
+    anim = converter.convert(frames)
+    assert len(anim) == 3
+    assert [list(words)[:3] for words, _ in anim] == [
+        [0xFF, 0, 0],
+        [0, 0xFF, 0],
+        [0, 0, 0xFF],
+    ]
+
+
+def test_convert_merges_repeated_frames(sampler):
+    blank = np.zeros((sampler.height, sampler.width))
+    lit = np.ones((sampler.height, sampler.width))
+    anim = converter.convert([(blank, 0.1), (blank, 0.1), (lit, 0.1)])
+    assert [d for _, d in anim] == [pytest.approx(0.2), 0.1]
+    with pytest.raises(ValueError):
+        converter.convert([])
+
+
+def test_convert_batches_a_long_clip_quickly():
+    import time
+
+    rng = np.random.default_rng(0)
+    frames = [(rng.random((120, 160)), 0.04) for _ in range(200)]
+    start = time.perf_counter()
+    anim = converter.convert(frames)
+    assert time.perf_counter() - start < 5
+    assert sum(d for _, d in anim) == pytest.approx(8.0)
+
+
+def test_convert_to_library(tmp_path, monkeypatch):
+    import animation
+    import presets
+
+    monkeypatch.setattr(animation, "CLIPS_DIR", str(tmp_path))
+    monkeypatch.setattr(presets, "PRESETS_DIR", str(tmp_path))
+    still = converter.convert([(np.ones((10, 10)), 1.0)])
+    assert converter.convert_to_library(still, "logo") == ("preset", True)
+    clip = converter.convert([(np.ones((10, 10)), 0.1), (np.zeros((10, 10)), 0.1)])
+    assert converter.convert_to_library(clip, "blink") == ("clip", True)
+    assert animation.get_all_clips() == ["blink"]
@@ -0,0 +1,218 @@
+"""Tests for display.py — the display writer thread and frame handoff."""
+
+import threading
+import time
+import pytest
+from display import DisplayWriter
+
+
+class BlockingWrite:
+    """Write function that records frames and can be held mid-write."""
+
+    def __init__(self):
+        self.frames = []
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def __call__(self, frame):
+        self.entered.set()
+        self.release.wait(2)
+        self.frames.append(frame)
+
+
+@pytest.fixture
+def write():
+    return BlockingWrite()
+
+
+@pytest.fixture
+def writer(write):
+    w = DisplayWriter(write, min_interval=0)
+    yield w
+    write.release.set()
+    w.stop(timeout=2)
+
+
+# ── Handoff ───────────────────────────────────────────────────────────
+
+
+def test_submit_is_written_by_writer_thread(writer, write):
+    writer.submit(b"\x01")
+    assert writer.flush(timeout=2)
+    assert write.frames == [b"\x01"]
+
+
+def test_submit_does_not_block_on_slow_write(writer, write):
+    write.release.clear()
+    writer.submit(b"\x01")
+    assert write.entered.wait(2)
+    start = time.monotonic()
+    writer.submit(b"\x02")
+    assert time.monotonic() - start < 0.5
+    write.release.set()
+    writer.flush(timeout=2)
+    assert write.frames == [b"\x01", b"\x02"]
+
+
+def test_latest_frame_wins(writer, write):
+    write.release.clear()
+    writer.submit(b"\x01")
+    assert write.entered.wait(2)
+    writer.submit(b"\x02")
+    writer.submit(b"\x03")
+    writer.submit(b"\x04")
+    write.release.set()
+    writer.flush(timeout=2)
+    assert write.frames == [b"\x01", b"\x04"]
+    assert writer.frames_coalesced == 2
+
+
+def test_never_written_from_two_threads_at_once():
+    active = []
+    overlaps = []
+
+    def write(frame):
+        active.append(frame)
+        if len(active) > 1:
+            overlaps.append(frame)
+        time.sleep(0.001)
+        active.remove(frame)
+
+    w = DisplayWriter(write, min_interval=0)
+
+    def spam(n):
+        for i in range(50):
+            w.submit(bytes([n, i]))
+
+    threads = [threading.Thread(target=spam, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    w.flush(timeout=2)
+    w.stop(timeout=2)
+    assert overlaps == []
+    assert w.frames_requested == 400
+
+
+# ── Dirty-frame detection ─────────────────────────────────────────────
+
+
+def test_unchanged_frame_skipped(writer, write):
+    writer.submit(b"\x01")
+    writer.flush(timeout=2)
+    writer.submit(b"\x01")
+    writer.flush(timeout=2)
+    assert write.frames == [b"\x01"]
+    assert writer.frames_unchanged == 1
+
+
+def test_invalidate_forces_rewrite(writer, write):
+    writer.submit(b"\x01")
+    writer.flush(timeout=2)
+    writer.invalidate()
+    writer.submit(b"\x01")
+    writer.flush(timeout=2)
+    assert write.frames == [b"\x01", b"\x01"]
+
+
+# ── Pause / resume ────────────────────────────────────────────────────
+
+
+def test_pause_holds_frames_until_resume(writer, write):
+    writer.submit(b"\x01")
+    assert writer.flush(timeout=2)
+    assert writer.pause(timeout=2)
+    writer.submit(b"\x02")
+    writer.submit(b"\x03")
+    assert writer.flush(timeout=2)
+    time.sleep(0.02)
+    assert write.frames == [b"\x01"]
+    writer.resume()
+    assert writer.flush(timeout=2)
+    assert write.frames == [b"\x01", b"\x03"]
+
+
+def test_resume_rewrites_last_frame(writer, write):
+    writer.submit(b"\x01")
+    assert writer.flush(timeout=2)
+    writer.pause()
+    writer.submit(b"\x01")
+    writer.resume()
+    assert writer.flush(timeout=2)
+    assert write.frames == [b"\x01", b"\x01"]
+
+
+def test_pause_waits_for_write_in_progress(writer, write):
+    write.release.clear()
+    writer.submit(b"\x01")
+    assert write.entered.wait(2)
+    assert writer.pause(timeout=0.05) is False
+    write.release.set()
+    assert writer.pause(timeout=2) is True
+    assert write.frames == [b"\x01"]
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────
+
+
+def test_min_interval_between_latches():
+    times = []
+    w = DisplayWriter(lambda frame: times.append(time.monotonic()), min_interval=0.05)
+    w.submit(b"\x01")
+    w.flush(timeout=2)
+    w.submit(b"\x02")
+    w.flush(timeout=2)
+    w.stop(timeout=2)
+    assert len(times) == 2
+    assert times[1] - times[0] >= 0.045
+
+
+def test_burst_within_interval_coalesced():
+    frames = []
+    w = DisplayWriter(frames.append, min_interval=0.05)
+    w.submit(b"\x01")
+    w.flush(timeout=2)
+    for i in range(2, 10):
+        w.submit(bytes([i]))
+    w.flush(timeout=2)
+    w.stop(timeout=2)
+    assert frames == [b"\x01", b"\x09"]
+
+
+# ── Counters / errors ─────────────────────────────────────────────────
+
+
+def test_stats(writer, write):
+    write.release.clear()
+    writer.submit(b"\x01")
+    assert write.entered.wait(2)
+    writer.submit(b"\x02")
+    writer.submit(b"\x03")
+    write.release.set()
+    writer.flush(timeout=2)
+    assert writer.stats() == {
+        "frames_requested": 3,
+        "frames_written": 2,
+        "frames_unchanged": 0,
+        "frames_coalesced": 1,
+    }
+
+
+def test_write_error_does_not_kill_thread():
+    frames = []
+
+    def write(frame):
+        if frame == b"\x00":
+            raise OSError("bus error")
+        frames.append(frame)
+
+    w = DisplayWriter(write, min_interval=0)
+    w.submit(b"\x00")
+    w.flush(timeout=2)
+    w.submit(b"\x01")
+    w.flush(timeout=2)
+    w.stop(timeout=2)
+    assert frames == [b"\x01"]
+    assert w.frames_written == 1
@@ -0,0 +1,111 @@
+"""Tests for effects.py — the segment field and vectorized effects."""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import effects  # noqa: E402
+from config import LAYOUT, NUM_PCBS  # noqa: E402
+from layout import Layout  # noqa: E402
+
+
+@pytest.fixture
+def field():
+    return effects.field_for(LAYOUT)
+
+
+# ── SegmentField ──────────────────────────────────────────────────────
+
+
+def test_field_shape_and_coordinates(field):
+    assert field.shape == (NUM_PCBS, 3, 8)
+    assert field.x.min() >= 0 and field.x.max() <= field.width
+    assert field.y.min() >= 0 and field.y.max() <= field.height
+    assert max(field.width, field.height) == pytest.approx(1.0)
+
+
+def test_pack_matches_layout_wiring(field):
+    for position in (0, 5, LAYOUT.num_positions - 1):
+        chain_index, shift = LAYOUT.positions[position]
+        display = LAYOUT.display_offsets.index(shift)
+        for segment in range(8):
+            mask = np.zeros(field.shape, dtype=bool)
+            mask[chain_index, display, segment] = True
+            words = field.pack(mask)
+            expected = [0] * NUM_PCBS
+            index, bit = LAYOUT.locate(position, segment)
+            expected[index] = 1 << bit
+            assert words == expected
+
+
+def test_unpack_roundtrip(field):
+    mask = np.random.default_rng(1).random(field.shape) < 0.5
+    assert (field.unpack(field.pack(mask)) == mask).all()
+
+
+def test_coordinates_follow_reading_order(field):
+    first_chain, first_shift = LAYOUT.positions[0]
+    last_chain, last_shift = LAYOUT.positions[-1]
+    first = field.x[first_chain, LAYOUT.display_offsets.index(first_shift)].mean()
+    last = field.x[last_chain, LAYOUT.display_offsets.index(last_shift)].mean()
+    assert first < last
+    top = field.y[first_chain, LAYOUT.display_offsets.index(first_shift)].mean()
+    bottom = field.y[last_chain, LAYOUT.display_offsets.index(last_shift)].mean()
+    assert top < bottom
+
+
+def test_field_for_other_layout():
+    small = effects.field_for(Layout(rows=2, columns=1, displays_per_pcb=2))
+    assert small.shape == (2, 2, 8)
+    assert effects.field_for(LAYOUT) is effects.field_for(LAYOUT)
+
+
+# ── Effects ───────────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize("name", sorted(effects.EFFECTS))
+def test_effects_emit_packed_frames(field, name):
+    frames = list(effects.EFFECTS[name](field, 20))
+    assert len(frames) == 20
+    for words in frames:
+        assert len(words) == NUM_PCBS
+        assert all(0 <= w < 1 << 24 for w in words)
+    assert any(any(words) for words in frames)
+
+
+def test_wipe_fill_ends_fully_lit(field):
+    frames = list(effects.wipe(field, 10, fill=True))
+    assert field.unpack(frames[-1]).all()
+    assert field.unpack(frames[0]).sum() < field.unpack(frames[5]).sum()
+
+
+def test_wipe_moves_left_to_right(field):
+    frames = list(effects.wipe(field, 10, width=0.2))
+    centers = [field.x[field.unpack(words)].mean() for words in frames[1:-1]]
+    assert centers == sorted(centers)
+
+
+def test_radial_sweep_lights_a_fraction(field):
+    for words in effects.radial_sweep(field, 8, width=0.25):
+        lit = field.unpack(words).mean()
+        assert 0.05 < lit < 0.5
+
+
+def test_seeded_effects_repeat(field):
+    for name in ("noise", "rain", "sparkle"):
+        first = list(effects.EFFECTS[name](field, 10, seed=3))
+        again = list(effects.EFFECTS[name](field, 10, seed=3))
+        assert first == again
+
+
+def test_effect_animation():
+    anim = effects.effect_animation("sparkle", steps=5, duration=0.1, seed=1)
+    assert len(anim) == 5
+    assert anim.name == "sparkle"
+    with pytest.raises(ValueError):
+        effects.effect_animation("fireworks")
+
+
+def test_frame_cost_is_small():
+    # Generous bound: effects must comfortably beat display rate
+    assert effects.frame_cost("wipe", steps=50) < 0.005
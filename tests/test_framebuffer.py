@@ -0,0 +1,127 @@
+"""Tests for framebuffer.py — packed per-PCB words and grid conversion."""
+
+import pytest
+from framebuffer import FrameBuffer
+
+
+@pytest.fixture
+def fb():
+    return FrameBuffer(15, 24)
+
+
+# ── Single segment access ─────────────────────────────────────────────
+
+
+def test_initially_all_off(fb):
+    assert list(fb.words) == [0] * 15
+
+
+def test_set_and_get(fb):
+    fb.set(2, 5, 1)
+    assert fb.get(2, 5) == 1
+    assert fb.words[2] == 1 << 5
+    fb.set(2, 5, 0)
+    assert fb.get(2, 5) == 0
+    assert fb.words[2] == 0
+
+
+def test_toggle_returns_new_state(fb):
+    assert fb.toggle(0, 23) == 1
+    assert fb.words[0] == 1 << 23
+    assert fb.toggle(0, 23) == 0
+    assert fb.words[0] == 0
+
+
+def test_row_indexing(fb):
+    fb[3][7] = 1
+    assert fb[3][7] == 1
+    assert fb[3][:8] == [0] * 7 + [1]
+    assert fb[-1][-1] == 0
+    assert len(fb[3]) == 24
+
+
+def test_row_index_out_of_range(fb):
+    with pytest.raises(IndexError):
+        fb[15]
+
+
+@pytest.mark.parametrize("pcb, segment", [(0, 24), (0, 40), (0, -1), (15, 0)])
+def test_single_segment_out_of_range(fb, pcb, segment):
+    with pytest.raises(IndexError):
+        fb.toggle(pcb, segment)
+    with pytest.raises(IndexError):
+        fb.set(pcb, segment, 1)
+    with pytest.raises(IndexError):
+        fb.get(pcb, segment)
+    assert list(fb.words) == [0] * 15
+
+
+# ── Bulk operations ───────────────────────────────────────────────────
+
+
+def test_set_mask(fb):
+    fb.set_mask(1, 0x00FF00, True)
+    assert fb.words[1] == 0x00FF00
+    fb.set_mask(1, 0x000F00, False)
+    assert fb.words[1] == 0x00F000
+
+
+def test_clear(fb):
+    fb.set_mask(4, 0xFFFFFF, True)
+    fb.clear()
+    assert list(fb.words) == [0] * 15
+
+
+def test_assign(fb):
+    words = list(range(15))
+    fb.assign(words)
+    assert list(fb.words) == words
+
+
+def test_assign_wrong_length(fb):
+    with pytest.raises(ValueError):
+        fb.assign([0] * 3)
+
+
+def test_copy_is_independent(fb):
+    fb.set(0, 0, 1)
+    other = fb.copy()
+    other.set(0, 1, 1)
+    assert fb.words[0] == 1
+    assert other.words[0] == 3
+
+
+# ── Grid conversion ───────────────────────────────────────────────────
+
+
+def test_grid_roundtrip(fb):
+    fb.set(0, 0, 1)
+    fb.set(14, 23, 1)
+    grid = fb.to_grid()
+    assert len(grid) == 15
+    assert all(len(row) == 24 for row in grid)
+    assert grid[0][0] == 1 and grid[14][23] == 1
+
+    other = FrameBuffer(15, 24)
+    other.load_grid(grid)
+    assert list(other.words) == list(fb.words)
+
+
+def test_load_grid_partial_keeps_uncovered_cells(fb):
+    fb.set(0, 10, 1)
+    fb.set(1, 0, 1)
+    fb.load_grid([[1, 0, 1]])
+    assert fb.words[0] == (1 << 10) | 0b101
+    assert fb.words[1] == 1
+
+
+# ── Hex encoding ──────────────────────────────────────────────────────
+
+
+def test_hex_roundtrip():
+    from framebuffer import to_hex, from_hex
+
+    words = [0, 1, 0xFFFFFF, 0xABCDEF]
+    text = to_hex(words)
+    assert text == "000000000001ffffffabcdef"
+    assert from_hex(text) == words
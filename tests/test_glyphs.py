@@ -0,0 +1,117 @@
+"""Tests for glyphs.py — 7-segment font and text rendering."""
+
+from config import NUM_PCBS, physical_order, physical_to_chain
+from glyphs import (
+    GLYPHS,
+    NUM_POSITIONS,
+    POSITIONS,
+    SEG_DP,
+    glyph,
+    render_cells,
+    render_text,
+    text_to_cells,
+)
+
+
+# ── Font ──────────────────────────────────────────────────────────────
+
+
+def test_digits_defined():
+    for digit in "0123456789":
+        assert GLYPHS[digit]
+    assert GLYPHS["8"] == 0x7F
+    assert GLYPHS["1"] == 0x06
+
+
+def test_glyph_case_fallback():
+    assert glyph("a") == GLYPHS["A"]
+    assert glyph("B") == GLYPHS["b"]
+    assert glyph("o") != glyph("O")
+
+
+def test_unknown_glyph_is_blank():
+    assert glyph("~") == 0
+
+
+# ── Position table ────────────────────────────────────────────────────
+
+
+def test_positions_follow_physical_order():
+    assert NUM_POSITIONS == len(physical_order)
+    pcb, display = physical_order[0]
+    assert POSITIONS[0] == (physical_to_chain[pcb], 0)
+    # Displays 2 and 3 sit in bits 16-23 and 8-15 respectively
+    assert POSITIONS[1][1] == 16
+    assert POSITIONS[2][1] == 8
+
+
+# ── Rendering ─────────────────────────────────────────────────────────
+
+
+def test_render_text_first_positions():
+    words = render_text("18")
+    chain0, shift0 = POSITIONS[0]
+    chain1, shift1 = POSITIONS[1]
+    assert words[chain0] & (0xFF << shift0) == GLYPHS["1"] << shift0
+    assert words[chain1] & (0xFF << shift1) == GLYPHS["8"] << shift1
+    assert len(words) == NUM_PCBS
+
+
+def test_render_text_at_offset():
+    words = render_text("8", start=4)
+    chain, shift = POSITIONS[4]
+    assert words[chain] == GLYPHS["8"] << shift
+    assert sum(1 for w in words if w) == 1
+
+
+def test_render_text_truncates_past_last_display():
+    words = render_text("8" * 100)
+    assert all(w == 0x7F7F7F for w in words)
+
+
+def test_render_text_full_frame_of_eights():
+    words = render_text("8." * NUM_POSITIONS)
+    assert all(w == 0xFFFFFF for w in words)
+
+
+def test_render_text_overlays_existing_words():
+    base = [0] * NUM_PCBS
+    chain, shift = POSITIONS[0]
+    base[chain] = SEG_DP << shift
+    words = render_text("1", words=base)
+    assert words[chain] == (GLYPHS["1"] | SEG_DP) << shift
+
+
+def test_text_to_cells_folds_decimal_point():
+    assert text_to_cells("1.5") == [GLYPHS["1"] | SEG_DP, GLYPHS["5"]]
+    assert text_to_cells("..") == [SEG_DP, SEG_DP]
+
+
+def test_render_cells_skips_negative_positions():
+    words = render_cells([GLYPHS["8"], GLYPHS["1"]], start=-1)
+    chain, shift = POSITIONS[0]
+    assert words[chain] == GLYPHS["1"] << shift
+
+
+def test_render_text_for_another_wall():
+    from backends import FakeBackend
+    from hardware import Wall
+    from layout import Layout
+
+    # Two PCBs side by side, one display each in the middle byte
+    layout = Layout(1, 2, "row-major", "serpentine-columns", 1, [8])
+    wall = Wall("small", layout, FakeBackend())
+    assert render_text("18", wall=wall) == [GLYPHS["1"] << 8, GLYPHS["8"] << 8]
+
+
+def test_render_text_follows_segment_wiring():
+    from backends import FakeBackend
+    from hardware import Wall
+    from layout import Layout, SEGMENT_NAMES
+
+    # Segments wired in reverse: A on bit 7 ... DP on bit 0
+    bits = {name: 7 - bit for bit, name in enumerate(SEGMENT_NAMES)}
+    wall = Wall(
+        "rev", Layout(1, 1, displays_per_pcb=1, segment_bits=bits), FakeBackend()
+    )
+    assert render_text("1", wall=wall) == [(1 << 6) | (1 << 5)]
@@ -0,0 +1,153 @@
+"""Tests for grayscale.py — bit planes, refresh reports and the BCM loop."""
+
+import time
+import pytest
+from grayscale import (
+    GrayscaleRenderer,
+    bit_planes,
+    levels_from_words,
+    measure_write_time,
+    recommended_bits,
+    refresh_report,
+)
+
+
+def _sim_wall(name="gray", num_pcbs=2, oe_pin=None, clock=time.monotonic):
+    from hardware import Wall
+    from layout import Layout
+    from simulator import SimulatorBackend
+
+    return Wall(
+        name,
+        Layout(rows=1, columns=num_pcbs),
+        SimulatorBackend(num_pcbs, clock=clock),
+        oe_pin=oe_pin,
+    )
+
+
+def _wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return predicate()
+
+
+# ── Bit planes ────────────────────────────────────────────────────────
+
+
+def test_bit_planes_split_levels():
+    levels = [[0, 1, 2, 3], [3, 0, 0, 0]]
+    planes = bit_planes(levels, bits=2)
+    assert planes[0] == [0b1010, 0b0001]
+    assert planes[1] == [0b1100, 0b0001]
+
+
+def test_bit_planes_clamp_levels():
+    planes = bit_planes([[99, -4]], bits=2)
+    assert planes == [[0b01], [0b01]]
+
+
+def test_levels_from_words():
+    assert levels_from_words([0b101], 9, segments_per_pcb=4) == [[9, 0, 9, 0]]
+
+
+# ── Refresh report ────────────────────────────────────────────────────
+
+
+def test_refresh_report_without_oe_is_limited_by_write_time():
+    report = refresh_report(0.002, base_interval=0.0005, use_oe=False)
+    four_bits = report[3]
+    assert four_bits["levels"] == 16
+    assert four_bits["frame_s"] == pytest.approx(15 * 0.002)
+    assert four_bits["duty"] == 1.0
+
+
+def test_refresh_report_with_oe_trades_duty():
+    report = refresh_report(0.002, base_interval=0.0005, use_oe=True)
+    four_bits = report[3]
+    assert four_bits["frame_s"] == pytest.approx(4 * 0.002 + 15 * 0.0005)
+    assert four_bits["duty"] == pytest.approx(15 * 0.0005 / four_bits["frame_s"])
+
+
+def test_recommended_bits():
+    report = refresh_report(0.0005, base_interval=0.0001, min_refresh_hz=100)
+    # 2 ** bits - 1 slots of 0.5 ms must fit in 10 ms
+    assert recommended_bits(report) == 4
+    assert recommended_bits(refresh_report(1.0)) is None
+
+
+def test_measure_write_time_uses_backend():
+    wall = _sim_wall()
+    mean, worst = measure_write_time(wall, samples=3)
+    assert len(wall.backend.frames) == 3
+    assert 0 <= mean <= worst
+
+
+# ── Renderer ──────────────────────────────────────────────────────────
+
+
+def test_renderer_rejects_bad_settings():
+    wall = _sim_wall()
+    with pytest.raises(ValueError):
+        GrayscaleRenderer(wall, bits=0)
+    with pytest.raises(ValueError):
+        GrayscaleRenderer(wall, base_interval=0)
+    with pytest.raises(ValueError):
+        GrayscaleRenderer(wall).set_levels([[1]])
+
+
+def test_renderer_lights_segments_in_proportion_to_level(fake_clock):
+    # The renderer and the simulated chain share a clock that only moves as
+    # they read it, so latch times don't depend on how busy the machine is
+    clock = fake_clock(step=0.0001)
+    wall = _sim_wall(clock=clock)
+    renderer = GrayscaleRenderer(wall, bits=3, base_interval=0.002, clock=clock)
+    renderer.set_levels([[7, 1, 4], [0]])
+    renderer.start()
+    assert _wait_for(lambda: renderer.frames >= 10)
+    renderer.stop()
+    frames = wall.backend.frames
+    lit = [0.0, 0.0, 0.0]
+    total = 0.0
+    for (t0, words), (t1, _) in zip(frames, frames[1:]):
+        total += t1 - t0
+        for segment in range(3):
+            if words[0] >> segment & 1:
+                lit[segment] += t1 - t0
+    assert renderer.stats()["frames"] >= 10
+    assert lit[0] / total > 0.9
+    assert lit[1] / total == pytest.approx(1 / 7, abs=0.1)
+    assert lit[2] / total == pytest.approx(4 / 7, abs=0.1)
+
+
+def test_renderer_pauses_writer_and_restores_grid():
+    wall = _sim_wall()
+    renderer = GrayscaleRenderer(wall, bits=2, base_interval=0.001)
+    renderer.set_levels([[3], [3]])
+    renderer.start()
+    assert wall.writer.paused
+    wall.show_frame([5, 6])
+    assert _wait_for(lambda: renderer.frames >= 1)
+    assert wall.backend.last_words == [1, 1]
+    renderer.stop()
+    assert not wall.writer.paused
+    assert wall.writer.flush(timeout=2)
+    assert wall.backend.last_words == [5, 6]
+    wall.writer.stop(timeout=2)
+
+
+def test_renderer_blanks_with_output_enable():
+    import backends
+
+    wall = _sim_wall(oe_pin=26)
+    backends.GPIO.output.reset_mock()
+    renderer = GrayscaleRenderer(wall, bits=2, base_interval=0.001)
+    renderer.start()
+    assert _wait_for(lambda: renderer.frames >= 1)
+    renderer.stop()
+    oe = [c.args[1] for c in backends.GPIO.output.call_args_list if c.args[0] == 26]
+    assert backends.GPIO.HIGH in oe
+    # Outputs are left enabled for the display writer
+    assert oe[-1] == backends.GPIO.LOW
+    assert renderer.stats()["output_enable"]
+    wall.writer.stop(timeout=2)
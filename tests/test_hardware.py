@@ -136,8 +136,10 @@ def test_set_display_state_invalid_display():
 def test_update_display_calls_gpio():
     # Access the GPIO mock through hardware's own module-level binding
     gpio = hw_mod.GPIO
+    hw_mod.writer.invalidate()
     gpio.output.reset_mock()
     hw_mod.update_display()
+    hw_mod.writer.flush()
     # Should have called GPIO.output many times (shift_out + latch)
     assert gpio.output.call_count > 0
 
@@ -163,3 +165,362 @@ def test_shift_out_shifts_16_bits():
     hw_mod.shift_out(0xFFFF)
     # Each bit: 1 SDI write + 1 HIGH + 1 LOW = 3 calls per bit, 16 bits = 48
     assert gpio.output.call_count == 48
+
+
+# ── update_display word encoding ──────────────────────────────────────
+
+
+def test_update_display_writes_packed_frame(monkeypatch):
+    from hardware import segment_grid
+    from backends import FakeBackend
+
+    fake = FakeBackend()
+    monkeypatch.setattr(hw_mod.default_wall, "backend", fake)
+    segment_grid[0][0] = 1  # low byte of PCB 0
+    segment_grid[0][8] = 1  # high word of PCB 0
+    segment_grid[14][23] = 1
+    hw_mod.update_display()
+    hw_mod.writer.flush()
+    frame = fake.frames[-1]
+    # PCBs are shifted furthest-first, two 16-bit words each
+    assert len(frame) == 60
+    assert frame[:4] == bytes([0x00, 0x00, 0x80, 0x00])
+    assert frame[-4:] == bytes([0x00, 0x01, 0x00, 0x01])
+
+
+# ── Backend selection ─────────────────────────────────────────────────
+
+
+def test_setup_gpio_falls_back_to_bitbang(monkeypatch):
+    from backends import SpiBackend, BitBangBackend
+
+    monkeypatch.setattr(hw_mod.default_wall, "backend", SpiBackend())
+    monkeypatch.setattr("backends.spidev", None)
+    hw_mod.setup_gpio()
+    assert isinstance(hw_mod.default_wall.backend, BitBangBackend)
+
+
+# ── Concurrent updates ────────────────────────────────────────────────
+
+
+def test_concurrent_toggles_are_not_lost():
+    import threading
+    from hardware import segment_grid, toggle_segment
+
+    def worker(pcb):
+        for _ in range(100):
+            toggle_segment(pcb, 0)
+            toggle_segment(pcb, 1)
+
+    threads = [threading.Thread(target=worker, args=(p,)) for p in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    hw_mod.writer.flush(timeout=2)
+    # Each segment was toggled an even number of times
+    assert all(segment_grid[p][0] == 0 and segment_grid[p][1] == 0 for p in range(4))
+
+
+# ── Frame versions ────────────────────────────────────────────────────
+
+
+def test_update_display_bumps_version_only_on_change():
+    from hardware import toggle_segment
+
+    toggle_segment(6, 6)
+    version = hw_mod.update_display()
+    assert hw_mod.update_display() == version
+    toggle_segment(6, 6)
+    assert hw_mod.get_published_frame()[0] == version + 1
+
+
+def test_wait_for_frame_times_out():
+    version, _ = hw_mod.get_published_frame()
+    assert hw_mod.wait_for_frame(version, timeout=0.01) is None
+
+
+def test_wait_for_frame_returns_new_words():
+    from hardware import toggle_segment
+
+    version, _ = hw_mod.get_published_frame()
+    toggle_segment(0, 4)
+    new_version, words = hw_mod.wait_for_frame(version, timeout=1)
+    assert new_version == version + 1
+    assert words[0] & (1 << 4)
+
+
+# ── apply_segment_ops ─────────────────────────────────────────────────
+
+
+def test_apply_segment_ops_single_update(monkeypatch):
+    from hardware import segment_grid, apply_segment_ops
+
+    segment_grid[1][1] = 1
+    submitted = []
+    monkeypatch.setattr(hw_mod.writer, "submit", submitted.append)
+    apply_segment_ops(
+        [
+            {"op": "set", "pcb": 0, "segment": 0},
+            {"op": "clear", "pcb": 1, "segment": 1},
+            {"op": "toggle", "pcb": 2, "segment": 2},
+        ]
+    )
+    assert segment_grid[0][0] == 1
+    assert segment_grid[1][1] == 0
+    assert segment_grid[2][2] == 1
+    assert len(submitted) == 1
+
+
+def test_apply_segment_ops_is_all_or_nothing():
+    from hardware import segment_grid, apply_segment_ops
+
+    with pytest.raises(ValueError):
+        apply_segment_ops(
+            [
+                {"op": "set", "pcb": 0, "segment": 0},
+                {"op": "set", "pcb": 99, "segment": 0},
+            ]
+        )
+    assert segment_grid[0][0] == 0
+
+
+@pytest.mark.parametrize(
+    "op",
+    [
+        {"op": "explode", "pcb": 0, "segment": 0},
+        {"op": "set", "pcb": 0},
+        {"op": "set", "pcb": "x", "segment": 0},
+        {"op": "set", "pcb": 0, "segment": 24},
+        "set",
+    ],
+)
+def test_apply_segment_ops_rejects_bad_ops(op):
+    from hardware import apply_segment_ops
+
+    with pytest.raises(ValueError):
+        apply_segment_ops([op])
+
+
+# ── Walls ─────────────────────────────────────────────────────────────
+
+
+def test_get_wall_default_and_unknown():
+    assert hw_mod.get_wall() is hw_mod.default_wall
+    assert hw_mod.get_wall(hw_mod.default_wall.name) is hw_mod.default_wall
+    with pytest.raises(hw_mod.UnknownWallError):
+        hw_mod.get_wall("nope")
+
+
+def test_build_walls_from_config():
+    from backends import BitBangBackend, SpiBackend, GroupMemberBackend
+    from layout import Layout
+
+    small = Layout(rows=2, columns=2)
+    built = hw_mod.build_walls(
+        [
+            {
+                "name": "a",
+                "layout": small,
+                "sdi_pin": 17,
+                "clock_pin": 27,
+                "le_pin": 22,
+            },
+            {"name": "b", "backend": "spi", "spi_bus": 1, "le_pin": 23},
+            {"name": "c", "layout": small, "group": "g", "sdi_pin": 5},
+            {"name": "d", "group": "g", "sdi_pin": 6},
+        ]
+    )
+    assert isinstance(built["a"].backend, BitBangBackend)
+    assert built["a"].backend.sdi_pin == 17
+    assert len(built["a"].segment_grid) == 4
+    assert isinstance(built["b"].backend, SpiBackend)
+    assert isinstance(built["c"].backend, GroupMemberBackend)
+    assert built["c"].backend.group is built["d"].backend.group
+
+
+def test_walls_keep_separate_state():
+    from backends import FakeBackend
+
+    from layout import Layout
+
+    first = hw_mod.Wall("first", Layout(rows=1, columns=3), FakeBackend())
+    second = hw_mod.Wall("second", Layout(rows=5, columns=1), FakeBackend())
+    first.apply_segment_ops([{"op": "set", "pcb": 2, "segment": 0}])
+    second.update_display()
+    first.writer.flush()
+    second.writer.flush()
+    assert first.backend.last_words == [0, 0, 1]
+    assert second.backend.last_words == [0] * 5
+    with pytest.raises(ValueError):
+        first.apply_segment_ops([{"op": "set", "pcb": 4, "segment": 0}])
+
+
+def test_spi_wall_falls_back_to_its_own_pins(monkeypatch):
+    from backends import SpiBackend
+
+    monkeypatch.setattr("backends.spidev", None)
+    wall = hw_mod.Wall("spi1", backend=SpiBackend(bus=1, le_pin=23))
+    wall.setup()
+    assert (wall.backend.sdi_pin, wall.backend.clock_pin, wall.backend.le_pin) == (
+        20,
+        21,
+        23,
+    )
+
+
+# ── Partial refresh ───────────────────────────────────────────────────
+
+
+def _sim_wall(mode, num_pcbs=4):
+    from layout import Layout
+    from simulator import SimulatorBackend
+
+    return hw_mod.Wall(
+        "partial", Layout(rows=1, columns=num_pcbs), SimulatorBackend(num_pcbs), mode
+    )
+
+
+def test_partial_refresh_latches_the_right_words():
+    import random
+    from backends import encode_frame
+
+    wall = _sim_wall("on")
+    rng = random.Random(7)
+    frames = [[0, 0, 0, 0], [5, 0, 0, 0], [6, 5, 0, 0], [6, 5, 0, 0]]
+    frames += [[rng.choice((0, 1, 2)) for _ in range(4)] for _ in range(50)]
+    for words in frames:
+        wall.write_frame(encode_frame(words))
+        assert wall.backend.last_words == words
+    assert wall.frames_partial > 0
+    assert wall.pcbs_skipped > 0
+
+
+def test_partial_refresh_shifts_only_what_moved():
+    from backends import encode_frame
+
+    wall = _sim_wall("on")
+    wall.write_frame(encode_frame([1, 2, 3, 4]))
+    bits = wall.backend.chain.bits_clocked
+    wall.write_frame(encode_frame([9, 1, 2, 3]))
+    assert wall.backend.chain.bits_clocked - bits == 32
+    assert wall.refresh_stats()["pcbs_shifted"] == 5
+
+
+def test_partial_refresh_compare_mode_sends_full_frames():
+    from backends import encode_frame
+
+    wall = _sim_wall("compare")
+    wall.write_frame(encode_frame([1, 2, 3, 4]))
+    wall.write_frame(encode_frame([9, 1, 2, 3]))
+    assert wall.backend.chain.bits_clocked == 2 * 4 * 32
+    assert wall.frames_partial == 0
+    assert wall.pcbs_skipped == 3
+
+
+def test_partial_refresh_needs_known_contents():
+    from backends import encode_frame
+    from simulator import SimulatorBackend
+
+    wall = _sim_wall("on")
+    wall.write_frame(encode_frame([1, 2, 3, 4]))
+    wall.set_backend(SimulatorBackend(4))
+    wall.write_frame(encode_frame([9, 1, 2, 3]))
+    assert wall.backend.last_words == [9, 1, 2, 3]
+    assert wall.backend.chain.bits_clocked == 4 * 32
+
+
+def test_partial_refresh_skips_backends_without_support():
+    from backends import FakeBackend, encode_frame
+    from layout import Layout
+
+    wall = hw_mod.Wall("partial", Layout(rows=1, columns=2), FakeBackend(), "on")
+    wall.write_frame(encode_frame([1, 2]))
+    wall.write_frame(encode_frame([1, 2]))
+    assert [len(f) for f in wall.backend.frames] == [8, 8]
+
+
+def test_partial_refresh_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        _sim_wall("sometimes")
+
+
+def test_set_backend_waits_for_write_in_progress():
+    import threading
+    from backends import FakeBackend, encode_frame
+    from layout import Layout
+
+    events = []
+    writing = threading.Event()
+    release = threading.Event()
+
+    class SlowBackend(FakeBackend):
+        def write_frame(self, frame):
+            events.append("write")
+            writing.set()
+            release.wait(2)
+            events.append("written")
+
+        def close(self):
+            events.append("close")
+
+    wall = hw_mod.Wall("swap", Layout(rows=1, columns=1), SlowBackend(), "off")
+    wall.writer.submit(encode_frame([1]))
+    assert writing.wait(2)
+    swap = threading.Thread(target=wall.set_backend, args=(FakeBackend(),))
+    swap.start()
+    swap.join(0.05)
+    assert events == ["write"]
+    release.set()
+    swap.join(2)
+    assert events == ["write", "written", "close"]
+    assert not wall.writer.paused
+    wall.writer.submit(encode_frame([2]))
+    assert wall.writer.flush(2)
+    assert wall.backend.last_words == [2]
+    wall.writer.stop(1)
+
+
+def test_set_backend_keeps_writer_paused_by_another_owner():
+    from backends import FakeBackend
+
+    wall = _sim_wall("off")
+    wall.writer.pause()
+    wall.set_backend(FakeBackend())
+    assert wall.writer.paused
+    wall.writer.resume()
+
+
+def test_frames_reach_writer_in_version_order():
+    import threading
+    import time
+    from backends import FakeBackend, decode_frame
+    from layout import Layout
+
+    wall = hw_mod.Wall("order", Layout(rows=1, columns=1), FakeBackend(), "off")
+    submit = wall.writer.submit
+    mismatches = []
+
+    def checked_submit(frame):
+        time.sleep(0.0002)
+        if decode_frame(frame) != wall.get_published_frame()[1]:
+            mismatches.append(frame)
+        submit(frame)
+
+    wall.writer.submit = checked_submit
+
+    def hammer(offset):
+        for i in range(200):
+            with wall.grid_lock:
+                wall.segment_grid.assign([offset + i])
+            wall.update_display()
+
+    threads = [threading.Thread(target=hammer, args=(n * 1000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+    assert mismatches == []
+    assert wall.writer.flush(2)
+    assert wall.backend.last_words == wall.get_published_frame()[1]
+    wall.writer.stop(1)
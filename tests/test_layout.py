@@ -0,0 +1,142 @@
+"""Tests for layout.py — wall geometry and precomputed lookup tables."""
+
+import json
+import os
+import pytest
+from layout import Layout, SEGMENT_NAMES, load_layout
+
+
+# ── Default layout ────────────────────────────────────────────────────
+
+
+def test_default_layout_matches_original_wiring():
+    from config import LAYOUT
+
+    assert LAYOUT.pcb_labels == [
+        [1, 6, 11],
+        [2, 7, 12],
+        [3, 8, 13],
+        [4, 9, 14],
+        [5, 10, 15],
+    ]
+    assert LAYOUT.physical_to_chain == {
+        1: 0, 6: 1, 11: 2, 2: 3, 7: 4, 12: 5, 3: 6, 8: 7,
+        13: 8, 4: 9, 9: 10, 14: 11, 5: 12, 10: 13, 15: 14,
+    }  # fmt: skip
+    assert LAYOUT.physical_order[:4] == [(1, 1), (1, 2), (1, 3), (6, 1)]
+    assert LAYOUT.display_masks == {1: 0x0000FF, 2: 0xFF0000, 3: 0x00FF00}
+
+
+def test_display_segments_for_ui():
+    layout = Layout()
+    assert layout.display_segments[1][0] == (16, "A")
+    assert layout.display_segments[2][7] == (15, "DP")
+
+
+# ── Chain orders ──────────────────────────────────────────────────────
+
+
+def test_serpentine_rows():
+    layout = Layout(
+        rows=2, columns=3, numbering="row-major", chain_order="serpentine-rows"
+    )
+    assert layout.physical_to_chain == {1: 0, 2: 1, 3: 2, 4: 5, 5: 4, 6: 3}
+
+
+def test_serpentine_columns():
+    layout = Layout(
+        rows=2, columns=2, numbering="row-major", chain_order="serpentine-columns"
+    )
+    assert layout.physical_to_chain == {1: 0, 3: 1, 4: 2, 2: 3}
+
+
+def test_large_wall_file():
+    from config import SCRIPT_DIR
+
+    layout = load_layout(os.path.join(SCRIPT_DIR, "layouts", "10x6-serpentine.json"))
+    assert layout.num_pcbs == 60
+    assert layout.num_positions == 180
+    assert sorted(layout.physical_to_chain.values()) == list(range(60))
+
+
+# ── Lookup tables ─────────────────────────────────────────────────────
+
+
+def test_locate_uses_flat_tables():
+    layout = Layout()
+    # Second display in reading order is display 2 of PCB 1, bits 16-23
+    assert layout.locate(1, 0) == (0, 16)
+    assert layout.locate(1, 7) == (0, 23)
+    assert len(layout.segment_chain) == layout.num_positions * 8
+
+
+def test_pattern_map_rewires_segments():
+    bits = {name: bit for bit, name in enumerate(SEGMENT_NAMES)}
+    bits["A"], bits["DP"] = 7, 0
+    layout = Layout(segment_bits=bits)
+    assert layout.pattern_map[0b00000001] == 0b10000000
+    assert layout.pattern_map[0b10000010] == 0b00000011
+    assert Layout().pattern_map[0x5A] == 0x5A
+
+
+# ── Validation ────────────────────────────────────────────────────────
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"rows": 0},
+        {"chain_order": "spiral"},
+        {"numbering": "random"},
+        {"displays_per_pcb": 4},
+        {"display_offsets": [0, 8, 8]},
+        {"display_offsets": [0, 4, 8]},
+        {"segment_bits": {"A": 0}},
+    ],
+)
+def test_invalid_layouts_rejected(kwargs):
+    with pytest.raises(ValueError):
+        Layout(**kwargs)
+
+
+def test_load_layout_roundtrip(tmp_path):
+    path = tmp_path / "wall.json"
+    path.write_text(json.dumps(Layout(rows=2, columns=4, name="w").to_dict()))
+    layout = load_layout(str(path))
+    assert (layout.rows, layout.columns, layout.name) == (2, 4, "w")
+
+
+def test_load_layout_unknown_key(tmp_path):
+    path = tmp_path / "wall.json"
+    path.write_text(json.dumps({"rows": 2, "depth": 3}))
+    with pytest.raises(ValueError):
+        load_layout(str(path))
+
+
+def test_segment_centers_inside_display():
+    from layout import DISPLAY_HEIGHT, DISPLAY_WIDTH, SEGMENT_NAMES, segment_center
+
+    for name in SEGMENT_NAMES:
+        x, y = segment_center(name)
+        assert 0 < x < DISPLAY_WIDTH and 0 < y < DISPLAY_HEIGHT
+    assert segment_center("A")[1] < segment_center("G")[1] < segment_center("D")[1]
+
+
+def test_display_origin_reading_order():
+    layout = Layout(rows=2, columns=2, displays_per_pcb=3)
+    assert layout.display_origin(0) == (0, 0)
+    assert layout.display_origin(5) == (5 * 120, 0)
+    assert layout.display_origin(6) == (0, 200)
+
+
+def test_segment_xy_follows_display_origin():
+    from layout import SEGMENT_NAMES, segment_center
+
+    layout = Layout(rows=2, columns=2, displays_per_pcb=3)
+    assert (layout.wall_width, layout.wall_height) == (6 * 120, 2 * 200)
+    assert layout.display_cell(7) == (1, 1)
+    for position in range(layout.num_positions):
+        left, top = layout.display_origin(position)
+        for segment, name in enumerate(SEGMENT_NAMES):
+            cx, cy = segment_center(name)
+            assert layout.segment_xy(position, segment) == (left + cx, top + cy)
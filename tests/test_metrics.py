@@ -0,0 +1,198 @@
+"""Tests for metrics.py — histograms, counters and the /metrics endpoint."""
+
+import threading
+import time
+import pytest
+from metrics import Counter, Gauge, Histogram, Registry, TimedRLock
+
+
+def _value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in output")
+
+
+@pytest.fixture
+def client():
+    from app import app
+
+    app.config["TESTING"] = True
+    with app.test_client() as c:
+        yield c
+
+
+# ── Metric types ──────────────────────────────────────────────────────
+
+
+def test_counter_with_labels():
+    c = Counter("jobs_total", "Jobs", ("kind",))
+    c.labels("a").inc()
+    c.labels("a").inc(2)
+    c.labels("b").inc()
+    lines = c.render()
+    assert lines[0] == "# HELP jobs_total Jobs"
+    assert lines[1] == "# TYPE jobs_total counter"
+    assert 'jobs_total{kind="a"} 3' in lines
+    assert 'jobs_total{kind="b"} 1' in lines
+
+
+def test_histogram_buckets_are_cumulative():
+    h = Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        h.observe(value)
+    lines = h.render()
+    assert 'latency_seconds_bucket{le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{le="1"} 3' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in lines
+    assert "latency_seconds_count 4" in lines
+    assert "latency_seconds_sum 2.65" in lines
+
+
+def test_histogram_time_context_manager():
+    h = Histogram("block_seconds", "Block")
+    with h.time():
+        time.sleep(0.01)
+    text = "\n".join(h.render())
+    assert _value(text, "block_seconds_count") == 1
+    assert _value(text, "block_seconds_sum") >= 0.01
+
+
+def test_gauge_reads_function_at_render():
+    gauge = Gauge("temperature", "Temp", ("wall",))
+    readings = iter([1.5, 2.5])
+    gauge.set_function(lambda: next(readings), "main")
+    assert 'temperature{wall="main"} 1.5' in gauge.render()
+    assert 'temperature{wall="main"} 2.5' in gauge.render()
+
+
+def test_gauge_error_skips_sample():
+    gauge = Gauge("broken", "Broken")
+    gauge.set_function(lambda: 1 / 0)
+    assert gauge.render() == ["# HELP broken Broken", "# TYPE broken gauge"]
+
+
+def test_label_values_are_escaped():
+    c = Counter("escaped_total", "Escaped", ("path",))
+    c.labels('a"b\\c').inc()
+    assert 'escaped_total{path="a\\"b\\\\c"} 1' in c.render()
+
+
+def test_registry_rejects_duplicates():
+    registry = Registry()
+    registry.counter("dupe_total", "Dupe")
+    with pytest.raises(ValueError):
+        registry.counter("dupe_total", "Dupe")
+
+
+def test_registry_render_ends_with_newline():
+    registry = Registry()
+    registry.counter("a_total", "A").inc()
+    text = registry.render()
+    assert text.endswith("\n")
+    assert "a_total 1" in text
+
+
+# ── TimedRLock ────────────────────────────────────────────────────────
+
+
+def test_timed_rlock_is_reentrant_and_uncontended_is_not_timed():
+    h = Histogram("wait_seconds", "Wait")
+    lock = TimedRLock(h)
+    with lock:
+        with lock:
+            pass
+    assert _value("\n".join(h.render()), "wait_seconds_count") == 0
+
+
+def test_timed_rlock_records_contended_wait():
+    h = Histogram("wait_seconds", "Wait")
+    lock = TimedRLock(h)
+    held = threading.Event()
+    release = threading.Event()
+
+    def holder():
+        with lock:
+            held.set()
+            release.wait(2)
+
+    t = threading.Thread(target=holder)
+    t.start()
+    held.wait(2)
+    # Held by the other thread until this gives up, so the wait is timed
+    assert lock.acquire(timeout=0.02) is False
+    release.set()
+    t.join()
+    text = "\n".join(h.render())
+    assert _value(text, "wait_seconds_count") == 1
+    assert _value(text, "wait_seconds_sum") > 0.01
+
+
+def test_timed_rlock_nonblocking_acquire_fails_when_held():
+    lock = TimedRLock(Histogram("wait_seconds", "Wait"))
+    lock.acquire()
+    result = []
+    t = threading.Thread(target=lambda: result.append(lock.acquire(blocking=False)))
+    t.start()
+    t.join()
+    lock.release()
+    assert result == [False]
+
+
+# ── Instrumentation ───────────────────────────────────────────────────
+
+
+def test_wall_write_is_recorded():
+    from backends import FakeBackend
+    from hardware import Wall
+    from metrics import registry
+
+    wall = Wall("metrics-test", backend=FakeBackend())
+    wall.segment_grid.toggle(0, 0)
+    wall.update_display()
+    assert wall.writer.flush(timeout=2)
+    text = registry.render()
+    assert (
+        _value(text, 'segwall_display_frames_written_total{wall="metrics-test"}') == 1
+    )
+    assert (
+        _value(
+            text,
+            'segwall_display_write_seconds_count{wall="metrics-test",backend="fake"}',
+        )
+        == 1
+    )
+    assert (
+        _value(text, 'segwall_display_update_seconds_count{wall="metrics-test"}') == 1
+    )
+    assert _value(text, 'segwall_display_frames_per_second{wall="metrics-test"}') > 0
+    wall.writer.stop(timeout=2)
+
+
+def test_bitbang_gpio_calls_per_frame(monkeypatch):
+    import backends
+    from metrics import GPIO_CALLS_PER_FRAME
+
+    monkeypatch.setattr(backends, "clock_delay", lambda s: None)
+    child = GPIO_CALLS_PER_FRAME.labels("bitbang")
+    before_count, before_sum = sum(child.counts), child.sum
+    backends.BitBangBackend().write_frame(bytes(8))
+    assert sum(child.counts) == before_count + 1
+    assert child.sum - before_sum == 3 * 64 + 2
+
+
+def test_metrics_endpoint(client):
+    client.get("/get_grid_state")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    text = resp.get_data(as_text=True)
+    assert "# TYPE segwall_http_request_seconds histogram" in text
+    assert 'segwall_http_requests_total{endpoint="get_grid_state",status="200"}' in text
+    assert (
+        _value(
+            text,
+            'segwall_http_request_seconds_count{endpoint="get_grid_state",method="GET"}',
+        )
+        >= 1
+    )
@@ -0,0 +1,104 @@
+"""Tests for netstream.py — UDP frame packets, sequencing and the listener."""
+
+import time
+import pytest
+from backends import FakeBackend
+from hardware import Wall
+from layout import Layout
+from netstream import (
+    FrameListener,
+    FrameSender,
+    decode_packet,
+    encode_packet,
+    is_newer,
+)
+
+
+@pytest.fixture
+def wall():
+    return Wall("net", Layout(rows=2, columns=2), FakeBackend())
+
+
+@pytest.fixture
+def listener(wall, fake_clock):
+    return FrameListener(
+        port=0, walls=[wall], reset_timeout=2.0, clock=fake_clock(100.0)
+    )
+
+
+# ── Packets ───────────────────────────────────────────────────────────
+
+
+def test_packet_roundtrip():
+    data = encode_packet([1, 0xFFFFFF, 0, 42], 7, wall_index=1)
+    wall_index, sequence, words = decode_packet(data)
+    assert (wall_index, sequence, list(words)) == (1, 7, [1, 0xFFFFFF, 0, 42])
+    assert len(data) == 10 + 4 * 3
+
+
+@pytest.mark.parametrize("data", [b"", b"XXXX" + bytes(6), encode_packet([1], 1)[:-1]])
+def test_decode_rejects_bad_packets(data):
+    with pytest.raises(ValueError):
+        decode_packet(data)
+
+
+def test_sequence_wraparound():
+    assert is_newer(2, 1)
+    assert not is_newer(1, 1)
+    assert not is_newer(1, 2)
+    assert is_newer(0, 0xFFFFFFFF)
+
+
+# ── Listener ──────────────────────────────────────────────────────────
+
+
+def test_listener_shows_newest_and_drops_stale(listener, wall):
+    listener.handle_packets([encode_packet([1, 0, 0, 0], 5)])
+    listener.handle_packets(
+        [encode_packet([2, 0, 0, 0], 4), encode_packet([3, 0, 0, 0], 5)]
+    )
+    assert list(wall.segment_grid.words) == [1, 0, 0, 0]
+    assert listener.frames_stale == 2
+    listener.handle_packets([encode_packet([4, 0, 0, 0], 6)])
+    assert list(wall.segment_grid.words) == [4, 0, 0, 0]
+
+
+def test_listener_shows_only_latest_of_a_burst(listener, wall):
+    shown = []
+    wall.show_frame = lambda words: shown.append(list(words))
+    listener.handle_packets([encode_packet([n, 0, 0, 0], n) for n in range(1, 4)])
+    assert shown == [[3, 0, 0, 0]]
+    assert listener.frames_superseded == 2
+
+
+def test_listener_rejects_wrong_size_and_wall(listener):
+    listener.handle_packets(
+        [encode_packet([1, 2], 1), encode_packet([0] * 4, 1, wall_index=3)]
+    )
+    assert listener.frames_invalid == 2
+    assert listener.frames_shown == 0
+
+
+def test_listener_accepts_restarted_sender_after_silence(listener, wall):
+    listener.handle_packets([encode_packet([1, 0, 0, 0], 1000)])
+    listener.handle_packets([encode_packet([2, 0, 0, 0], 1)])
+    assert listener.frames_stale == 1
+    listener.clock.now += 5
+    listener.handle_packets([encode_packet([3, 0, 0, 0], 1)])
+    assert list(wall.segment_grid.words) == [3, 0, 0, 0]
+
+
+def test_listener_over_udp(listener, wall):
+    listener.start()
+    try:
+        sender = FrameSender("127.0.0.1", listener.port)
+        sender.send([0, 0, 0, 7])
+        sender.close()
+        deadline = time.monotonic() + 2
+        while listener.frames_shown == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        listener.stop()
+    assert list(wall.segment_grid.words) == [0, 0, 0, 7]
+    wall.writer.flush()
+    assert wall.backend.last_words == [0, 0, 0, 7]
@@ -0,0 +1,203 @@
+"""Tests for playlist.py — compiled items and the drift-corrected playlist loop."""
+
+import datetime
+import threading
+import time
+import pytest
+import playlist
+from config import NUM_PCBS
+from playlist import PlaylistItem, PlaylistPlayer, compile_item, parse_window
+
+
+def _words(i):
+    return [i] * NUM_PCBS
+
+
+def _item(i, duration=0.02, window=None):
+    return PlaylistItem("preset", f"p{i}", [(_words(i), duration)], duration, window)
+
+
+def _at(hour, minute=0):
+    return lambda: datetime.datetime(2024, 1, 1, hour, minute)
+
+
+class _Recorder:
+    """Show function that takes ``hold`` seconds of fake time per frame"""
+
+    def __init__(self, clock, hold=0.0):
+        self.clock = clock
+        self.hold = hold
+        self.shown = []
+
+    def __call__(self, words):
+        self.shown.append((self.clock(), list(words)[0]))
+        self.clock.now += self.hold
+
+
+def _wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.002)
+    return predicate()
+
+
+# ── Items ─────────────────────────────────────────────────────────────
+
+
+def test_parse_window():
+    assert parse_window({"start": "08:30", "end": "22:00"}) == (510, 1320)
+    assert parse_window(None) is None
+    with pytest.raises(ValueError):
+        parse_window({"start": "8"})
+    with pytest.raises(ValueError):
+        parse_window({"start": "25:00", "end": "26:00"})
+    for bad in ("12:75", "24:00", "-1:00", "12:-5", "1:2:3"):
+        with pytest.raises(ValueError):
+            parse_window({"start": "08:00", "end": bad})
+    assert parse_window({"start": "18:00", "end": "00:00"}) == (1080, 0)
+
+
+def test_compile_item_rejects_non_objects():
+    for spec in ("x", 3, None, ["preset"]):
+        with pytest.raises(ValueError):
+            compile_item(spec)
+
+
+def test_item_window_wraps_midnight():
+    item = _item(1, window=(22 * 60, 6 * 60))
+    assert item.active(_at(23)())
+    assert item.active(_at(5, 59)())
+    assert not item.active(_at(12)())
+    assert _item(1, window=(60, 120)).active(_at(1, 30)())
+
+
+def test_compile_item_preloads_presets(monkeypatch):
+    reads = []
+
+    def load_frame(name, num_pcbs):
+        reads.append(name)
+        return _words(7) if name == "a" else None
+
+    monkeypatch.setattr(playlist, "load_frame", load_frame)
+    item = compile_item({"type": "preset", "name": "a", "duration": 3})
+    assert reads == ["a"]
+    assert item.frames == [(_words(7), 3.0)]
+    with pytest.raises(ValueError):
+        compile_item({"type": "preset", "name": "missing"})
+
+
+def test_compile_item_text_and_animation():
+    text = compile_item({"type": "text", "text": "88"})
+    assert text.duration == playlist.PLAYLIST_ITEM_DURATION
+    assert any(text.frames[0][0])
+    chase = compile_item({"type": "animation", "frame_duration": 0.1})
+    assert chase.name == "chase"
+    assert chase.duration is None
+    assert len(chase.frames) > 1
+    with pytest.raises(ValueError):
+        compile_item({"type": "video"})
+    with pytest.raises(ValueError):
+        compile_item({"type": "text", "text": "x", "duration": 0})
+
+
+# ── Player ────────────────────────────────────────────────────────────
+
+
+def test_player_plays_items_in_order_without_drift(fake_clock):
+    clock = fake_clock()
+    # Every frame overruns its 20 ms slot by 1 ms
+    show = _Recorder(clock, hold=0.021)
+    player = PlaylistPlayer(show, clock=clock)
+    player.start([_item(i) for i in range(5)], loop=False)
+    assert _wait_for(lambda: not player.running)
+    assert [value for _, value in show.shown] == [0, 1, 2, 3, 4]
+    # Deadlines are absolute, so the overruns add up as lateness to catch
+    # up on instead of pushing every later item back
+    assert player.status()["max_lateness"] == pytest.approx(0.004)
+    assert player.status()["passes"] == 1
+
+
+def test_player_repeats_frames_for_item_duration(fake_clock):
+    clock = fake_clock()
+    show = _Recorder(clock, hold=0.01)
+    player = PlaylistPlayer(show, clock=clock)
+    frames = [(_words(1), 0.01), (_words(2), 0.01)]
+    player.start([PlaylistItem("animation", "a", frames, duration=0.05)], loop=False)
+    assert _wait_for(lambda: not player.running)
+    assert [value for _, value in show.shown] == [1, 2, 1, 2, 1]
+
+
+def test_player_skips_items_outside_their_window(fake_clock):
+    clock = fake_clock()
+    show = _Recorder(clock, hold=0.02)
+    player = PlaylistPlayer(show, clock=clock, now=_at(12))
+    items = [_item(1, window=(0, 60)), _item(2), _item(3, window=(11 * 60, 13 * 60))]
+    player.start(items, loop=False)
+    assert _wait_for(lambda: not player.running)
+    assert [value for _, value in show.shown] == [2, 3]
+
+
+def test_player_pause_resume_and_skip(fake_clock):
+    clock = fake_clock()
+    show = _Recorder(clock)
+    player = PlaylistPlayer(show, clock=clock)
+    player.start([_item(i, duration=5) for i in range(3)], loop=False)
+    assert _wait_for(lambda: show.shown)
+    player.pause()
+    status = player.status()
+    assert status["paused"] and status["index"] == 0
+    clock.now += 1
+    player.resume()
+    # Paused time does not count against the item
+    assert player.status()["remaining"] == pytest.approx(5)
+    player.skip()
+    assert _wait_for(lambda: player.status()["index"] == 1)
+    player.skip(0)
+    assert _wait_for(lambda: len(show.shown) == 3)
+    assert [value for _, value in show.shown] == [0, 1, 0]
+    with pytest.raises(ValueError):
+        player.skip(9)
+    player.stop()
+    assert not player.running
+
+
+def test_player_loops_and_waits_when_nothing_is_active(fake_clock, monkeypatch):
+    monkeypatch.setattr(playlist, "PLAYLIST_IDLE_POLL", 0.01)
+    hour = [3]
+    clock = fake_clock()
+    show = _Recorder(clock, hold=0.02)
+    player = PlaylistPlayer(
+        show, clock=clock, now=lambda: datetime.datetime(2024, 1, 1, hour[0])
+    )
+    player.start([_item(1, window=(9 * 60, 17 * 60))])
+    assert _wait_for(lambda: player.status()["passes"] > 1)
+    assert show.shown == []
+    hour[0] = 10
+    assert _wait_for(lambda: len(show.shown) >= 2)
+    player.stop()
+
+
+def test_concurrent_start_and_stop_leave_no_thread_running():
+    threads = set()
+    player = PlaylistPlayer(lambda words: threads.add(threading.current_thread()))
+    errors = []
+
+    def hammer():
+        try:
+            for _ in range(20):
+                player.start([_item(1), _item(2)])
+                player.stop()
+                player.start([_item(1), _item(2)])
+        except Exception as e:
+            errors.append(e)
+
+    callers = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join(10)
+    player.stop()
+    assert errors == []
+    assert not player.running
+    assert threads
+    assert not any(t.is_alive() for t in threads)
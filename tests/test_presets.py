@@ -36,23 +36,39 @@ def _make_grid(value=0):
 
 
 def test_save_preset_creates_file(presets_dir):
-    from presets import save_preset
+    from presets import save_preset, load_preset
 
     grid = _make_grid(1)
     assert save_preset("test1", grid) is True
-    filepath = presets_dir / "test1.json"
+    filepath = presets_dir / "test1.seg"
     assert filepath.exists()
-    with open(filepath) as f:
-        assert json.load(f) == grid
+    assert load_preset("test1") == grid
 
 
-def test_save_preset_overwrites(presets_dir):
+def test_save_preset_is_compact(presets_dir):
     from presets import save_preset
+    from config import NUM_PCBS
+
+    save_preset("small", _make_grid(1))
+    # 7-byte header + 3 bytes per PCB
+    assert (presets_dir / "small.seg").stat().st_size == 7 + 3 * NUM_PCBS
+
+
+def test_save_preset_accepts_words(presets_dir):
+    from presets import save_preset, load_frame
+    from config import NUM_PCBS
+
+    words = list(range(NUM_PCBS))
+    save_preset("words", words)
+    assert list(load_frame("words")) == words
+
+
+def test_save_preset_overwrites(presets_dir):
+    from presets import save_preset, load_preset
 
     save_preset("ow", _make_grid(0))
     save_preset("ow", _make_grid(1))
-    with open(presets_dir / "ow.json") as f:
-        assert json.load(f) == _make_grid(1)
+    assert load_preset("ow") == _make_grid(1)
 
 
 # ── load_preset ───────────────────────────────────────────────────────
@@ -73,6 +89,72 @@ def test_load_preset_missing(presets_dir):
     assert load_preset("nonexistent") is None
 
 
+def test_load_preset_corrupt_file(presets_dir):
+    from presets import load_preset
+
+    (presets_dir / "bad.seg").write_bytes(b"garbage")
+    assert load_preset("bad") is None
+
+
+def test_preset_encoding_holds_more_than_255_pcbs():
+    from presets import decode_preset, encode_preset
+
+    words = [i & 0xFFFFFF for i in range(300)]
+    assert list(decode_preset(encode_preset(words))) == words
+
+
+def test_version_1_preset_still_decodes():
+    from framebuffer import pack_words
+    from presets import decode_preset
+
+    data = b"7SEG" + bytes([1, 3]) + pack_words([1, 2, 3])
+    assert list(decode_preset(data)) == [1, 2, 3]
+    with pytest.raises(ValueError):
+        decode_preset(b"7SEG" + bytes([9, 3]) + pack_words([1, 2, 3]))
+
+
+# ── Legacy JSON migration ─────────────────────────────────────────────
+
+
+def test_legacy_json_preset_is_migrated(presets_dir):
+    from presets import load_preset, get_all_presets
+
+    grid = _make_grid(0)
+    grid[3][7] = 1
+    (presets_dir / "old.json").write_text(json.dumps(grid))
+    assert get_all_presets() == ["old"]
+    assert load_preset("old") == grid
+    assert (presets_dir / "old.seg").exists()
+    assert not (presets_dir / "old.json").exists()
+    assert load_preset("old") == grid
+
+
+def test_save_replaces_legacy_json(presets_dir):
+    from presets import save_preset, get_all_presets
+
+    (presets_dir / "dup.json").write_text(json.dumps(_make_grid(0)))
+    save_preset("dup", _make_grid(1))
+    assert not (presets_dir / "dup.json").exists()
+    assert get_all_presets() == ["dup"]
+
+
+def test_delete_removes_legacy_json(presets_dir):
+    from presets import delete_preset
+
+    (presets_dir / "legacy.json").write_text(json.dumps(_make_grid(0)))
+    assert delete_preset("legacy") is True
+    assert not (presets_dir / "legacy.json").exists()
+
+
+def test_shipped_presets_load():
+    from presets import get_all_presets, load_frame
+
+    names = get_all_presets()
+    assert names
+    for name in names:
+        assert load_frame(name) is not None
+
+
 # ── get_all_presets ───────────────────────────────────────────────────
 
 
@@ -91,7 +173,7 @@ def test_get_all_presets_lists_names(presets_dir):
     assert names == ["alpha", "beta"]  # sorted
 
 
-def test_get_all_presets_ignores_non_json(presets_dir):
+def test_get_all_presets_ignores_other_files(presets_dir):
     (presets_dir / "readme.txt").write_text("not a preset")
     from presets import get_all_presets
 
@@ -106,7 +188,7 @@ def test_delete_preset_removes_file(presets_dir):
 
     save_preset("del_me", _make_grid())
     assert delete_preset("del_me") is True
-    assert not (presets_dir / "del_me.json").exists()
+    assert not (presets_dir / "del_me.seg").exists()
 
 
 def test_delete_preset_missing(presets_dir):
@@ -147,3 +229,100 @@ def test_apply_preset_partial_grid(presets_dir):
     assert segment_grid[0][:3] == [1, 1, 1]
     # Rest stays 0
     assert segment_grid[0][3:] == [0] * 21
+
+
+# ── PresetRepository ──────────────────────────────────────────────────
+
+
+@pytest.fixture
+def repo(presets_dir, fake_clock):
+    from presets import PresetRepository
+
+    return PresetRepository(max_entries=2, check_interval=5.0, clock=fake_clock(1000.0))
+
+
+def test_repository_serves_repeat_loads_from_memory(presets_dir, repo, monkeypatch):
+    import presets as presets_mod
+
+    presets_mod.save_preset("cached", _make_grid(1))
+    assert repo.get("cached") is not None
+    monkeypatch.setattr(
+        presets_mod, "_read_frame", lambda name: pytest.fail("read from disk")
+    )
+    for _ in range(3):
+        assert repo.get("cached")[0] == 0xFFFFFF
+    assert repo.stats()["hits"] == 3
+
+
+def test_repository_returns_copies(presets_dir, repo):
+    from presets import save_preset
+
+    save_preset("copy", _make_grid(0))
+    words = repo.get("copy")
+    words[0] = 1
+    assert repo.get("copy")[0] == 0
+
+
+def test_repository_reloads_changed_file(presets_dir, repo):
+    import os
+    from presets import save_preset
+
+    save_preset("changing", _make_grid(0))
+    assert repo.get("changing")[0] == 0
+    save_preset("changing", _make_grid(1))
+    path = presets_dir / "changing.seg"
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    # Within the check interval the cached frame is trusted
+    assert repo.get("changing")[0] == 0
+    repo.clock.now += 10
+    assert repo.get("changing")[0] == 0xFFFFFF
+
+
+def test_repository_lru_eviction(presets_dir, repo):
+    from presets import save_preset
+
+    for name in ("a", "b", "c"):
+        save_preset(name, _make_grid(0))
+        repo.get(name)
+    assert repo.stats()["entries"] == 2
+    repo.get("b")
+    assert repo.stats()["hits"] == 1
+    repo.get("a")
+    assert repo.stats()["misses"] == 4
+
+
+def test_repository_missing_preset(presets_dir, repo):
+    assert repo.get("ghost") is None
+
+
+def test_repository_name_index_cached(presets_dir, repo, monkeypatch):
+    import presets as presets_mod
+
+    presets_mod.save_preset("one", _make_grid(0))
+    assert repo.names() == ["one"]
+    monkeypatch.setattr(
+        presets_mod, "_list_names", lambda d: pytest.fail("listed directory")
+    )
+    assert repo.names() == ["one"]
+
+
+def test_repository_name_index_sees_new_files(presets_dir, repo):
+    from presets import save_preset
+
+    save_preset("one", _make_grid(0))
+    assert repo.names() == ["one"]
+    (presets_dir / "two.seg").write_bytes((presets_dir / "one.seg").read_bytes())
+    repo.clock.now += 10
+    assert repo.names() == ["one", "two"]
+
+
+def test_save_and_delete_update_module_cache(presets_dir):
+    from presets import save_preset, delete_preset, get_all_presets, load_frame
+
+    save_preset("x", _make_grid(1))
+    assert get_all_presets() == ["x"]
+    assert load_frame("x")[0] == 0xFFFFFF
+    delete_preset("x")
+    assert get_all_presets() == []
+    assert load_frame("x") is None
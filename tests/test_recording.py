@@ -0,0 +1,219 @@
+"""Tests for recording.py — show files, capture and memory-mapped playback."""
+
+import mmap
+import threading
+import time
+import pytest
+import recording
+from backends import encode_frame
+from recording import (
+    RECORDING_HEADER,
+    Recorder,
+    Recording,
+    RecordingPlayer,
+    write_recording,
+)
+
+
+def _sim_wall(name="rec", num_pcbs=2):
+    from hardware import Wall
+    from layout import Layout
+    from simulator import SimulatorBackend
+
+    return Wall(name, Layout(rows=1, columns=num_pcbs), SimulatorBackend(num_pcbs))
+
+
+def _frames(count, duration=0.01, num_pcbs=2):
+    return [([i + 1] + [0] * (num_pcbs - 1), duration) for i in range(count)]
+
+
+# ── File format ───────────────────────────────────────────────────────
+
+
+def test_write_and_read_recording(tmp_path):
+    path = str(tmp_path / "show.sgr")
+    assert write_recording(path, _frames(3, 0.5), 2) == 3
+    with Recording(path) as rec:
+        assert len(rec) == 3
+        assert rec.num_pcbs == 2
+        assert [rec.timestamp(i) for i in range(3)] == [0.0, 0.5, 1.0]
+        assert rec.duration == pytest.approx(1.5)
+        assert rec.words(1) == [2, 0]
+        assert bytes(rec.frame(2)) == encode_frame([3, 0])
+        with pytest.raises(IndexError):
+            rec.frame(3)
+    size = RECORDING_HEADER.size + 3 * (8 + 2 * 4)
+    assert (tmp_path / "show.sgr").stat().st_size == size
+
+
+def test_frames_are_views_into_the_mapping(tmp_path):
+    path = str(tmp_path / "show.sgr")
+    write_recording(path, _frames(2), 2)
+    rec = Recording(path)
+    frame = rec.frame(0)
+    assert isinstance(frame, memoryview)
+    assert isinstance(frame.obj, mmap.mmap)
+    # Closing with a view still alive leaves the mapping until it is freed
+    rec.close()
+    assert bytes(frame) == encode_frame([1, 0])
+
+
+def test_unclosed_recording_is_readable(tmp_path):
+    path = str(tmp_path / "crash.sgr")
+    recorder = Recorder(path, 2)
+    for words, _ in _frames(4):
+        recorder.capture(encode_frame(words), 0.1)
+    recorder._file.flush()
+    with Recording(path) as rec:
+        assert len(rec) == 4
+    recorder.close()
+
+
+def test_recording_rejects_bad_files(tmp_path):
+    empty = tmp_path / "empty.sgr"
+    empty.write_bytes(b"")
+    with pytest.raises(ValueError):
+        Recording(str(empty))
+    other = tmp_path / "other.sgr"
+    other.write_bytes(b"7SEG" + bytes(40))
+    with pytest.raises(ValueError):
+        Recording(str(other))
+    with pytest.raises(ValueError):
+        Recorder(str(tmp_path / "x.sgr"), 2).capture(b"\x00" * 4)
+
+
+def test_long_recording_opens_without_reading_frames(tmp_path):
+    path = tmp_path / "long.sgr"
+    frames = 108000  # an hour at 30 frames per second
+    record = recording.TIMESTAMP.pack(0) + encode_frame([0xFFFFFF] * 15)
+    header = RECORDING_HEADER.pack(b"7SGR", 1, 4, 15, frames, 3600 * 10**6)
+    path.write_bytes(header + record * frames)
+    start = time.perf_counter()
+    with Recording(str(path)) as rec:
+        assert time.perf_counter() - start < 0.1
+        assert len(rec) == frames
+        assert rec.duration == 3600
+        assert rec.words(frames - 1) == [0xFFFFFF] * 15
+
+
+# ── Capture ───────────────────────────────────────────────────────────
+
+
+def test_wall_captures_latched_frames(tmp_path, monkeypatch):
+    monkeypatch.setattr(recording, "RECORDINGS_DIR", str(tmp_path))
+    wall = _sim_wall()
+    recording.start_recording("live", wall)
+    for i in range(3):
+        wall.show_frame([i + 1, 0])
+        assert wall.writer.flush(timeout=2)
+    assert recording.stop_recording(wall) == 3
+    assert recording.stop_recording(wall) is None
+    assert recording.get_all_recordings() == ["live"]
+    with Recording(recording.recording_path("live")) as rec:
+        assert [rec.words(i) for i in range(3)] == [[1, 0], [2, 0], [3, 0]]
+        assert rec.timestamp(0) == 0.0
+        assert rec.timestamp(2) >= rec.timestamp(1)
+    wall.writer.stop(timeout=2)
+
+
+# ── Playback ──────────────────────────────────────────────────────────
+
+
+def test_player_writes_frames_in_order(fake_clock, tmp_path):
+    path = str(tmp_path / "show.sgr")
+    write_recording(path, _frames(4), 2)
+    wall = _sim_wall()
+    wall.show_frame([9, 9])
+    assert wall.writer.flush(timeout=2)
+    # Frozen time never falls behind, so no frame is skipped
+    player = RecordingPlayer(wall, clock=fake_clock())
+    player.play(path)
+    assert wall.writer.paused
+    player._thread.join(timeout=2)
+    assert player.stats()["frames_shown"] == 4
+    played = [words for _, words in wall.backend.frames][1:5]
+    assert played == [[1, 0], [2, 0], [3, 0], [4, 0]]
+    # The writer takes the chain back and shows the grid again
+    assert not wall.writer.paused
+    assert wall.chain_frame is None or bytes(wall.chain_frame)
+    assert wall.writer.flush(timeout=2)
+    assert wall.backend.last_words == [9, 9]
+    wall.writer.stop(timeout=2)
+
+
+def test_player_skips_frames_that_are_already_due(tmp_path):
+    path = str(tmp_path / "burst.sgr")
+    frames = [([i, 0], 0.0) for i in range(5)] + [([7, 0], 0.02)]
+    write_recording(path, frames, 2)
+    wall = _sim_wall()
+    player = RecordingPlayer(wall)
+    player.play(path)
+    player._thread.join(timeout=2)
+    assert player.stats()["frames_shown"] == 1
+    assert player.stats()["frames_dropped"] == 5
+    assert wall.backend.frames[0][1] == [7, 0]
+    wall.writer.stop(timeout=2)
+
+
+def test_player_loops_and_stops(tmp_path):
+    path = str(tmp_path / "loop.sgr")
+    write_recording(path, _frames(2, 0.01), 2)
+    wall = _sim_wall()
+    player = RecordingPlayer(wall)
+    player.play(path, loop=True, speed=2.0)
+    deadline = time.monotonic() + 2
+    while player.stats()["passes"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    player.stop()
+    assert not player.running
+    assert player.stats()["passes"] >= 2
+    assert not wall.writer.paused
+    wall.writer.stop(timeout=2)
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "../show", "a/b", "a\\b", "a\0b"])
+def test_recording_path_rejects_unsafe_names(name):
+    with pytest.raises(ValueError):
+        recording.recording_path(name)
+
+
+def test_concurrent_play_and_stop_leave_no_thread_running(tmp_path):
+    path = str(tmp_path / "loop.sgr")
+    write_recording(path, _frames(2, 0.01), 2)
+    wall = _sim_wall()
+    player = RecordingPlayer(wall)
+    threads = []
+    errors = []
+
+    def hammer():
+        try:
+            for _ in range(10):
+                player.play(path, loop=True)
+                threads.append(player._thread)
+                player.stop()
+                player.play(path, loop=True)
+        except Exception as e:
+            errors.append(e)
+
+    callers = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in callers:
+        t.start()
+    for t in callers:
+        t.join(10)
+    player.stop()
+    assert errors == []
+    assert not player.running
+    assert not any(t is not None and t.is_alive() for t in threads)
+    assert not wall.writer.paused
+    wall.writer.stop(timeout=2)
+
+
+def test_player_rejects_mismatched_recording(tmp_path):
+    path = str(tmp_path / "wide.sgr")
+    write_recording(path, _frames(1, num_pcbs=3), 3)
+    player = RecordingPlayer(_sim_wall())
+    with pytest.raises(ValueError):
+        player.play(path)
+    with pytest.raises(ValueError):
+        player.play(path, speed=0)
+    assert not player.wall.writer.paused
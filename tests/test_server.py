@@ -0,0 +1,119 @@
+"""Tests for server.py — the bounded worker pool production server."""
+
+import http.client
+import threading
+import time
+import pytest
+import server as server_mod
+from server import PooledWSGIServer, create_server
+
+
+def _hello(environ, start_response):
+    start_response("200 OK", [("Content-Type", "text/plain")])
+    return [b"hello"]
+
+
+@pytest.fixture
+def serve():
+    """Start a PooledWSGIServer on a free port and stop it afterwards."""
+    servers = []
+
+    def start(app, threads=2, backlog=4):
+        srv = PooledWSGIServer("127.0.0.1", 0, app, threads, backlog)
+        threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers.append(srv)
+        return srv, srv.socket.getsockname()[1]
+
+    yield start
+    for srv in servers:
+        srv.shutdown()
+        srv.server_close()
+
+
+def _get(port, path="/"):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.request("GET", path)
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    return response.status, body
+
+
+def test_pooled_server_handles_requests(serve):
+    srv, port = serve(_hello)
+    assert _get(port) == (200, b"hello")
+    assert _get(port) == (200, b"hello")
+    stats = srv.stats()
+    assert stats["threads"] == 2
+    assert stats["rejected"] == 0
+
+
+def test_pooled_server_rejects_when_workers_and_queue_are_full(serve):
+    release = threading.Event()
+    entered = threading.Semaphore(0)
+
+    def slow(environ, start_response):
+        entered.release()
+        release.wait(5)
+        return _hello(environ, start_response)
+
+    srv, port = serve(slow, threads=1, backlog=1)
+    results = []
+    first = threading.Thread(target=lambda: results.append(_get(port)))
+    first.start()
+    assert entered.acquire(timeout=5)
+    second = threading.Thread(target=lambda: results.append(_get(port)))
+    second.start()
+    deadline = time.monotonic() + 5
+    while srv.stats()["waiting"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    status, _ = _get(port)
+    release.set()
+    first.join()
+    second.join()
+    assert status == 503
+    assert srv.stats()["rejected"] == 1
+    assert results == [(200, b"hello"), (200, b"hello")]
+
+
+def test_pooled_server_rejects_bad_sizes():
+    with pytest.raises(ValueError):
+        PooledWSGIServer("127.0.0.1", 0, _hello, threads=0)
+    with pytest.raises(ValueError):
+        PooledWSGIServer("127.0.0.1", 0, _hello, backlog=0)
+
+
+def test_create_server_falls_back_without_waitress(monkeypatch):
+    monkeypatch.setattr(server_mod, "waitress", None)
+    srv = create_server(
+        _hello, "127.0.0.1", 0, threads=1, backlog=1, backend="waitress"
+    )
+    try:
+        assert isinstance(srv, PooledWSGIServer)
+    finally:
+        srv.server_close()
+
+
+def test_stream_viewers_leave_workers_for_other_requests(serve, monkeypatch):
+    import app as app_mod
+
+    monkeypatch.setattr(app_mod, "stream_slots", threading.BoundedSemaphore(1))
+    _, port = serve(app_mod.app, threads=2, backlog=4)
+    viewer = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    viewer.request("GET", "/stream")
+    response = viewer.getresponse()
+    assert response.status == 200
+    assert response.readline().startswith(b"id: ")
+    assert _get(port, "/stream")[0] == 503
+    status, _ = _get(port, "/get_grid_state")
+    assert status == 200
+    viewer.close()
+
+
+def test_app_served_by_pool(serve):
+    from app import app
+
+    _, port = serve(app)
+    status, body = _get(port, "/get_grid_state")
+    assert status == 200
+    assert b'"success":true' in body.replace(b" ", b"")
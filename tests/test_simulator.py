@@ -0,0 +1,139 @@
+"""Tests for simulator.py — shift-register chain model, GPIO stand-in and renderers."""
+
+import pytest
+import backends as backends_mod
+from backends import BitBangBackend, SharedClockGroup, encode_frame
+from layout import Layout
+from simulator import (
+    ShiftChain,
+    SimulatedGPIO,
+    SimulatorBackend,
+    render_ppm,
+    render_terminal,
+    write_image_sequence,
+)
+
+
+@pytest.fixture
+def gpio(monkeypatch):
+    sim = SimulatedGPIO()
+    monkeypatch.setattr(backends_mod, "GPIO", sim)
+    monkeypatch.setattr(backends_mod, "clock_delay", lambda s: None)
+    return sim
+
+
+# ── ShiftChain ────────────────────────────────────────────────────────
+
+
+def test_chain_decodes_frame_in_chain_order():
+    chain = ShiftChain(3)
+    chain.shift_bytes(encode_frame([0x000001, 0x00FF00, 0xFF0000]))
+    assert chain.words() == [0, 0, 0]  # nothing shown until latched
+    chain.latch()
+    assert chain.last_words == [0x000001, 0x00FF00, 0xFF0000]
+
+
+def test_chain_drops_bits_past_the_far_end():
+    chain = ShiftChain(1)
+    chain.shift_bytes(encode_frame([0x123456]))
+    chain.shift_bytes(encode_frame([0x00000F]))
+    chain.latch()
+    assert chain.last_words == [0x00000F]
+
+
+def test_partial_shift_moves_old_data_along():
+    chain = ShiftChain(2)
+    chain.shift_bytes(encode_frame([0x000001, 0]))
+    chain.shift_bytes(encode_frame([0x000002]))
+    chain.latch()
+    # The previous PCB 0 word has moved one PCB further down the chain
+    assert chain.last_words == [0x000002, 0x000001]
+
+
+def test_chain_records_timestamps(fake_clock):
+    chain = ShiftChain(1, clock=fake_clock(step=0.5), max_frames=2)
+    for _ in range(3):
+        chain.latch()
+    assert [t for t, _ in chain.frames] == [1.0, 1.5]
+    assert chain.frame_intervals() == [0.5]
+
+
+# ── SimulatedGPIO ─────────────────────────────────────────────────────
+
+
+def test_bitbang_backend_through_simulated_gpio(gpio):
+    chain = gpio.attach(ShiftChain(15), sdi_pin=10, clock_pin=11, le_pin=5)
+    words = [i * 0x010101 for i in range(15)]
+    BitBangBackend(10, 11, 5).write_frame(encode_frame(words))
+    assert chain.bits_clocked == 15 * 32
+    assert chain.frames[-1][1] == words
+
+
+def test_shared_clock_group_through_simulated_gpio(gpio):
+    first = gpio.attach(ShiftChain(1), sdi_pin=20, clock_pin=11, le_pin=5)
+    second = gpio.attach(ShiftChain(2), sdi_pin=21, clock_pin=11, le_pin=5)
+    group = SharedClockGroup(clock_pin=11, le_pin=5)
+    one = group.add_member(20, 1)
+    two = group.add_member(21, 2)
+    two.write_frame(encode_frame([5, 6]))
+    one.write_frame(encode_frame([7]))
+    assert first.last_words == [7]
+    assert second.last_words == [5, 6]
+
+
+def test_latch_only_on_rising_edge(gpio):
+    chain = gpio.attach(ShiftChain(1), 10, 11, 5)
+    gpio.output(5, 1)
+    gpio.output(5, 1)
+    gpio.output(5, 0)
+    assert len(chain.frames) == 1
+
+
+# ── SimulatorBackend ──────────────────────────────────────────────────
+
+
+def test_simulator_backend_as_wall_backend():
+    from hardware import Wall
+
+    backend = SimulatorBackend(4)
+    wall = Wall("sim", Layout(rows=2, columns=2), backend)
+    wall.apply_segment_ops([{"op": "set", "pcb": 3, "segment": 23}])
+    wall.writer.flush()
+    assert backend.last_words == [0, 0, 0, 1 << 23]
+
+
+# ── Rendering ─────────────────────────────────────────────────────────
+
+
+def test_render_terminal_draws_glyph():
+    layout = Layout(rows=1, columns=1, displays_per_pcb=1)
+    eight = 0x7F | 0x80
+    assert render_terminal([eight], layout) == " _\n|_|\n|_|."
+
+
+def test_render_terminal_uses_chain_mapping():
+    layout = Layout(
+        rows=1, columns=2, numbering="row-major", chain_order="serpentine-columns"
+    )
+    text = render_terminal([0, 1], layout)
+    # Segment A of the right-hand PCB's first display
+    assert text.splitlines()[0].strip() == "_"
+    assert text.splitlines()[0].index("_") > 10
+
+
+def test_render_ppm_header_and_size():
+    layout = Layout(rows=1, columns=1, displays_per_pcb=1)
+    image = render_ppm([0xFF], layout, scale=1)
+    header, _, pixels = image.partition(b"\n")
+    assert header == b"P6 9 12 255"
+    assert len(pixels) == 9 * 12 * 3
+
+
+def test_write_image_sequence(tmp_path):
+    frames = [(0.0, [0] * 15), (0.1, [0xFFFFFF] * 15)]
+    paths = write_image_sequence(frames, str(tmp_path / "out"), scale=1)
+    assert [p.rsplit("/", 1)[1] for p in paths] == [
+        "frame_00000.ppm",
+        "frame_00001.ppm",
+    ]
+    assert open(paths[1], "rb").read().startswith(b"P6 ")
@@ -0,0 +1,131 @@
+"""Tests for ticker.py — scrolling frame generation and text feeds."""
+
+import threading
+import time
+from itertools import islice
+import pytest
+import ticker
+from config import NUM_PCBS
+from glyphs import GLYPHS, POSITIONS, SEG_DP
+from ticker import TickerFeed, follow_file, looping_cells, ticker_frames
+
+
+def _cell_at(words, position):
+    chain, shift = POSITIONS[position]
+    return (words[chain] >> shift) & 0xFF
+
+
+# ── TickerFeed ────────────────────────────────────────────────────────
+
+
+def test_feed_yields_cells_and_folds_dots():
+    feed = TickerFeed("1.2")
+    feed.close()
+    assert list(feed.cells()) == [GLYPHS["1"] | SEG_DP, GLYPHS["2"]]
+
+
+def test_feed_scrolls_blanks_while_waiting():
+    feed = TickerFeed("8")
+    cells = feed.cells()
+    assert next(cells) == GLYPHS["8"]
+    assert next(cells) == 0
+    feed.push("1")
+    assert next(cells) == GLYPHS["1"]
+    feed.close()
+    assert list(cells) == []
+
+
+def test_feed_refuses_text_past_max_pending():
+    feed = TickerFeed("12", max_pending=4)
+    assert feed.push("34") is True
+    assert feed.push("5") is False
+    assert feed.pending == 4
+
+
+def test_looping_cells_repeat_with_gap():
+    cells = list(islice(looping_cells("12", gap=1), 6))
+    assert cells == [GLYPHS["1"], GLYPHS["2"], 0, GLYPHS["1"], GLYPHS["2"], 0]
+
+
+# ── ticker_frames ─────────────────────────────────────────────────────
+
+
+def test_text_enters_from_the_right():
+    frames = ticker_frames([GLYPHS["8"], GLYPHS["1"]], cps=2, width=5)
+    words, duration = next(frames)
+    assert duration == 0.5
+    assert _cell_at(words, 4) == GLYPHS["8"]
+    words, _ = next(frames)
+    assert _cell_at(words, 3) == GLYPHS["8"]
+    assert _cell_at(words, 4) == GLYPHS["1"]
+
+
+def test_scroll_out_clears_window():
+    frames = list(ticker_frames([GLYPHS["8"]], width=3))
+    assert len(frames) == 1 + 3
+    assert frames[-1][0] == [0] * NUM_PCBS
+
+
+def test_frames_respect_start_offset():
+    frames = ticker_frames([GLYPHS["8"]], start=9, width=9, scroll_out=False)
+    words, _ = next(frames)
+    assert _cell_at(words, 17) == GLYPHS["8"]
+    assert _cell_at(words, 44) == 0
+
+
+def test_frames_generated_lazily():
+    def endless():
+        while True:
+            yield GLYPHS["8"]
+
+    frames = ticker_frames(endless(), width=2)
+    taken = list(islice(frames, 1000))
+    assert len(taken) == 1000
+
+
+# ── follow_file ───────────────────────────────────────────────────────
+
+
+def test_follow_file_reads_lines_and_closes(tmp_path):
+    path = tmp_path / "news.txt"
+    path.write_text("hello\nworld\n")
+    feed = TickerFeed()
+    follow_file(str(path), feed, follow=False)
+    assert feed.closed
+    text_cells = list(feed.cells())
+    assert len(text_cells) == len("hello world ")
+
+
+def test_follow_file_bounds_read_ahead(tmp_path):
+    path = tmp_path / "long.txt"
+    path.write_text("1" * 100 + "\n")
+    feed = TickerFeed()
+    reader = threading.Thread(
+        target=follow_file,
+        args=(str(path), feed),
+        kwargs={"follow": False, "poll_interval": 0.001, "max_read_ahead": 10},
+    )
+    reader.start()
+    deadline = time.monotonic() + 2
+    while feed.pending < 10 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    time.sleep(0.02)
+    assert feed.pending == 10
+    assert reader.is_alive()
+    cells = list(feed.cells())
+    reader.join(2)
+    assert sum(1 for cell in cells if cell) == 100
+
+
+def test_ticker_source_path_stays_inside_sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(ticker, "TICKER_SOURCES_DIR", str(tmp_path))
+    assert ticker.ticker_source_path("news.txt") == str(tmp_path / "news.txt")
+    for name in ("../news.txt", "/dev/zero", "", "."):
+        with pytest.raises(ValueError):
+            ticker.ticker_source_path(name)
+
+
+def test_follow_file_missing_closes_feed(tmp_path):
+    feed = TickerFeed()
+    follow_file(str(tmp_path / "nope"), feed, follow=False)
+    assert feed.closed
@@ -0,0 +1,137 @@
+"""Tests for transitions.py — XOR-scheduled transitions between frames."""
+
+import pytest
+import transitions
+from config import LAYOUT, NUM_PCBS
+from transitions import (
+    Transition,
+    changed_bits,
+    make_transition,
+    segment_places,
+)
+
+
+def _frames(transition):
+    return [list(words) for words, _ in transition]
+
+
+def _pair():
+    source = [0] * NUM_PCBS
+    target = [0] * NUM_PCBS
+    source[0] = 0b1111
+    target[0] = 0b0011
+    target[3] = 0xFFFFFF
+    target[NUM_PCBS - 1] = 0b101
+    return source, target
+
+
+# ── Scheduling ────────────────────────────────────────────────────────
+
+
+def test_changed_bits_is_the_xor():
+    assert changed_bits([0b1010, 0], [0b0110, 0b1]) == [(0, 2), (0, 3), (1, 0)]
+    assert changed_bits([5, 6], [5, 6]) == []
+
+
+def test_segment_places_cover_every_wired_segment():
+    places = segment_places(LAYOUT)
+    assert len(places) == LAYOUT.num_positions * 8
+    index, bit = LAYOUT.locate(0, 0)
+    position, segment, x, y = places[index, bit]
+    assert (position, segment) == (0, 0)
+    assert 0 < x < 120 and 0 < y < 200
+
+
+def test_transition_only_stores_changing_bits():
+    source, target = _pair()
+    t = make_transition("dissolve", source, target, steps=5, seed=1)
+    stored = sum(
+        bin(mask).count("1") for step in t.flips.values() for mask in step.values()
+    )
+    assert stored == len(changed_bits(source, target))
+
+
+@pytest.mark.parametrize("name", sorted(transitions.TRANSITIONS))
+def test_transitions_end_on_target(name):
+    source, target = _pair()
+    frames = _frames(make_transition(name, source, target, steps=8, duration=0.8))
+    assert len(frames) == 8
+    assert frames[-1] == target
+    # Every intermediate frame only differs from the source in changing bits
+    for words in frames:
+        for old, new, now in zip(source, target, words):
+            assert (old ^ now) & ~(old ^ new) == 0
+
+
+def test_transition_durations_add_up():
+    source, target = _pair()
+    t = make_transition("morph", source, target, steps=4, duration=2.0)
+    assert [d for _, d in t] == [0.5] * 4
+
+
+def test_transition_is_generated_lazily():
+    source, target = _pair()
+    t = make_transition("wipe", source, target, steps=1000)
+    frames = iter(t)
+    words, _ = next(frames)
+    assert len(words) == NUM_PCBS
+    # Replaying starts from the source again
+    assert _frames(t) == _frames(t)
+
+
+def test_dissolve_flips_one_batch_per_step():
+    source, target = _pair()
+    changes = len(changed_bits(source, target))
+    frames = _frames(make_transition("dissolve", source, target, steps=changes, seed=2))
+    previous = source
+    for words in frames:
+        assert len(changed_bits(previous, words)) == 1
+        previous = words
+
+
+def test_wipe_moves_left_to_right():
+    source = [0] * NUM_PCBS
+    target = [0xFFFFFF] * NUM_PCBS
+    places = segment_places(LAYOUT)
+    frames = _frames(make_transition("wipe", source, target, steps=10))
+    edges = []
+    for words in frames:
+        lit = [places[bit][2] for bit in changed_bits(source, words) if bit in places]
+        edges.append(max(lit))
+    assert edges == sorted(edges)
+    assert edges[0] < edges[-1]
+    assert changed_bits(frames[0], target)
+
+
+def test_morph_switches_off_before_on():
+    # F switches off first, then A and E switch on in segment order
+    index, bit_a = LAYOUT.locate(0, 0)
+    _, bit_e = LAYOUT.locate(0, 4)
+    _, bit_f = LAYOUT.locate(0, 5)
+    source = [0] * NUM_PCBS
+    target = [0] * NUM_PCBS
+    source[index] = 1 << bit_f
+    target[index] = 1 << bit_a | 1 << bit_e
+    frames = _frames(make_transition("morph", source, target, steps=3))
+    assert frames[0][index] == 0
+    assert frames[1][index] == 1 << bit_a
+    assert frames[2][index] == target[index]
+
+
+def test_make_transition_rejects_bad_input():
+    source, target = _pair()
+    with pytest.raises(ValueError):
+        make_transition("spin", source, target)
+    with pytest.raises(ValueError):
+        make_transition("wipe", source, target, steps=0)
+    with pytest.raises(ValueError):
+        Transition(source, target[:-1], {}, 4)
+
+
+def test_preset_transition(monkeypatch):
+    from hardware import default_wall
+
+    monkeypatch.setattr(transitions, "load_frame", lambda name, n: [1] * n)
+    assert transitions.preset_transition("x", "dissolve", steps=2) is not None
+    monkeypatch.setattr(transitions, "load_frame", lambda name, n: None)
+    assert transitions.preset_transition("x", "dissolve", wall=default_wall) is None
@@ -0,0 +1,157 @@
+import os
+import threading
+import time
+from collections import deque
+from itertools import cycle
+from config import (
+    TICKER_CPS,
+    TICKER_MAX_PENDING,
+    TICKER_MAX_READ_AHEAD,
+    TICKER_POLL_INTERVAL,
+    TICKER_SOURCES_DIR,
+)
+from glyphs import SEG_DP, glyph, text_to_cells
+from hardware import default_wall
+
+
+class TickerFeed:
+    """Thread-safe queue of text waiting to scroll onto the wall
+
+    Text can be pushed at any time while the ticker runs. When the queue is
+    empty the ticker keeps scrolling blanks until more text arrives or the
+    feed is closed. At most ``max_pending`` characters are held; ``push``
+    refuses text that would go over.
+    """
+
+    def __init__(self, text='', max_pending=TICKER_MAX_PENDING):
+        self._chars = deque(text)
+        self._lock = threading.Lock()
+        self.max_pending = max_pending
+        self.closed = False
+
+    def push(self, text):
+        """Queue more text at the end of the ticker; False if it doesn't fit"""
+        with self._lock:
+            if len(self._chars) + len(text) > self.max_pending:
+                return False
+            self._chars.extend(text)
+            return True
+
+    def close(self):
+        """End the ticker once the queued text has scrolled past"""
+        self.closed = True
+
+    @property
+    def pending(self):
+        """Number of characters queued but not yet scrolled on"""
+        with self._lock:
+            return len(self._chars)
+
+    def cells(self):
+        """Yield one display pattern per step, blank while waiting for text"""
+        while True:
+            with self._lock:
+                if not self._chars:
+                    if self.closed:
+                        return
+                    cell = 0
+                else:
+                    char = self._chars.popleft()
+                    if char == '.':
+                        cell = SEG_DP
+                    else:
+                        cell = glyph(char)
+                        if self._chars and self._chars[0] == '.':
+                            self._chars.popleft()
+                            cell |= SEG_DP
+            yield cell
+
+
+def looping_cells(text, gap=3):
+    """Cells for ``text`` repeated forever with ``gap`` blanks between"""
+    return cycle(text_to_cells(text) + [0] * gap)
+
+
+def ticker_frames(
+    cells, cps=TICKER_CPS, start=0, width=None, scroll_out=True, wall=None
+):
+    """Yield ``(words, duration)`` frames scrolling ``cells`` right to left
+
+    Frames are built one step at a time from a sliding window, so an endless
+    or live source is never materialised. Each new cell enters at the right
+    edge of the ``width`` displays beginning at display ``start``; by
+    default the rest of the wall.
+    """
+    if wall is None:
+        wall = default_wall
+    duration = 1.0 / cps
+    end = None if width is None else start + width
+    positions = wall.positions[start:end]
+    pattern_map = wall.layout.pattern_map
+    window = deque([0] * len(positions), maxlen=len(positions))
+
+    def frame():
+        words = [0] * wall.num_pcbs
+        for (chain_index, shift), pattern in zip(positions, window):
+            if pattern:
+                words[chain_index] |= pattern_map[pattern] << shift
+        return words
+
+    for cell in cells:
+        window.append(cell)
+        yield frame(), duration
+    if scroll_out:
+        for _ in range(len(positions)):
+            window.append(0)
+            yield frame(), duration
+
+
+def ticker_source_path(name):
+    """Resolve ``name`` inside ``TICKER_SOURCES_DIR``; ValueError if it leads outside"""
+    root = os.path.realpath(TICKER_SOURCES_DIR)
+    path = os.path.realpath(os.path.join(root, name))
+    if path == root or os.path.commonpath([root, path]) != root:
+        raise ValueError(f"Ticker source must be inside {TICKER_SOURCES_DIR}")
+    return path
+
+
+def follow_file(
+    path,
+    feed,
+    follow=True,
+    poll_interval=TICKER_POLL_INTERVAL,
+    max_read_ahead=TICKER_MAX_READ_AHEAD,
+):
+    """Push text from a file or named pipe into ``feed`` until it is closed
+
+    Line breaks become spaces. With ``follow`` the file is watched for new
+    text, like ``tail -f``; otherwise the feed is closed at end of file.
+    At most ``max_read_ahead`` characters are read at a time, and reading
+    waits while that many are still queued, so a long line or an endless
+    source can't fill memory.
+    """
+    try:
+        with open(path, 'r') as f:
+            while not feed.closed:
+                if feed.pending >= max_read_ahead:
+                    time.sleep(poll_interval)
+                    continue
+                line = f.readline(max_read_ahead)
+                if line:
+                    feed.push(line.replace('\r', '').replace('\n', ' '))
+                elif follow:
+                    time.sleep(poll_interval)
+                else:
+                    break
+    except OSError as e:
+        print(f"Error reading ticker source {path}: {e}")
+    feed.close()
+
+
+def start_file_reader(path, feed, follow=True):
+    """Read ``path`` into ``feed`` on a background thread"""
+    thread = threading.Thread(
+        target=follow_file, args=(path, feed, follow), name='ticker-reader', daemon=True
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,188 @@
+import functools
+import math
+import random
+from array import array
+from config import LAYOUT, TRANSITION_DURATION, TRANSITION_STEPS
+from hardware import get_wall
+from layout import SEGMENT_NAMES
+from presets import load_frame
+
+
+@functools.lru_cache(maxsize=8)
+def segment_places(layout=LAYOUT):
+    """Map ``(chain index, word bit)`` to ``(position, segment, x, y)`` for a layout
+
+    ``position`` is the display's index in reading order, ``segment`` is 0-7
+    (A-DP) and ``x``/``y`` are the segment's centre as the UI draws it.
+    """
+    places = {}
+    for position in range(layout.num_positions):
+        for segment in range(len(SEGMENT_NAMES)):
+            x, y = layout.segment_xy(position, segment)
+            places[layout.locate(position, segment)] = (position, segment, x, y)
+    return places
+
+
+def changed_bits(source, target):
+    """List the ``(chain index, word bit)`` of every segment that differs"""
+    changes = []
+    for index, (old, new) in enumerate(zip(source, target)):
+        diff = old ^ new
+        while diff:
+            low = diff & -diff
+            changes.append((index, low.bit_length() - 1))
+            diff ^= low
+    return changes
+
+
+class Transition:
+    """Frames stepping from one packed frame to another, generated as they are played
+
+    Only the bits in ``source ^ target`` are scheduled: ``schedule`` maps
+    each changing ``(chain index, word bit)`` to the step, 1 to ``steps``,
+    at which it flips. Iterating yields ``(words, duration)`` pairs like an
+    Animation, building each frame from the previous one, so memory grows
+    with the number of changing segments rather than the number of frames.
+    The last frame is always ``target``.
+    """
+
+    def __init__(
+        self, source, target, schedule, steps, duration=TRANSITION_DURATION, name=None
+    ):
+        if len(source) != len(target):
+            raise ValueError(f'expected {len(source)} words, got {len(target)}')
+        if steps < 1:
+            raise ValueError('steps must be at least 1')
+        if duration <= 0:
+            raise ValueError('transition duration must be positive')
+        self.name = name
+        self.source = array('I', source)
+        self.target = array('I', target)
+        self.steps = steps
+        self.duration = float(duration)
+        # Flip masks per step as {step: {chain index: mask}}
+        self.flips = {}
+        for (index, bit), step in schedule.items():
+            step = min(max(int(step), 1), steps)
+            masks = self.flips.setdefault(step, {})
+            masks[index] = masks.get(index, 0) | 1 << bit
+
+    def __len__(self):
+        return self.steps
+
+    def __iter__(self):
+        words = array('I', self.source)
+        slot = self.duration / self.steps
+        for step in range(1, self.steps + 1):
+            for index, mask in self.flips.get(step, {}).items():
+                words[index] ^= mask
+            yield array('I', words), slot
+
+
+def _spread(ordered, steps):
+    """Schedule bits evenly across the steps in the given order"""
+    count = len(ordered)
+    return {bit: i * steps // count + 1 for i, bit in enumerate(ordered)}
+
+
+def dissolve(source, target, steps, layout=LAYOUT, seed=None):
+    """Flip the differing segments one by one in a random order"""
+    changes = changed_bits(source, target)
+    random.Random(seed).shuffle(changes)
+    return _spread(changes, steps)
+
+
+def wipe(source, target, steps, layout=LAYOUT, angle=0.0):
+    """Flip the differing segments as an edge crosses the wall
+
+    ``angle`` is in degrees; 0 moves left to right, 90 top to bottom.
+    """
+    places = segment_places(layout)
+    a = math.radians(angle)
+    dx, dy = math.cos(a), math.sin(a)
+    # Corners of the wall bound the edge's travel
+    width = max(x for _, _, x, _ in places.values())
+    height = max(y for _, _, _, y in places.values())
+    ends = [x * dx + y * dy for x in (0, width) for y in (0, height)]
+    start, span = min(ends), (max(ends) - min(ends)) or 1.0
+    schedule = {}
+    for bit in changed_bits(source, target):
+        place = places.get(bit)
+        if place is None:
+            # Unwired bits have no position; settle them with the last step
+            schedule[bit] = steps
+            continue
+        distance = (place[2] * dx + place[3] * dy - start) / span
+        schedule[bit] = min(steps, int(distance * steps) + 1)
+    return schedule
+
+
+def morph(source, target, steps, layout=LAYOUT):
+    """Reshape every display at once, one segment at a time
+
+    Within a display, segments going dark switch off first (A to DP) and
+    new segments then switch on, so each character morphs into the next
+    through outlines that share its remaining segments.
+    """
+    places = segment_places(layout)
+    queues = {}
+    leftover = []
+    for index, bit in changed_bits(source, target):
+        place = places.get((index, bit))
+        if place is None:
+            leftover.append((index, bit))
+            continue
+        position, segment = place[:2]
+        turning_on = target[index] >> bit & 1
+        queues.setdefault(position, []).append((turning_on, segment, (index, bit)))
+    longest = max((len(queue) for queue in queues.values()), default=1)
+    schedule = {bit: steps for bit in leftover}
+    for queue in queues.values():
+        queue.sort()
+        for rank, (_, _, bit) in enumerate(queue):
+            schedule[bit] = rank * steps // longest + 1
+    return schedule
+
+
+# Transitions available by name, e.g. to /load_preset
+TRANSITIONS = {
+    'dissolve': dissolve,
+    'wipe': wipe,
+    'morph': morph,
+}
+
+
+def make_transition(
+    name,
+    source,
+    target,
+    steps=TRANSITION_STEPS,
+    duration=TRANSITION_DURATION,
+    layout=LAYOUT,
+    **params,
+):
+    """Build a named Transition between two packed frames"""
+    try:
+        style = TRANSITIONS[name]
+    except KeyError:
+        raise ValueError(f"Unknown transition: {name}") from None
+    schedule = style(source, target, steps, layout, **params)
+    return Transition(source, target, schedule, steps, duration, name)
+
+
+def preset_transition(
+    preset,
+    name,
+    steps=TRANSITION_STEPS,
+    duration=TRANSITION_DURATION,
+    wall=None,
+    **params,
+):
+    """Transition from what ``wall`` shows now to a preset, or None if it is missing"""
+    wall = get_wall(wall)
+    target = load_frame(preset, wall.num_pcbs)
+    if target is None:
+        return None
+    with wall.grid_lock:
+        source = list(wall.segment_grid.words)
+    return make_transition(name, source, target, steps, duration, wall.layout, **params)